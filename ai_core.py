@@ -1,4 +1,4 @@
-# ai_core.py (Version 6.4 - Prompt Decoupling Final Production Edition)
+# ai_core.py (Version 7.2 - Prompt Registry Edition)
 
 # ==============================================================================
 # 1. 导入工具箱 (Import necessary tools)
@@ -7,101 +7,115 @@ import os
 import logging
 import json
 import re
-from openai import OpenAI
 from dotenv import load_dotenv
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-from openai import APIConnectionError, RateLimitError, APIStatusError
-from logger_config import logger
+import config
+import metrics
+from model_router import (build_router, AllEndpointsFailed, read_stream, read_response, stream_timeout,
+                          trim_to_sentence)
+from prompt_registry import load_registry
+from logger_config import logger, article_logger
 
 # ==============================================================================
 # 2. 加载、验证配置与初始化客户端 (Load, Validate Configs & Initialize Client)
 # ==============================================================================
 load_dotenv(override=True)
 
-api_key = os.getenv("OPENAI_API_KEY")
-base_url = os.getenv("OPENAI_API_BASE")
 DEFAULT_MODEL = os.getenv("DEFAULT_MODEL")
 
-if not api_key: raise ValueError("错误: OPENAI_API_KEY 未在 .env 文件中找到。")
-if not DEFAULT_MODEL: raise ValueError("错误: DEFAULT_MODEL 未在 .env 文件中找到。")
+# 未配置模型池时，沿用 .env 中的单一模型
+if not config.MODEL_POOL:
+    if not os.getenv("OPENAI_API_KEY"): raise ValueError("错误: OPENAI_API_KEY 未在 .env 文件中找到。")
+    if not DEFAULT_MODEL: raise ValueError("错误: DEFAULT_MODEL 未在 .env 文件中找到。")
 
-client_params = {"api_key": api_key}
-if base_url: client_params["base_url"] = base_url
-client = OpenAI(**client_params)
-logger.info(f"AI核心已初始化，将强制使用模型: '{DEFAULT_MODEL}'")
+router = build_router()
+logger.info("AI核心已初始化，模型池: " + ", ".join(
+    f"{e.name}={e.model} ({e.tier}, 并发{e.max_concurrency})" for e in router.endpoints
+))
 
 # ==============================================================================
-# 3. 新增: Prompt加载函数 (NEW: Prompt Loading Function)
+# 3. Prompt注册表 (Prompt Registry)
 # ==============================================================================
-def load_prompt(file_path: str) -> str:
-    """从一个.prompt文件中加载Prompt模板。"""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
-    except FileNotFoundError:
-        logger.critical(f"致命错误: Prompt文件未找到: {file_path}")
-        raise
-    except Exception as e:
-        logger.critical(f"加载Prompt文件时发生致命错误: {e}")
-        raise
+# --- 在模块加载时，一次性加载并校验 prompts/ 目录下的所有Prompt版本 (见 prompt_registry.py) ---
+PROMPTS = load_registry()
+SUMMARY_PROMPT = PROMPTS.get(config.SUMMARY_PROMPT_VERSION)
+logger.info(f"摘要Prompt版本: '{SUMMARY_PROMPT.version}'，可缓存的静态前缀 {len(SUMMARY_PROMPT.static_prefix)} 个字符。")
 
-# --- 在模块加载时，就读取好我们的Prompt模板 ---
-PROMPT_TEMPLATE = load_prompt("prompts/summarizer_v1.prompt")
-logger.info("摘要Prompt模板 'summarizer_v1.prompt' 加载成功。")
+# 摘要请求的采样温度。同步调用与批量模式 (batch_summarizer.py) 使用相同的请求参数
+SUMMARY_TEMPERATURE = 0.2
 
 
 # ==============================================================================
 # 4. 带重试的API调用函数 (Retry-enabled API call function)
 # ==============================================================================
+# 单个端点的失败由路由器立即切换端点处理；只有整个模型池都失败时才退避后重试
 @retry(
-    retry=retry_if_exception_type((APIConnectionError, RateLimitError, APIStatusError)),
+    retry=retry_if_exception_type(AllEndpointsFailed),
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=2, max=10),
     before_sleep=lambda retry_state: logger.warning(f"AI API调用失败，正在进行第 {retry_state.attempt_number} 次重试...")
 )
-def chat_completion_with_retry(**kwargs):
-    logger.info("    ~ 正在调用AI API...")
-    return client.chat.completions.create(**kwargs)
+def chat_completion_with_retry(content_chars: int, **kwargs):
+    """通过模型池发送请求，返回 (读取后的结果, 实际完成请求的端点)。"""
+    article_logger.info("    ~ 正在调用AI API...")
+    return router.complete(content_chars, **kwargs)
 
 
 # ==============================================================================
 # 5. 核心摘要函数 (Core Summarization Function - Now using the template)
 # ==============================================================================
-def summarize_article(article: dict):
-    logger.info(f"  > ----------------------------------------------------")
-    logger.info(f"  > 正在为文章生成摘要: {article['url']}")
-
-    # --- 使用加载的模板和字符串的.format()方法来填充占位符 ---
-    prompt = PROMPT_TEMPLATE.format(
+def build_messages(article: dict) -> list[dict]:
+    """用当前的摘要Prompt构造一次摘要请求的消息列表: 静态的 system 消息在前，文章正文在最后。"""
+    return SUMMARY_PROMPT.messages(
         source_name=article['source_name'],
-        clean_content=article['clean_content']
+        title=article.get('title') or "",
+        clean_content=article['clean_content'],
     )
 
+
+def clean_summary(text: str) -> str:
+    """深度净化AI返回的摘要: 去掉<br>标签，并把所有空白字符合并为单个空格。"""
+    text_no_br = re.sub(r'<br\s*/?>', ' ', text, flags=re.IGNORECASE)
+    return " ".join(text_no_br.split())
+
+
+def summarize_article(article: dict):
+    article_logger.info(f"  > 正在为文章生成摘要: {article['url']}")
+
     try:
-        response = chat_completion_with_retry(
-            model=DEFAULT_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
-            max_tokens=500,
+        result, endpoint = chat_completion_with_retry(
+            len(article['clean_content']),
+            consume=read_stream if config.SUMMARY_STREAMING else read_response,
+            stream=config.SUMMARY_STREAMING,
+            timeout=stream_timeout() if config.SUMMARY_STREAMING else config.ROUTER_REQUEST_TIMEOUT,
+            messages=build_messages(article),
+            temperature=SUMMARY_TEMPERATURE,
+            max_tokens=config.SUMMARY_MAX_TOKENS,
         )
-        
-        summary_text_raw = response.choices[0].message.content.strip()
-        
+        metrics.record("llm.ttft", result['ttft'])
+        metrics.record("llm.total", result['total'])
+
+        summary_text_raw = result['text'].strip()
+        if result['finish_reason'] in ("length_cap", "time_cap"):
+            article_logger.warning(f"  - 摘要生成达到上限 ({result['finish_reason']})，已提前中止: {article['url']}")
+            summary_text_raw = trim_to_sentence(summary_text_raw)
+
         if not summary_text_raw:
-             logger.warning(f"  - AI返回了空摘要: {article['url']}")
+             article_logger.warning(f"  - AI返回了空摘要: {article['url']}")
              return None
 
-        text_no_br = re.sub(r'<br\s*/?>', ' ', summary_text_raw, flags=re.IGNORECASE)
-        sanitized_summary = " ".join(text_no_br.split())
+        sanitized_summary = clean_summary(summary_text_raw)
         
-        logger.info(f"  + 摘要生成并深度净化成功。")
+        article_logger.info(f"  + 摘要生成并深度净化成功 (模型: {endpoint.model}, "
+                            f"首字 {result['ttft']:.2f}s, 总耗时 {result['total']:.2f}s)。")
         
         database_ready_data = {
             'summary_data': {
                 'source_url': article['url'],
                 'summary_text': sanitized_summary,
                 'source_name': article['source_name'],
-                'model_used': DEFAULT_MODEL,
+                'model_used': endpoint.model,
+                'prompt_version': SUMMARY_PROMPT.version,
             },
             'original_content_data': {
                 'content_text': article['clean_content']
@@ -123,7 +137,7 @@ if __name__ == '__main__':
         'clean_content': " 探索一直在进行。今年暑期，上海静安区文化馆推出科普探索营，集结医疗、警务、消防、金融等领域专业人士，普及专业知识，或者提供沉浸式职业体验，为青少年打造既好玩又富有教育意义的体验活动。湖南长沙雨花区引导鼓励青少年走进超市，参与商品推荐、货架补货陈列、电商订单拣货以及蔬果区称重打包等环节，帮助孩子们感受课堂之外的广阔天地。开眼界、长见识、增本领，孩子开心、家长放心、社会安心。 "
     }
 
-    logger.info(f"--- 开始独立测试 ai_core (强制使用模型: {DEFAULT_MODEL}) ---")
+    logger.info(f"--- 开始独立测试 ai_core (模型池: {[e.name for e in router.endpoints]}) ---")
     
     summary_result = summarize_article(sample_article)
 
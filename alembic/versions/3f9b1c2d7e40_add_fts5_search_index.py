@@ -0,0 +1,29 @@
+"""Add FTS5 full-text search index
+
+Revision ID: 3f9b1c2d7e40
+Revises: a553667fd4c7
+Create Date: 2026-10-19 09:12:03.418522
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from search import ensure_search_index, drop_search_index
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9b1c2d7e40'
+down_revision: Union[str, None] = 'a553667fd4c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # FTS5 虚拟表与触发器无法被 autogenerate 识别，这里复用 search.py 中的DDL，
+    # 同时会把已有的 briefings / original_contents 数据回填进索引。
+    ensure_search_index(op.get_bind())
+
+
+def downgrade() -> None:
+    drop_search_index(op.get_bind())
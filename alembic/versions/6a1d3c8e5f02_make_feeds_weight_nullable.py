@@ -0,0 +1,31 @@
+"""Make feeds.weight nullable
+
+Revision ID: 6a1d3c8e5f02
+Revises: 9d2e6b1f4a73
+Create Date: 2026-10-19 15:27:41.306418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a1d3c8e5f02'
+down_revision: Union[str, None] = '9d2e6b1f4a73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('feeds') as batch_op:
+        batch_op.alter_column('weight', existing_type=sa.Float(), nullable=True)
+    # 之前的默认权重 1.0 与"未设置"无法区分，统一视为未设置，使 config.SOURCE_WEIGHTS 重新生效
+    op.execute("UPDATE feeds SET weight = NULL WHERE weight = 1.0")
+
+
+def downgrade() -> None:
+    op.execute("UPDATE feeds SET weight = 1.0 WHERE weight IS NULL")
+    with op.batch_alter_table('feeds') as batch_op:
+        batch_op.alter_column('weight', existing_type=sa.Float(), nullable=False)
@@ -0,0 +1,310 @@
+# batch_summarizer.py (Version 1.0 - Batch API Summarization)
+
+# ==============================================================================
+# 1. 导入工具箱 (Import necessary tools)
+# ==============================================================================
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+import config
+import metrics
+from models import BriefingItem, OriginalContent, SummaryBatch, ArticleQueueItem
+from ai_core import router, build_messages, clean_summary, SUMMARY_PROMPT, SUMMARY_TEMPERATURE
+from model_router import trim_to_sentence
+from scoring import TokenBudget, estimate_tokens
+from work_queue import claim, release, release_owned, fail, advance_in_session, EXTRACTED, SUMMARIZED, STORED
+from logger_config import logger, article_logger
+
+# ==============================================================================
+# "雅典娜"批量摘要模式 (config.SUMMARIZE_MODE = "batch")
+#
+# 补跑历史数据或夜间处理大批量文章时，不需要几秒内拿到结果。这时不再逐篇实时调用模型，而是:
+# 1. 按分数从高到低、在预算内领取 extracted 状态的文章，把每篇文章的摘要请求写成一行，
+#    保存为 JSONL 文件 (config.BATCH_DIR)，上传并创建一个 Batch API 任务；
+# 2. 批次中的文章在工作队列中由该批次持有一个长租约 (BATCH_LEASE_SECONDS)，不会被其他运行重复处理；
+#    批量任务本身记录在 summary_batches 表中，提交它的进程退出后也能由之后的运行继续轮询；
+# 3. 任务结束后下载结果文件，在一个事务中批量写入摘要表，并把文章标记为 stored；
+#    失败的请求按普通失败处理 (work_queue.fail)，结果中缺失的文章（例如批次过期）释放回队列。
+# 只要服务商提供 OpenAI 兼容的 /v1/files 与 /v1/batches 接口即可使用，
+# 基准测试中的本地替身服务 (benchmarks/fakes.py) 也实现了这两个接口。
+# ==============================================================================
+
+BATCH_URL = "/v1/chat/completions"
+CUSTOM_ID_PREFIX = "queue-"
+
+# 批量任务的终止状态: 到达这些状态后即可取回结果（过期或取消的任务也可能包含部分结果）
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# ==============================================================================
+# 2. 端点与请求文件 (Endpoint & Request File)
+# ==============================================================================
+def batch_endpoint(name: str | None = None):
+    """返回名为 name 的端点；name 为 None 时返回 config.BATCH_ENDPOINT 指定的端点（未指定则为模型池中的第一个）。"""
+    name = name or config.BATCH_ENDPOINT
+    if name is None:
+        return router.endpoints[0]
+    for endpoint in router.endpoints:
+        if endpoint.name == name:
+            return endpoint
+    raise ValueError(f"错误: 批量模式的模型端点 '{name}' 不在模型池中。")
+
+
+def files_client(endpoint):
+    """
+    路由器为实时请求创建的客户端关闭了重试，超时也是按单次对话请求设置的；
+    上传和下载大文件时换用允许重试、超时更长的副本。
+    """
+    return endpoint.client.with_options(max_retries=3, timeout=config.ROUTER_REQUEST_TIMEOUT * 10)
+
+
+def request_line(item: dict, model: str) -> dict:
+    """一篇文章对应的批量请求。custom_id 记录工作队列中的任务ID，用于把结果对应回文章。"""
+    return {
+        "custom_id": f"{CUSTOM_ID_PREFIX}{item['id']}",
+        "method": "POST",
+        "url": BATCH_URL,
+        "body": {
+            "model": model,
+            "messages": build_messages(item),
+            "temperature": SUMMARY_TEMPERATURE,
+            "max_tokens": config.SUMMARY_MAX_TOKENS,
+        },
+    }
+
+
+def write_request_file(items: list[dict], model: str, path: str):
+    """把一批文章的请求写成 JSONL 文件，每行一个请求。"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for item in items:
+            f.write(json.dumps(request_line(item, model), ensure_ascii=False) + "\n")
+
+
+def parse_result_line(line: str) -> tuple[int | None, str | None, str | None]:
+    """
+    解析结果文件（或错误文件）中的一行，返回 (任务ID, 摘要文本, 错误信息)，摘要与错误二者必有其一。
+    custom_id 无法识别时任务ID为 None。
+    """
+    record = json.loads(line)
+    custom_id = record.get("custom_id") or ""
+    item_id = int(custom_id[len(CUSTOM_ID_PREFIX):]) if custom_id.startswith(CUSTOM_ID_PREFIX) else None
+
+    error = record.get("error")
+    response = record.get("response") or {}
+    body = response.get("body") or {}
+    if error:
+        return item_id, None, f"{error.get('code')}: {error.get('message')}"
+    if response.get("status_code") != 200:
+        message = (body.get("error") or {}).get("message")
+        return item_id, None, f"HTTP {response.get('status_code')}: {message}"
+
+    choices = body.get("choices") or []
+    text = ((choices[0].get("message") or {}).get("content") or "").strip() if choices else ""
+    # 与流式模式的长度上限保持一致: 超长或被 max_tokens 截断的摘要只保留到最后一个完整的句子
+    if choices and (choices[0].get("finish_reason") == "length" or len(text) > config.SUMMARY_MAX_CHARS):
+        text = trim_to_sentence(text[:config.SUMMARY_MAX_CHARS])
+    text = clean_summary(text)
+    if not text:
+        return item_id, None, "AI返回了空摘要"
+    return item_id, text, None
+
+
+# ==============================================================================
+# 3. 提交 (Submit)
+# ==============================================================================
+def submit_batch(db_session, endpoint, budget: TokenBudget) -> SummaryBatch | None:
+    """
+    领取最多 BATCH_MAX_REQUESTS 篇 extracted 状态的文章（按分数从高到低、在预算内），
+    写成请求文件并提交一个批量任务。没有可提交的文章时返回 None。
+    """
+    owner = f"batch-{uuid.uuid4().hex[:12]}"
+    items = claim(db_session, EXTRACTED, owner, config.BATCH_MAX_REQUESTS, by_score=True,
+                  lease_seconds=config.BATCH_LEASE_SECONDS, max_estimated_tokens=budget.remaining)
+    selected = []
+    for item in items:
+        if budget.try_spend(item['estimated_tokens'] or estimate_tokens(item)):
+            selected.append(item)
+        else:
+            release(db_session, item['id'], owner)
+    if not selected:
+        return None
+
+    path = os.path.join(config.BATCH_DIR, f"{owner}.jsonl")
+    try:
+        write_request_file(selected, endpoint.model, path)
+        client = files_client(endpoint)
+        with open(path, "rb") as f:
+            uploaded = client.files.create(file=f, purpose="batch")
+        remote = client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_URL,
+            completion_window=config.BATCH_COMPLETION_WINDOW,
+            metadata={"lease_owner": owner},
+        )
+    except Exception:
+        # 提交失败时把文章放回队列，下次运行会重新领取
+        release_owned(db_session, owner)
+        raise
+
+    batch = SummaryBatch(
+        batch_id=remote.id,
+        input_file_id=uploaded.id,
+        endpoint=endpoint.name,
+        model=endpoint.model,
+        prompt_version=SUMMARY_PROMPT.version,
+        lease_owner=owner,
+        status=remote.status,
+        request_count=len(selected),
+    )
+    db_session.add(batch)
+    db_session.commit()
+    metrics.incr("batch.submitted", len(selected))
+    logger.info(f"已提交批量摘要任务 {remote.id}: {len(selected)} 篇文章，端点 '{endpoint.name}'，请求文件 {path}")
+    return batch
+
+
+def submit_pending(db_session, budget: TokenBudget) -> list[SummaryBatch]:
+    """把所有 extracted 状态的文章拆分成若干批量任务提交，直到没有文章或预算用尽。"""
+    endpoint = batch_endpoint()
+    submitted = []
+    while not budget.exhausted:
+        batch = submit_batch(db_session, endpoint, budget)
+        if batch is None:
+            break
+        submitted.append(batch)
+    return submitted
+
+
+# ==============================================================================
+# 4. 轮询与取回结果 (Poll & Ingest)
+# ==============================================================================
+def refresh_status(db_session, batch: SummaryBatch) -> str:
+    """向服务商查询批量任务的最新状态，写回 summary_batches 表并返回状态。"""
+    remote = files_client(batch_endpoint(batch.endpoint)).batches.retrieve(batch.batch_id)
+    batch.status = remote.status
+    batch.output_file_id = remote.output_file_id
+    batch.error_file_id = remote.error_file_id
+    if remote.status in TERMINAL_STATUSES and batch.completed_at is None:
+        batch.completed_at = _now()
+    db_session.commit()
+    return batch.status
+
+
+def _read_results(client, batch: SummaryBatch) -> tuple[dict[int, str], dict[int, str]]:
+    """下载结果文件与错误文件，返回 ({任务ID: 摘要}, {任务ID: 错误信息})。"""
+    summaries, errors = {}, {}
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if not file_id:
+            continue
+        for line in client.files.content(file_id).text.splitlines():
+            if not line.strip():
+                continue
+            item_id, text, error = parse_result_line(line)
+            if item_id is None:
+                logger.warning(f"批量任务 {batch.batch_id} 的结果中有无法识别的 custom_id，已忽略。")
+            elif text:
+                summaries[item_id] = text
+            else:
+                errors[item_id] = error
+    return summaries, errors
+
+
+def _store_all(db_session, batch: SummaryBatch, summaries: dict[int, str]) -> int:
+    """
+    在一个事务中为批次中仍由该批次持有的文章写入摘要与原文，并把它们标记为 stored。
+    遇到URL冲突（文章已被其他途径入库）时整批回滚，改为写入 summarized 检查点，
+    交给流水线的持久化阶段逐篇处理。返回写入的摘要数量。
+    """
+    items = db_session.execute(
+        select(ArticleQueueItem.id, ArticleQueueItem.url, ArticleQueueItem.source_name,
+               ArticleQueueItem.clean_content, ArticleQueueItem.html_hash)
+        .where(ArticleQueueItem.id.in_(list(summaries)), ArticleQueueItem.lease_owner == batch.lease_owner)
+    ).all()
+    try:
+        for item_id, url, source_name, clean_content, html_hash in items:
+            briefing = BriefingItem(source_url=url, summary_text=summaries[item_id], source_name=source_name,
+                                    model_used=batch.model, prompt_version=batch.prompt_version)
+            briefing.original_content = OriginalContent(content_text=clean_content, html_hash=html_hash)
+            db_session.add(briefing)
+            advance_in_session(db_session, item_id, batch.lease_owner, STORED, clean_content=None, summary_text=None)
+        db_session.commit()
+        return len(items)
+    except IntegrityError:
+        db_session.rollback()
+        logger.warning(f"批量任务 {batch.batch_id} 中有文章已存在于数据库中，改为逐篇入库。")
+
+    for item_id, *_ in items:
+        advance_in_session(db_session, item_id, batch.lease_owner, SUMMARIZED,
+                           summary_text=summaries[item_id], model_used=batch.model,
+                           prompt_version=batch.prompt_version)
+    db_session.commit()
+    return 0
+
+
+def ingest_batch(db_session, batch: SummaryBatch) -> int:
+    """取回一个已结束的批量任务的结果并入库，返回写入的摘要数量。"""
+    client = files_client(batch_endpoint(batch.endpoint))
+    summaries, errors = _read_results(client, batch)
+
+    stored = _store_all(db_session, batch, summaries) if summaries else 0
+    for item_id, error in errors.items():
+        fail(db_session, item_id, batch.lease_owner, f"批量摘要失败: {error}")
+        article_logger.warning(f"  - 任务 #{item_id} 的批量摘要失败: {error}")
+    # 结果中缺失的文章（例如批次过期或被取消）放回队列，下次运行重新处理
+    missing = release_owned(db_session, batch.lease_owner)
+
+    batch.ingested_at = _now()
+    db_session.commit()
+    metrics.incr("batch.stored", stored)
+    metrics.incr("batch.failed", len(errors))
+    logger.info(f"批量任务 {batch.batch_id} ({batch.status}) 的结果已取回: 入库 {stored} 篇，"
+                f"失败 {len(errors)} 篇，放回队列 {missing} 篇。")
+    return stored
+
+
+def pending_batches(db_session) -> list[SummaryBatch]:
+    """所有尚未取回结果的批量任务（包括之前的运行提交的），按提交顺序排列。"""
+    return list(db_session.scalars(
+        select(SummaryBatch).where(SummaryBatch.ingested_at.is_(None)).order_by(SummaryBatch.id)
+    ))
+
+
+def collect(db_session, max_wait: float = 0) -> int:
+    """
+    轮询所有尚未取回结果的批量任务，取回已结束的任务。
+    max_wait 秒内每隔 BATCH_POLL_SECONDS 检查一次，直到全部取回；max_wait=0 时只检查一次。
+    返回写入的摘要数量。
+    """
+    deadline = time.monotonic() + max_wait
+    stored = 0
+    while True:
+        pending = pending_batches(db_session)
+        for batch in list(pending):
+            try:
+                status = refresh_status(db_session, batch)
+                if status in TERMINAL_STATUSES:
+                    stored += ingest_batch(db_session, batch)
+                    pending.remove(batch)
+            except Exception as e:
+                db_session.rollback()
+                logger.error(f"检查批量任务 {batch.batch_id} 时发生错误: {e}", exc_info=True)
+
+        if not pending:
+            return stored
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            logger.info(f"仍有 {len(pending)} 个批量任务未完成，将在之后的运行中继续取回: "
+                        + ", ".join(f"{b.batch_id} ({b.status})" for b in pending))
+            return stored
+        time.sleep(min(config.BATCH_POLL_SECONDS, remaining))
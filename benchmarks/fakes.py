@@ -0,0 +1,509 @@
+# benchmarks/fakes.py (Version 1.0 - Local Fakes for Offline Benchmarks)
+
+# ==============================================================================
+# 1. 导入工具箱 (Import necessary tools)
+# ==============================================================================
+import json
+import random
+import uuid
+import socketserver
+import threading
+import time
+from datetime import datetime, timezone
+from email.parser import BytesParser
+from email.policy import HTTP
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ==============================================================================
+# "雅典娜"离线基准测试的本地替身服务
+#
+# 三个只监听 127.0.0.1 的小型服务，让完整的流水线在不访问任何外部网络的情况下运行:
+# - FakeWebServer:  提供 /feed/<i>.xml 的RSS源，以及每篇文章对应的 /article/<i>/<j>.html 页面；
+# - FakeOpenAIServer: 兼容 OpenAI 的 POST /v1/chat/completions（支持 stream=True），可配置延迟和每秒请求上限（超限返回429）；
+#                     另外实现了批量模式用到的 /v1/files 与 /v1/batches 接口；
+# - SmtpSink:       一个只收不发的SMTP服务器，接受任意登录并统计收到的邮件。
+# 每个服务都在后台守护线程中运行，并通过 stats() 暴露请求计数，供基准测试报告使用。
+# ==============================================================================
+
+SENTENCES = [
+    "研究团队在最新发布的报告中指出，相关技术的成本在过去一年里下降了近三成。",
+    "多位业内人士认为，这一变化将深刻影响未来几年的市场格局。",
+    "监管部门表示，将在充分听取各方意见的基础上，稳步推进配套政策的落地。",
+    "数据显示，今年前三季度相关领域的投资规模同比增长超过百分之二十。",
+    "专家提醒，在快速发展的同时，也需要关注数据安全与隐私保护等问题。",
+    "该项目负责人介绍，目前已有数十家企业参与试点，初步效果良好。",
+    "分析人士指出，供应链的稳定性仍是制约行业进一步发展的关键因素。",
+    "有关方面表示，下一步将加大基础研究投入，推动关键核心技术攻关。",
+]
+
+
+def _serve_in_background(server):
+    thread = threading.Thread(target=server.serve_forever, name=type(server).__name__, daemon=True)
+    thread.start()
+    return server
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    """关闭默认的逐请求访问日志，并提供统一的响应辅助方法。"""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict | None = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _CountingServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, handler):
+        super().__init__(("127.0.0.1", 0), handler)
+        self.counts = {}
+        self._counts_lock = threading.Lock()
+
+    def count(self, key: str):
+        with self._counts_lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def stats(self) -> dict:
+        with self._counts_lock:
+            return dict(self.counts)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+# ==============================================================================
+# 2. RSS源与文章页面 (Feeds & Article Pages)
+# ==============================================================================
+def article_html(feed: int, article: int, paragraphs: int) -> str:
+    """生成一篇确定性的中文文章页面，正文足够长，能够通过最短正文长度的检查。"""
+    rng = random.Random(feed * 100_003 + article)
+    body = "\n".join(
+        f"<p>{''.join(rng.sample(SENTENCES, 4))}（信源{feed}第{article}篇，第{n + 1}段）</p>"
+        for n in range(paragraphs)
+    )
+    return (
+        "<!DOCTYPE html><html lang=\"zh-CN\"><head><meta charset=\"utf-8\">"
+        f"<title>基准测试文章 {feed}-{article}</title></head><body>"
+        "<nav><a href=\"/\">首页</a> | <a href=\"/about\">关于我们</a></nav>"
+        f"<article><h1>基准测试文章 {feed}-{article}</h1>{body}</article>"
+        "<footer>版权所有 © 基准测试</footer></body></html>"
+    )
+
+
+class FakeWebServer(_CountingServer):
+    """RSS源与文章页面服务。latency 为每个请求的固定延迟（秒）。"""
+
+    def __init__(self, articles_per_feed: int = 20, latency: float = 0.0, paragraphs: int = 6):
+        self.articles_per_feed = articles_per_feed
+        self.latency = latency
+        self.paragraphs = paragraphs
+        super().__init__(_WebHandler)
+
+    def feed_url(self, feed: int) -> str:
+        return f"{self.base_url}/feed/{feed}.xml"
+
+    def feed_xml(self, feed: int) -> str:
+        now = datetime.now(timezone.utc)
+        items = "".join(
+            "<item>"
+            f"<title>基准测试文章 {feed}-{j}</title>"
+            f"<link>{self.base_url}/article/{feed}/{j}.html</link>"
+            f"<pubDate>{format_datetime(now)}</pubDate>"
+            "</item>"
+            for j in range(self.articles_per_feed)
+        )
+        return (
+            "<?xml version=\"1.0\" encoding=\"utf-8\"?><rss version=\"2.0\"><channel>"
+            f"<title>基准测试信源 {feed}</title><link>{self.base_url}/</link>"
+            f"<description>benchmark</description>{items}</channel></rss>"
+        )
+
+
+class _WebHandler(_QuietHandler):
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        parts = self.path.strip("/").split("/")
+        try:
+            if len(parts) == 2 and parts[0] == "feed" and parts[1].endswith(".xml"):
+                server.count("feeds")
+                body = server.feed_xml(int(parts[1][:-4]))
+                return self._send(200, body.encode("utf-8"), "application/rss+xml; charset=utf-8")
+            if len(parts) == 3 and parts[0] == "article" and parts[2].endswith(".html"):
+                server.count("articles")
+                body = article_html(int(parts[1]), int(parts[2][:-5]), server.paragraphs)
+                return self._send(200, body.encode("utf-8"), "text/html; charset=utf-8")
+        except ValueError:
+            pass
+        server.count("not_found")
+        self._send(404, b"not found", "text/plain")
+
+
+# ==============================================================================
+# 3. OpenAI 兼容接口 (Fake Chat Completions Endpoint)
+# ==============================================================================
+class _TokenBucket:
+    """每秒补充 rate 个令牌、容量为 burst 的令牌桶。rate 为 None 时不限速。"""
+
+    def __init__(self, rate: float | None, burst: int | None = None):
+        self.rate = rate
+        self.capacity = burst or max(int(rate or 1), 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_take(self) -> bool:
+        if not self.rate:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class FakeOpenAIServer(_CountingServer):
+    """
+    模拟 OpenAI 的对话补全接口。
+    - latency / jitter: 每个成功请求的处理延迟为 latency ± jitter 秒；
+    - rate_limit:      每秒允许的请求数，超过时返回 429 并附带 Retry-After 头；
+    - error_rate:      以该概率返回 500，用于观察重试行为（批量任务中的单个请求同样适用）；
+    - batch_delay:     批量任务从创建到完成所需的秒数。
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, rate_limit: float | None = None,
+                 error_rate: float = 0.0, batch_delay: float = 0.5):
+        self.latency = latency
+        self.jitter = jitter
+        self.bucket = _TokenBucket(rate_limit)
+        self.error_rate = error_rate
+        self.batch_delay = batch_delay
+        self.files = {}
+        self.batches = {}
+        self._batches_lock = threading.Lock()
+        super().__init__(_OpenAIHandler)
+
+    @property
+    def api_base(self) -> str:
+        return f"{self.base_url}/v1"
+
+    def delay(self) -> float:
+        return max(self.latency + random.uniform(-self.jitter, self.jitter), 0.0)
+
+
+def chat_completion_body(model: str, content: str, prompt_chars: int) -> dict:
+    """构造一个 chat.completion 响应体。"""
+    return {
+        "id": f"chatcmpl-bench-{random.getrandbits(48):x}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_chars // 2,
+            "completion_tokens": len(content) // 2,
+            "total_tokens": (prompt_chars + len(content)) // 2,
+        },
+    }
+
+
+def chat_completion_chunk(model: str, delta: dict, finish_reason: str | None = None) -> dict:
+    """构造一个流式响应中的 chat.completion.chunk。"""
+    return {
+        "id": "chatcmpl-bench-stream",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+def file_object(file_id: str, content: bytes, filename: str, purpose: str) -> dict:
+    return {"id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+            "filename": filename, "purpose": purpose, "status": "processed"}
+
+
+def batch_object(batch_id: str, request: dict) -> dict:
+    return {
+        "id": batch_id,
+        "object": "batch",
+        "endpoint": request.get("endpoint"),
+        "input_file_id": request.get("input_file_id"),
+        "completion_window": request.get("completion_window", "24h"),
+        "metadata": request.get("metadata"),
+        "status": "in_progress",
+        "created_at": int(time.time()),
+        "output_file_id": None,
+        "error_file_id": None,
+        "request_counts": {"total": 0, "completed": 0, "failed": 0},
+    }
+
+
+def run_batch(server: "FakeOpenAIServer", batch_id: str):
+    """在 batch_delay 秒后"完成"一个批量任务: 为输入文件中的每个请求生成结果行，写入结果文件与错误文件。"""
+    time.sleep(server.batch_delay)
+    with server._batches_lock:
+        batch = server.batches[batch_id]
+        lines = server.files[batch["input_file_id"]].decode("utf-8").splitlines()
+    outputs, errors = [], []
+    for line in filter(None, lines):
+        request = json.loads(line)
+        body = request.get("body", {})
+        record = {"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": request.get("custom_id"), "error": None}
+        if server.error_rate and random.random() < server.error_rate:
+            record["response"] = {"status_code": 500, "request_id": uuid.uuid4().hex,
+                                  "body": {"error": {"message": "Internal server error", "type": "server_error"}}}
+            errors.append(record)
+            continue
+        prompt_chars = sum(len(m.get("content") or "") for m in body.get("messages", []))
+        summary = "这是一段用于基准测试的摘要。" + "".join(random.sample(SENTENCES, 2))
+        record["response"] = {"status_code": 200, "request_id": uuid.uuid4().hex,
+                              "body": chat_completion_body(body.get("model", "fake-model"), summary, prompt_chars)}
+        outputs.append(record)
+    server.count("batch_requests")
+
+    with server._batches_lock:
+        for key, records in (("output_file_id", outputs), ("error_file_id", errors)):
+            if records:
+                file_id = f"file-{uuid.uuid4().hex[:12]}"
+                server.files[file_id] = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8")
+                batch[key] = file_id
+        batch["request_counts"] = {"total": len(outputs) + len(errors), "completed": len(outputs), "failed": len(errors)}
+        batch["completed_at"] = int(time.time())
+        batch["status"] = "completed"
+
+
+class _OpenAIHandler(_QuietHandler):
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, status: int, payload: dict, headers: dict | None = None):
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json", headers)
+
+    def _send_error(self, status: int, message: str, error_type: str, headers: dict | None = None):
+        self._send_json(status, {"error": {"message": message, "type": error_type, "code": None}}, headers)
+
+    def do_GET(self):
+        server = self.server
+        if self.path == "/_stats":
+            return self._send_json(200, server.stats())
+        parts = self.path.strip("/").split("/")
+        with server._batches_lock:
+            if parts[:2] == ["v1", "batches"] and len(parts) == 3 and parts[2] in server.batches:
+                return self._send_json(200, server.batches[parts[2]])
+            if parts[:2] == ["v1", "files"] and len(parts) == 4 and parts[3] == "content" and parts[2] in server.files:
+                return self._send(200, server.files[parts[2]], "application/octet-stream")
+        self._send_error(404, "not found", "invalid_request_error")
+
+    def do_POST(self):
+        server = self.server
+        path = self.path.rstrip("/")
+        if path == "/v1/files":
+            return self._upload_file()
+        if path == "/v1/batches":
+            return self._create_batch()
+        if path != "/v1/chat/completions":
+            return self._send_error(404, "not found", "invalid_request_error")
+
+        request = self._read_json()
+        if not server.bucket.try_take():
+            server.count("rate_limited")
+            return self._send_error(429, "Rate limit reached", "rate_limit_error", {"Retry-After": "1"})
+        if server.error_rate and random.random() < server.error_rate:
+            server.count("errors")
+            return self._send_error(500, "Internal server error", "server_error")
+
+        prompt_chars = sum(len(m.get("content") or "") for m in request.get("messages", []))
+        summary = "这是一段用于基准测试的摘要。" + "".join(random.sample(SENTENCES, 2))
+        model = request.get("model", "fake-model")
+        server.count("completions")
+        if request.get("stream"):
+            return self._stream(model, summary, server.delay())
+        time.sleep(server.delay())
+        self._send_json(200, chat_completion_body(model, summary, prompt_chars))
+
+    def _upload_file(self):
+        """接收 multipart/form-data 上传的文件 (字段 file 与 purpose)。"""
+        length = int(self.headers.get("Content-Length") or 0)
+        header = f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode("latin-1")
+        form = BytesParser(policy=HTTP).parsebytes(header + self.rfile.read(length))
+        fields = {part.get_param("name", header="content-disposition"): part for part in form.iter_parts()}
+        if "file" not in fields:
+            return self._send_error(400, "missing file", "invalid_request_error")
+        content = fields["file"].get_payload(decode=True)
+        purpose = fields["purpose"].get_content().strip() if "purpose" in fields else "batch"
+        file_id = f"file-{uuid.uuid4().hex[:12]}"
+        with self.server._batches_lock:
+            self.server.files[file_id] = content
+        self.server.count("files")
+        self._send_json(200, file_object(file_id, content, fields["file"].get_filename() or "upload.jsonl", purpose))
+
+    def _create_batch(self):
+        server = self.server
+        request = self._read_json()
+        if request.get("input_file_id") not in server.files:
+            return self._send_error(400, "input file not found", "invalid_request_error")
+        batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+        batch = batch_object(batch_id, request)
+        with server._batches_lock:
+            server.batches[batch_id] = batch
+        server.count("batches")
+        threading.Thread(target=run_batch, args=(server, batch_id), daemon=True).start()
+        self._send_json(200, batch)
+
+    def _stream(self, model: str, content: str, delay: float):
+        """以 SSE 流式返回: 首个token在总延迟的 20% 时到达，其余内容在剩余时间内均匀送出。"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        pieces = [content[i:i + 8] for i in range(0, len(content), 8)]
+        time.sleep(delay * 0.2)
+        try:
+            for i, piece in enumerate(pieces):
+                if i:
+                    time.sleep(delay * 0.8 / len(pieces))
+                self._send_event(chat_completion_chunk(model, {"role": "assistant", "content": piece} if i == 0
+                                                      else {"content": piece}))
+            self._send_event(chat_completion_chunk(model, {}, finish_reason="stop"))
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端提前中止了生成
+            self.server.count("aborted_streams")
+
+    def _send_event(self, payload: dict):
+        self.wfile.write(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+
+# ==============================================================================
+# 4. SMTP 收件服务 (SMTP Sink)
+# ==============================================================================
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    """实现足以让 smtplib/yagmail 完成投递的最小SMTP子集（不支持STARTTLS）。"""
+
+    def _reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode("ascii"))
+
+    def handle(self):
+        server = self.server
+        self._reply("220 localhost athena-bench ESMTP")
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            command = raw.decode("utf-8", "replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self._reply("250-localhost")
+                self._reply("250-8BITMIME")
+                self._reply("250 AUTH PLAIN")
+            elif verb == "HELO":
+                self._reply("250 localhost")
+            elif verb == "AUTH":
+                # 只声明了 AUTH PLAIN，smtplib 会把凭据随命令一起发送，内容一律接受
+                self._reply("235 Authentication successful")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                size = 0
+                while True:
+                    line = self.rfile.readline()
+                    if not line or line in (b".\r\n", b".\n"):
+                        break
+                    size += len(line)
+                server.record_message(size)
+                self._reply("250 OK: queued")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self._reply("250 OK")
+            else:
+                self._reply("502 Command not implemented")
+
+
+class SmtpSink(socketserver.ThreadingTCPServer):
+    """只收不发的SMTP服务器，统计收到的邮件数量与总大小。"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SmtpHandler)
+        self.messages = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def record_message(self, size: int):
+        with self._lock:
+            self.messages += 1
+            self.bytes += size
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"messages": self.messages, "bytes": self.bytes}
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+
+# ==============================================================================
+# 5. 启动入口 (Start Helpers)
+# ==============================================================================
+def start_web_server(**kwargs) -> FakeWebServer:
+    return _serve_in_background(FakeWebServer(**kwargs))
+
+
+def start_openai_server(**kwargs) -> FakeOpenAIServer:
+    return _serve_in_background(FakeOpenAIServer(**kwargs))
+
+
+def start_smtp_sink() -> SmtpSink:
+    return _serve_in_background(SmtpSink())
+
+
+def serve_fakes(conn, web_options: dict, llm_options: dict):
+    """
+    在独立进程中运行全部替身服务，使它们的CPU与内存开销不计入被测进程。
+    通过 multiprocessing 管道通信: 启动后先发送各服务地址；
+    之后收到 "stats" 时回复各服务的计数，收到 "stop" 时退出。
+    """
+    web = start_web_server(**web_options)
+    llm = start_openai_server(**llm_options)
+    smtp = start_smtp_sink()
+    conn.send({
+        'feed_urls_base': web.base_url,
+        'api_base': llm.api_base,
+        'smtp_port': smtp.port,
+    })
+    while True:
+        command = conn.recv()
+        if command == "stats":
+            conn.send({'web': web.stats(), 'llm': llm.stats(), 'smtp': smtp.stats()})
+        elif command == "stop":
+            break
+    for server in (web, llm, smtp):
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,267 @@
+# benchmarks/run_benchmark.py (Version 1.0 - Offline End-to-End Benchmark)
+
+# ==============================================================================
+# 1. 导入工具箱 (Import necessary tools)
+# ==============================================================================
+import argparse
+import ast
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from benchmarks.fakes import serve_fakes
+
+# ==============================================================================
+# "雅典娜"离线端到端基准测试
+#
+# 在本地替身服务（RSS/网页、OpenAI兼容接口、SMTP，见 benchmarks/fakes.py）之上完整运行
+# run_data_pipeline() 与 send_todays_briefing()，使用临时数据库，不读取 .env、不访问外部网络。
+# 替身服务运行在独立进程中，报告中的CPU时间和峰值内存只反映被测流水线本身。
+#
+# 用法（在项目根目录下运行）:
+#   python -m benchmarks.run_benchmark --scenario default
+#   python -m benchmarks.run_benchmark --scenario large --llm-rps 20 --json bench.json
+#   python -m benchmarks.run_benchmark --set SUMMARIZE_WORKERS=16 --baseline bench.json
+#
+# 报告内容: 吞吐量（篇/秒）、各阶段单条耗时的 p50/p90/p99、峰值RSS、替身服务的请求统计。
+# 指定 --baseline 时，吞吐量下降或阶段 p90 上升超过 --tolerance 即视为性能回退，以退出码1结束。
+# ==============================================================================
+
+SCENARIOS = {
+    # 名称: (RSS源数量, 每个源的文章数, 网页延迟秒, AI延迟秒)
+    "smoke": (5, 4, 0.0, 0.05),
+    "default": (50, 20, 0.02, 0.3),
+    "large": (500, 20, 0.02, 0.3),
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="'雅典娜'离线基准测试")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="default", help="预设场景 (默认: default)")
+    parser.add_argument("--feeds", type=int, help="RSS源数量（覆盖场景预设）")
+    parser.add_argument("--articles", type=int, help="每个RSS源的文章数（覆盖场景预设）")
+    parser.add_argument("--web-latency", type=float, help="RSS与文章页面的响应延迟，秒")
+    parser.add_argument("--llm-latency", type=float, help="AI接口的响应延迟，秒")
+    parser.add_argument("--llm-jitter", type=float, default=0.0, help="AI接口延迟的随机抖动，秒")
+    parser.add_argument("--llm-rps", type=float, help="AI接口每秒允许的请求数，超出返回429 (默认不限)")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="AI接口返回500的概率")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="覆盖 config.py 中的配置项，可重复使用，例如 --set SUMMARIZE_WORKERS=16")
+    parser.add_argument("--json", metavar="PATH", help="把结果写入JSON文件，便于作为后续对比的基线")
+    parser.add_argument("--baseline", metavar="PATH", help="与之前保存的JSON结果对比")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="判定性能回退的相对阈值 (默认: 0.2)")
+    parser.add_argument("--verbose", action="store_true", help="保留流水线的INFO日志")
+    args = parser.parse_args(argv)
+
+    feeds, articles, web_latency, llm_latency = SCENARIOS[args.scenario]
+    args.feeds = args.feeds if args.feeds is not None else feeds
+    args.articles = args.articles if args.articles is not None else articles
+    args.web_latency = args.web_latency if args.web_latency is not None else web_latency
+    args.llm_latency = args.llm_latency if args.llm_latency is not None else llm_latency
+    return args
+
+
+def parse_overrides(pairs: list[str]) -> dict:
+    """把 --set NAME=VALUE 解析为字典，VALUE 按Python字面量解析，解析失败时按字符串处理。"""
+    overrides = {}
+    for pair in pairs:
+        name, sep, raw = pair.partition("=")
+        if not sep:
+            raise SystemExit(f"--set 参数格式错误: '{pair}'，应为 NAME=VALUE")
+        try:
+            overrides[name.strip()] = ast.literal_eval(raw)
+        except (ValueError, SyntaxError):
+            overrides[name.strip()] = raw
+    return overrides
+
+
+# ==============================================================================
+# 2. 隔离运行环境 (Isolated Environment)
+# ==============================================================================
+def configure_environment(addresses: dict, workdir: str):
+    """
+    在导入任何项目模块之前调用: 把AI、SMTP和数据库全部指向本地替身与临时目录。
+    项目模块在导入时会执行 load_dotenv(override=True)，这里先把它替换为空操作，
+    保证开发者本地 .env 中的真实密钥和服务器永远不会被基准测试用到。
+    """
+    import dotenv
+    dotenv.load_dotenv = lambda *args, **kwargs: False
+
+    # trafilatura 默认拒绝连接非公网地址 (SSRF保护)，替身网页服务只监听本机，仅在基准测试进程中关闭
+    from trafilatura.settings import DEFAULT_CONFIG
+    DEFAULT_CONFIG.set("DEFAULT", "SSRF_PROTECTION", "off")
+
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "OPENAI_API_KEY": "bench-key",
+        "OPENAI_API_BASE": addresses['api_base'],
+        "DEFAULT_MODEL": "bench-model",
+        "SENDER_EMAIL": "athena@bench.local",
+        "SENDER_PASSWORD": "bench",
+        "RECEIVER_EMAIL": "reader@bench.local",
+        "SMTP_HOST": "127.0.0.1",
+        "SMTP_PORT": str(addresses['smtp_port']),
+        "SMTP_SSL": "false",
+        "SMTP_STARTTLS": "false",
+    })
+
+
+def peak_rss_mb() -> float:
+    """当前进程的峰值常驻内存 (MB)。Linux 上 ru_maxrss 的单位是KB，macOS 上是字节。"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+# ==============================================================================
+# 3. 运行与报告 (Run & Report)
+# ==============================================================================
+def run(args) -> dict:
+    parent_conn, child_conn = multiprocessing.Pipe()
+    fakes = multiprocessing.Process(
+        target=serve_fakes,
+        args=(child_conn,
+              {'articles_per_feed': args.articles, 'latency': args.web_latency},
+              {'latency': args.llm_latency, 'jitter': args.llm_jitter,
+               'rate_limit': args.llm_rps, 'error_rate': args.llm_error_rate}),
+        daemon=True,
+    )
+    fakes.start()
+    addresses = parent_conn.recv()
+
+    workdir = tempfile.mkdtemp(prefix="athena-bench-")
+    configure_environment(addresses, workdir)
+
+    # --- 以下项目模块必须在环境配置完成后才能导入 ---
+    # 部分模块在导入时就会读取配置（例如 ai_core 的模型池），因此先覆盖配置再导入其余模块
+    import config
+    overrides = parse_overrides(args.set)
+    for name, value in overrides.items():
+        if not hasattr(config, name):
+            raise SystemExit(f"config.py 中没有名为 {name} 的配置项")
+        setattr(config, name, value)
+
+    import metrics
+    from logger_config import logger, article_logger
+    from database import create_db_and_tables
+    from data_pipeline import run_data_pipeline, SessionLocal
+    from delivery_pipeline import send_todays_briefing
+    from work_queue import queue_stats
+
+    if not args.verbose:
+        logger.setLevel(logging.WARNING)
+        article_logger.setLevel(logging.WARNING)
+        logging.getLogger("urllib3").setLevel(logging.ERROR)
+    config.RSS_FEEDS = [f"{addresses['feed_urls_base']}/feed/{i}.xml" for i in range(args.feeds)]
+    config.MAX_ARTICLES_PER_FEED = args.articles
+    if "RUN_TOKEN_BUDGET" not in overrides:
+        config.RUN_TOKEN_BUDGET = None
+
+    create_db_and_tables()
+    metrics.reset()
+
+    cpu_start = cpu_seconds()
+    start = time.perf_counter()
+    run_data_pipeline()
+    pipeline_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    send_todays_briefing()
+    delivery_seconds = time.perf_counter() - start
+    cpu_total = cpu_seconds() - cpu_start
+
+    with SessionLocal() as db_session:
+        states = queue_stats(db_session)
+    parent_conn.send("stats")
+    fake_stats = parent_conn.recv()
+    parent_conn.send("stop")
+    fakes.join(timeout=5)
+
+    stored = states.get("stored", 0)
+    return {
+        'scenario': args.scenario,
+        'feeds': args.feeds,
+        'articles_per_feed': args.articles,
+        'web_latency': args.web_latency,
+        'llm_latency': args.llm_latency,
+        'llm_rps': args.llm_rps,
+        'overrides': overrides,
+        'pipeline_seconds': pipeline_seconds,
+        'delivery_seconds': delivery_seconds,
+        'cpu_seconds': cpu_total,
+        'stored': stored,
+        'throughput': stored / pipeline_seconds if pipeline_seconds else 0.0,
+        'queue_states': states,
+        'peak_rss_mb': peak_rss_mb(),
+        'stages': metrics.summary()['timings'],
+        'fakes': fake_stats,
+    }
+
+
+def format_report(result: dict) -> str:
+    lines = [
+        f"场景: {result['scenario']}  ({result['feeds']} 个源 × {result['articles_per_feed']} 篇, "
+        f"网页延迟 {result['web_latency']}s, AI延迟 {result['llm_latency']}s, "
+        f"AI限速 {result['llm_rps'] or '无'} rps)",
+        f"流水线耗时: {result['pipeline_seconds']:.2f}s   发送耗时: {result['delivery_seconds']:.2f}s   "
+        f"CPU时间: {result['cpu_seconds']:.2f}s",
+        f"入库: {result['stored']} 篇   吞吐量: {result['throughput']:.2f} 篇/秒   "
+        f"峰值RSS: {result['peak_rss_mb']:.1f} MB",
+        f"队列状态: {result['queue_states']}",
+        f"替身服务: {result['fakes']}",
+        "",
+        f"{'阶段':<20}{'次数':>8}{'p50(ms)':>10}{'p90(ms)':>10}{'p99(ms)':>10}{'max(ms)':>10}",
+    ]
+    for name, t in sorted(result['stages'].items()):
+        lines.append(
+            f"{name:<20}{t['count']:>8}{t['p50'] * 1000:>10.1f}{t['p90'] * 1000:>10.1f}"
+            f"{t['p99'] * 1000:>10.1f}{t['max'] * 1000:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def compare_with_baseline(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    """返回相对基线的性能回退描述列表；为空表示没有回退。"""
+    regressions = []
+    if baseline.get('throughput') and result['throughput'] < baseline['throughput'] * (1 - tolerance):
+        regressions.append(f"吞吐量 {baseline['throughput']:.2f} -> {result['throughput']:.2f} 篇/秒")
+    for name, old in baseline.get('stages', {}).items():
+        new = result['stages'].get(name)
+        if new and old.get('p90') and new['p90'] > old['p90'] * (1 + tolerance):
+            regressions.append(f"{name} p90 {old['p90'] * 1000:.1f} -> {new['p90'] * 1000:.1f} ms")
+    return regressions
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    result = run(args)
+    print(format_report(result))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.json}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_with_baseline(result, json.load(f), args.tolerance)
+        if regressions:
+            print("\n检测到性能回退:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("\n与基线相比没有性能回退。")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
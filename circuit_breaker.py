@@ -0,0 +1,294 @@
+# circuit_breaker.py (Version 1.0 - Host Circuit Breakers & Collection Deadlines)
+
+# ==============================================================================
+# 1. 导入工具箱 (Import necessary tools)
+# ==============================================================================
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+
+from sqlalchemy import select, update, case, and_, or_
+
+import config
+import metrics
+from digest import as_utc
+from models import HostBreaker
+from work_queue import insert_ignore, retry_on_lock
+from logger_config import logger
+
+# ==============================================================================
+# "雅典娜"采集的失败预算
+#
+# 下载文章时每篇最多重试3次（指数退避，最长等待10秒），一个宕机的网站每篇文章要耗费约30秒，
+# 而且每次运行都会重来一遍。这里提供两种限制，让采集在网站故障时平稳降级，而不是越拖越长:
+# - 按网站 (URL的主机名) 熔断: 连续 HOST_FAILURE_THRESHOLD 篇文章下载失败后熔断，
+#   HOST_COOLDOWN_SECONDS 内跳过该网站的所有文章 (推迟到冷却结束，不消耗重试次数)；
+#   冷却结束后每个进程只放行一篇文章作为试探 (半开状态)，成功则恢复，失败则再次熔断。
+#   熔断状态保存在 host_breakers 表中，跨运行、跨工作进程共享: 每次运行开始时用一条查询读入，
+#   失败与恢复时用一条原子 UPDATE 写回，多个进程同时记录失败也不会丢失计数；
+# - 时间预算: 每次运行的采集有总时限 (RUN_DEADLINE_SECONDS)，每个信源在一次运行中花费的采集时间也有上限
+#   (FEED_DEADLINE_SECONDS)，超出后剩余的信源与文章留在工作队列中，由之后的运行继续处理。
+# ==============================================================================
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    return as_utc(value) if value is not None else None
+
+
+def host_of(url: str) -> str:
+    """文章URL的主机名（小写，不含端口），作为熔断的粒度。"""
+    return (urlsplit(url).hostname or "").lower()
+
+
+# ==============================================================================
+# 2. 网站熔断器 (Host Circuit Breakers)
+# ==============================================================================
+class HostBreakers:
+    """
+    一次运行中所有网站的熔断状态。load() 从数据库读入已有的失败记录；
+    下载前调用 allow(url)，下载后调用 record_success(url) 或 record_failure(url, error)。
+    """
+
+    def __init__(self, session_factory, threshold: int | None = None, cooldown_seconds: float | None = None):
+        self.session_factory = session_factory
+        self.threshold = threshold or config.HOST_FAILURE_THRESHOLD
+        self.cooldown_seconds = cooldown_seconds or config.HOST_COOLDOWN_SECONDS
+        self._lock = threading.Lock()
+        # 有连续失败记录的网站: 主机名 -> (连续失败次数, 冷却结束时间)；不在其中的网站是正常的
+        self._failures: dict[str, tuple[int, datetime | None]] = {}
+        # 半开状态下正在试探的网站
+        self._probing: set[str] = set()
+
+    def load(self, db_session):
+        """读入所有有连续失败记录的网站（一条查询）。"""
+        rows = db_session.execute(
+            select(HostBreaker.host, HostBreaker.consecutive_failures, HostBreaker.opened_until)
+            .where(HostBreaker.consecutive_failures > 0)
+        ).all()
+        with self._lock:
+            self._failures = {host: (failures, _as_utc(opened_until)) for host, failures, opened_until in rows}
+            self._probing.clear()
+        tripped = sum(1 for failures, _ in self._failures.values() if failures >= self.threshold)
+        if tripped:
+            logger.info(f"{tripped} 个网站处于熔断状态，冷却结束前不会下载它们的文章。")
+        return self
+
+    def state(self, url: str, now: datetime | None = None) -> str:
+        host = host_of(url)
+        failures, opened_until = self._failures.get(host, (0, None))
+        if failures < self.threshold:
+            return CLOSED
+        if opened_until is not None and opened_until > (now or datetime.now(timezone.utc)):
+            return OPEN
+        return HALF_OPEN
+
+    def retry_at(self, url: str, now: datetime | None = None) -> datetime:
+        """
+        被跳过的文章什么时候可以再试: 熔断冷却结束的时间；
+        半开状态下（另一篇文章正在试探）等待 WORK_RETRY_DELAY_SECONDS。
+        """
+        now = now or datetime.now(timezone.utc)
+        opened_until = self._failures.get(host_of(url), (0, None))[1]
+        if opened_until is not None and opened_until > now:
+            return opened_until
+        return now + timedelta(seconds=config.WORK_RETRY_DELAY_SECONDS)
+
+    def allow(self, url: str, now: datetime | None = None) -> bool:
+        """是否可以下载这篇文章。半开状态的网站同一时间只放行一篇试探。"""
+        state = self.state(url, now)
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN:
+            host = host_of(url)
+            with self._lock:
+                if host not in self._probing:
+                    self._probing.add(host)
+                    logger.info(f"网站 {host} 的熔断冷却已结束，放行一篇文章试探: {url}")
+                    return True
+        metrics.incr("collector.breaker_skipped")
+        return False
+
+    def record_success(self, url: str):
+        """下载成功: 清零该网站的连续失败次数。之前没有失败记录的网站不写数据库。"""
+        host = host_of(url)
+        with self._lock:
+            self._probing.discard(host)
+            previous = self._failures.pop(host, None)
+        if previous is None:
+            return
+        try:
+            self._write_success(host)
+        except Exception as e:
+            logger.warning(f"记录网站 {host} 的恢复状态失败: {e}")
+            return
+        if previous[0] >= self.threshold:
+            logger.info(f"网站 {host} 已恢复，解除熔断。")
+
+    def record_failure(self, url: str, error: str, now: datetime | None = None):
+        """下载失败: 连续失败次数加一，达到阈值时熔断 HOST_COOLDOWN_SECONDS 秒。"""
+        host = host_of(url)
+        now = now or datetime.now(timezone.utc)
+        was_open = self.state(url, now) == OPEN
+        with self._lock:
+            self._probing.discard(host)
+        try:
+            failures, opened_until = self._write_failure(host, error, now)
+        except Exception as e:
+            logger.warning(f"记录网站 {host} 的失败状态失败: {e}")
+            return
+        opened_until = _as_utc(opened_until)
+        with self._lock:
+            self._failures[host] = (failures, opened_until)
+        # 熔断时仍在进行中的下载随后失败，不重复记录
+        if failures >= self.threshold and not was_open:
+            metrics.incr("collector.breaker_tripped")
+            logger.warning(f"网站 {host} 已连续 {failures} 次下载失败，熔断 {self.cooldown_seconds:.0f} 秒"
+                           f" (至 {opened_until:%Y-%m-%d %H:%M:%S} UTC)。")
+
+    # --- 数据库读写 ---
+    @retry_on_lock
+    def _write_failure(self, host: str, error: str, now: datetime) -> tuple[int, datetime | None]:
+        """一条原子 UPDATE 累加失败次数，并在达到阈值时设置冷却结束时间。返回 (连续失败次数, 冷却结束时间)。"""
+        failures = HostBreaker.consecutive_failures + 1
+        # 达到阈值且当前不在冷却中 (首次熔断或半开试探失败) 时才开始新的冷却，熔断期间其余的失败不顺延冷却时间
+        trips = and_(failures >= self.threshold,
+                     or_(HostBreaker.opened_until.is_(None), HostBreaker.opened_until <= now))
+        with self.session_factory() as db_session:
+            try:
+                db_session.execute(insert_ignore(db_session, HostBreaker.__table__, ('host',)),
+                                   [{'host': host, 'consecutive_failures': 0, 'failure_count': 0, 'trip_count': 0}])
+                row = db_session.execute(
+                    update(HostBreaker).where(HostBreaker.host == host)
+                    .values(
+                        consecutive_failures=failures,
+                        failure_count=HostBreaker.failure_count + 1,
+                        opened_until=case((trips, now + timedelta(seconds=self.cooldown_seconds)),
+                                          else_=HostBreaker.opened_until),
+                        trip_count=case((trips, HostBreaker.trip_count + 1), else_=HostBreaker.trip_count),
+                        last_failure_at=now, last_error=(error or "")[:1000], updated_at=now,
+                    )
+                    .returning(HostBreaker.consecutive_failures, HostBreaker.opened_until)
+                ).one()
+                db_session.commit()
+            except Exception:
+                db_session.rollback()
+                raise
+        return row[0], row[1]
+
+    @retry_on_lock
+    def _write_success(self, host: str):
+        with self.session_factory() as db_session:
+            try:
+                db_session.execute(
+                    update(HostBreaker).where(HostBreaker.host == host)
+                    .values(consecutive_failures=0, opened_until=None, updated_at=datetime.now(timezone.utc))
+                )
+                db_session.commit()
+            except Exception:
+                db_session.rollback()
+                raise
+
+
+def breaker_status(db_session, now: datetime | None = None, threshold: int | None = None) -> list[dict]:
+    """列出有失败记录的网站及其熔断状态，熔断中的排在前面。"""
+    now = now or datetime.now(timezone.utc)
+    threshold = threshold or config.HOST_FAILURE_THRESHOLD
+    rows = db_session.scalars(
+        select(HostBreaker).where(HostBreaker.failure_count > 0).order_by(HostBreaker.consecutive_failures.desc(),
+                                                                          HostBreaker.host)
+    ).all()
+    status = []
+    for row in rows:
+        opened_until = _as_utc(row.opened_until)
+        if row.consecutive_failures < threshold:
+            state = CLOSED
+        elif opened_until is not None and opened_until > now:
+            state = OPEN
+        else:
+            state = HALF_OPEN
+        status.append({
+            'host': row.host, 'state': state, 'consecutive_failures': row.consecutive_failures,
+            'failure_count': row.failure_count, 'trip_count': row.trip_count, 'opened_until': opened_until,
+            'last_failure_at': row.last_failure_at, 'last_error': row.last_error,
+        })
+    return status
+
+
+def reset_breaker(db_session, host: str) -> bool:
+    """手动解除一个网站的熔断并清零连续失败次数。"""
+    result = db_session.execute(
+        update(HostBreaker).where(HostBreaker.host == host.lower())
+        .values(consecutive_failures=0, opened_until=None, updated_at=datetime.now(timezone.utc))
+    )
+    db_session.commit()
+    return result.rowcount == 1
+
+
+# ==============================================================================
+# 3. 时间预算 (Deadlines)
+# ==============================================================================
+class Deadline:
+    """从创建时开始计时的时限；seconds 为空时表示没有时限。"""
+
+    def __init__(self, seconds: float | None):
+        self.seconds = seconds
+        self._expires = time.monotonic() + seconds if seconds else None
+
+    def remaining(self) -> float | None:
+        """剩余秒数（不小于0）；没有时限时返回 None。"""
+        if self._expires is None:
+            return None
+        return max(0.0, self._expires - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self._expires is not None and time.monotonic() >= self._expires
+
+
+class FeedTimeBudgets:
+    """
+    本次运行中每个信源的采集时间预算: 采集它的RSS与下载它的文章所花费的时间都计入该信源
+    (多个线程并行处理时累加)。只统计实际工作的时间，文章在队列中等待的时间不计入，
+    因此一个缓慢的网站最多占用工作线程 seconds 秒，不会拖慢其他信源。seconds 为空时不限。
+    """
+
+    def __init__(self, seconds: float | None):
+        self.seconds = seconds
+        self._lock = threading.Lock()
+        self._spent: dict[str, float] = {}
+
+    def remaining(self, feed_url: str | None) -> float | None:
+        if not feed_url or not self.seconds:
+            return None
+        return max(0.0, self.seconds - self._spent.get(feed_url, 0.0))
+
+    def exhausted(self, feed_url: str | None) -> bool:
+        return self.remaining(feed_url) == 0.0
+
+    def spend(self, feed_url: str | None, seconds: float):
+        if not feed_url or not self.seconds:
+            return
+        with self._lock:
+            self._spent[feed_url] = self._spent.get(feed_url, 0.0) + seconds
+            if self._spent[feed_url] - seconds < self.seconds <= self._spent[feed_url]:
+                metrics.incr("collector.feed_deadline_exceeded")
+                logger.warning(f"信源 {feed_url} 本次运行的采集时间已超过 {self.seconds:g} 秒，剩余文章留到之后的运行。")
+
+    @contextmanager
+    def timed(self, feed_url: str | None):
+        """把 with 块的耗时计入该信源。"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spend(feed_url, time.perf_counter() - start)
+
+
+def earliest_remaining(*remaining: float | None) -> float | None:
+    """多个时限中最早到期的剩余秒数；都没有时限时返回 None。"""
+    remaining = [r for r in remaining if r is not None]
+    return min(remaining) if remaining else None
@@ -5,7 +5,9 @@
 # ==============================================================================
 
 # --- 数据源配置 (Data Source Configuration) ---
-# 在这里管理您所有想关注的RSS源
+# RSS源保存在数据库的 feeds 表中，通过 `python manage.py feeds add/list/disable/import-opml` 管理，
+# 每个信源可以单独设置下面的各项参数 (见 feed_registry.py)。
+# 这里的列表只在 feeds 表为空时（第一次运行）用于初始化信源注册表。
 RSS_FEEDS = [
     "http://www.ruanyifeng.com/blog/atom.xml",
     # 您可以在这里继续添加更多RSS链接...
@@ -14,14 +16,317 @@ RSS_FEEDS = [
 ]
 
 # --- 数据处理配置 (Data Processing Configuration) ---
-# 每次运行时，从每个RSS源最多处理的文章数量
+# 每次运行时，从每个RSS源最多处理的文章数量（信源未单独设置时的默认值）
 # 这是一个重要的成本和性能控制器
 MAX_ARTICLES_PER_FEED = 5
 
-# 内容健全性检查的最小长度阈值（字符数）
+# 内容健全性检查的最小长度阈值（字符数，信源未单独设置时的默认值）
 MIN_CONTENT_LENGTH = 200
 
 
+# --- 流水线并发配置 (Pipeline Concurrency Configuration) ---
+# 流水线各阶段的工作线程数。采集和下载以网络等待为主，可以适当调高
+FETCH_WORKERS = 4
+EXTRACT_WORKERS = 8
+SUMMARIZE_WORKERS = 4
+
+# 阶段之间的队列容量。队列满时上游会等待下游，从而限制内存占用
+PIPELINE_QUEUE_SIZE = 32
+
+# 新发现的文章攒够多少条、或最多等待多少秒后，批量写入工作队列
+ENQUEUE_BATCH_SIZE = 50
+ENQUEUE_MAX_WAIT_SECONDS = 2
+
+# 常驻模式 (python data_pipeline.py --daemon) 下两轮采集之间的间隔（秒）
+DAEMON_INTERVAL_SECONDS = 900
+
+
+# --- 采集失败预算配置 (Collection Failure Budget) ---
+# 同一网站连续这么多篇文章下载失败后熔断，冷却期间跳过该网站的所有文章 (见 circuit_breaker.py)
+HOST_FAILURE_THRESHOLD = 3
+
+# 熔断的冷却时间（秒）。冷却结束后放行一篇文章试探，成功则恢复，失败则再冷却这么久
+HOST_COOLDOWN_SECONDS = 1800
+
+# 每个信源在一次运行中最多花费的采集时间（秒）: 读取RSS与下载它的文章的耗时都计入，多个线程并行时累加；
+# 超出后该信源剩余的文章留到之后的运行。None 表示不限
+FEED_DEADLINE_SECONDS = 120
+
+# 每次运行采集阶段（读取RSS与下载正文）的总时限（秒），超时后不再采集新的信源与文章，
+# 已下载的文章照常生成摘要并入库。None 表示不限
+RUN_DEADLINE_SECONDS = 600
+
+# 读取RSS的最短有效超时（秒）。运行时限或信源时间预算的剩余时间不足这么多时不再读取该信源，
+# 直接留到下次运行，而不是以一个几乎为0的超时去请求、再把必然的超时记为该信源的失败
+FEED_MIN_POLL_TIMEOUT_SECONDS = 2
+
+
+# --- 正文质量过滤配置 (Content Quality Filter Configuration) ---
+# 提取正文之后、AI摘要之前，先用本地的廉价检查过滤掉导航页、付费墙占位页与 Cookie 提示等 (见 quality_filter.py)。
+# 以下为默认阈值，每个信源可以通过 `python manage.py feeds add URL --quality KEY=VALUE` 单独覆盖:
+#   enabled                   是否启用质量过滤
+#   languages                 允许的语言代码列表，例如 ["zh", "latin"]；None 表示不限
+#                             (zh / ja / ko / latin / cyrillic / arabic / other，按文字系统判断)
+#   min_letter_ratio          字母（含汉字等）在非空白字符中的最低占比
+#   max_digit_ratio           数字在非空白字符中的最高占比
+#   max_duplicate_line_ratio  重复出现的行（段落）的最高占比
+#   paywall_max_chars         不超过该长度的正文中出现付费墙短语时拒绝
+# 阈值设为 None 表示不做该项检查
+QUALITY_THRESHOLDS = {
+    "enabled": True,
+    "languages": None,
+    "min_letter_ratio": 0.6,
+    "max_digit_ratio": 0.3,
+    "max_duplicate_line_ratio": 0.3,
+    "paywall_max_chars": 2000,
+}
+
+# 付费墙、登录墙与 Cookie 提示等占位页面中的常见短语（不区分大小写）
+QUALITY_PAYWALL_PHRASES = [
+    "订阅后阅读全文", "订阅后可阅读", "付费阅读", "付费内容", "开通会员", "登录后阅读", "登录后查看全文",
+    "剩余内容需", "请开启JavaScript", "本网站使用Cookie",
+    "subscribe to continue reading", "subscribe to read", "to continue reading", "already a subscriber",
+    "subscribers only", "sign in to read", "create a free account", "this content is for members",
+    "we use cookies", "accept all cookies", "please enable javascript",
+]
+
+# 质量检查按小批次进行: 攒够多少篇、或最多等待多少秒后检查一批
+QUALITY_BATCH_SIZE = 32
+QUALITY_MAX_WAIT_SECONDS = 1
+
+
+# --- 网页快照缓存配置 (HTML Snapshot Cache Configuration) ---
+# 下载的网页以压缩、按内容寻址的方式保存在该目录中，之后可以用 `python manage.py reextract`
+# 离线重新提取正文而无需重新下载 (见 html_cache.py)。为 None 时不保存快照
+HTML_CACHE_DIR = None
+
+# 快照缓存的总大小上限（字节），超出后按最久未使用的顺序淘汰
+HTML_CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+# gzip 压缩级别 (1-9)，越高越省空间但越慢
+HTML_CACHE_COMPRESSION_LEVEL = 6
+
+# 重新提取正文时每次从数据库读取的原文数量
+REEXTRACT_CHUNK_SIZE = 200
+
+
+# --- 分片采集配置 (Sharded Collection Configuration) ---
+# 多个工作进程 (python data_pipeline.py --worker) 同时运行时，信源按URL哈希分为这么多个分片，
+# 分片在存活的进程之间分配 (见 sharding.py)。分片数应明显多于进程数，且所有进程必须使用相同的值
+FEED_SHARDS = 64
+
+# 分片租约时长（秒）。工作进程崩溃后，它负责的分片最多在这么久之后被其余进程接管
+SHARD_LEASE_SECONDS = 60
+
+# 心跳（续租并重新计算分片分配）的间隔（秒），应明显小于租约时长
+SHARD_HEARTBEAT_SECONDS = 15
+
+# 工作进程启动时，第一次接手分片之前等待其他同时启动的进程登记的秒数
+SHARD_SETTLE_SECONDS = 5
+
+
+# --- 工作队列配置 (Work Queue Configuration) ---
+# 每篇文章的处理进度都记录在 article_queue 表中，中断的运行可以从断点继续。
+
+# 每次从队列中领取的任务数量
+WORK_CLAIM_BATCH_SIZE = 16
+
+# 任务租约时长（秒）。工作进程崩溃后，其领取的任务在租约过期后会被重新领取
+WORK_LEASE_SECONDS = 300
+
+# 单个任务的最大尝试次数，超过后标记为 failed；两次尝试之间的最短间隔（秒）
+WORK_MAX_ATTEMPTS = 3
+WORK_RETRY_DELAY_SECONDS = 60
+
+# 队列暂时为空、但上游阶段仍在运行时，两次领取之间的轮询间隔（秒）
+WORK_POLL_SECONDS = 1
+
+
+# --- 优先级评分与预算配置 (Priority Scoring & Budget Configuration) ---
+# 在调用AI之前，先对所有候选文章进行一次廉价的本地评分，按分数从高到低在预算内挑选文章。
+
+# 信源权重: 键可以是RSS链接或信源名称，未列出的信源权重为 1.0。
+# 信源注册表 (feeds 表) 中设置了权重的信源优先使用注册表中的权重，其余信源使用这里的权重
+SOURCE_WEIGHTS = {
+    # "http://www.ruanyifeng.com/blog/atom.xml": 1.5,
+}
+
+# 兴趣关键词及其权重: 标题或正文中出现这些词的文章会被优先处理（不区分大小写）
+INTEREST_KEYWORDS = {
+    # "人工智能": 1.0,
+    # "芯片": 0.5,
+}
+
+# 时效性评分的半衰期（小时）: 发布超过该时长的文章，时效分减半
+RECENCY_HALF_LIFE_HOURS = 24
+
+# 正文长度达到该字符数时，长度分即为满分
+IDEAL_CONTENT_LENGTH = 3000
+
+# 各项评分的权重，总分 = 信源权重 × (各项分数的加权和)
+SCORE_WEIGHTS = {"recency": 0.4, "length": 0.2, "keywords": 0.4}
+
+# 每次运行的AI调用总预算（估算的token数，含输入与输出）。设为 None 表示不限制
+RUN_TOKEN_BUDGET = 200_000
+
+# token估算参数: 平均每个token对应的字符数（中文约为1.5），以及每次调用Prompt模板本身的开销
+CHARS_PER_TOKEN = 1.5
+PROMPT_OVERHEAD_TOKENS = 150
+
+# 每条摘要允许AI生成的最大token数
+SUMMARY_MAX_TOKENS = 500
+
+# 生成摘要使用的Prompt版本，即 prompts/ 目录下的文件名（不含 .prompt 扩展名）。
+# 每条摘要都会记录生成它的Prompt版本；修改Prompt时请新建一个版本文件，而不是直接改动旧文件
+SUMMARY_PROMPT_VERSION = "summarizer_v2"
+
+# 是否以流式方式接收摘要。流式模式下可以统计首个token的延迟 (TTFT)，并在失控时提前中止生成
+SUMMARY_STREAMING = True
+
+# 流式模式下单条摘要的硬性上限: 输出字符数与耗时（秒），超过即中止并截断到最后一个完整句子
+SUMMARY_MAX_CHARS = 800
+SUMMARY_MAX_SECONDS = 45
+
+
+
+# --- 模型池与路由配置 (Model Pool & Routing) ---
+# 可用的摘要模型端点（均为OpenAI兼容接口）。为空时只使用 .env 中的 OPENAI_API_KEY / OPENAI_API_BASE / DEFAULT_MODEL。
+# 每一项的字段:
+#   name            端点名称，用于日志与统计
+#   model / model_env   模型名称，或保存模型名称的环境变量名
+#   api_key_env     保存API密钥的环境变量名 (默认 OPENAI_API_KEY)
+#   base_url_env    保存接口地址的环境变量名 (默认 OPENAI_API_BASE)
+#   tier            "cheap" (便宜快速) 或 "strong" (能力更强)
+#   max_concurrency 该端点同时处理的最大请求数 (默认与 SUMMARIZE_WORKERS 相同)
+MODEL_POOL = [
+    # {"name": "fast", "model": "gpt-4o-mini", "tier": "cheap", "max_concurrency": 8},
+    # {"name": "strong", "model_env": "DEFAULT_MODEL", "tier": "strong", "max_concurrency": 2},
+    # {"name": "backup", "model": "deepseek-chat", "api_key_env": "BACKUP_API_KEY",
+    #  "base_url_env": "BACKUP_API_BASE", "tier": "strong", "max_concurrency": 4},
+]
+
+# 正文超过该字符数的文章优先交给 "strong" 档位，其余优先交给 "cheap" 档位
+ROUTING_LONG_ARTICLE_CHARS = 4000
+
+# 单次请求的超时时间（秒）。超时视为失败，立即切换到下一个端点
+ROUTER_REQUEST_TIMEOUT = 60
+
+# 平均延迟超过该秒数、或错误率超过该比例的端点视为降级，排到其他健康端点之后
+ROUTER_SLOW_SECONDS = 20
+ROUTER_MAX_ERROR_RATE = 0.5
+
+# 被限流 (429) 或连续失败达到次数的端点暂停使用的秒数（429 响应带 Retry-After 时以其为准）
+ROUTER_FAILURES_BEFORE_COOLDOWN = 3
+ROUTER_COOLDOWN_SECONDS = 30
+
+# 延迟与错误率滑动平均的平滑系数，越大越看重最近的请求
+ROUTER_EWMA_ALPHA = 0.3
+
+# --- 批量摘要配置 (Batch Summarization Configuration) ---
+# 摘要模式: "sync" 逐篇实时调用模型；"batch" 把待摘要的文章写成JSONL文件，通过 Batch API 一次性提交，
+# 费用更低且不占用实时请求的限额，但结果可能需要数小时才能返回，适合补跑历史数据和夜间的大批量任务。
+# 也可以在单次运行时通过 `python data_pipeline.py --mode batch` 选择。
+SUMMARIZE_MODE = "sync"
+
+# 批量模式使用的模型端点名称 (config.MODEL_POOL 中的 name)，None 表示使用模型池中的第一个端点。
+# 该端点的服务商必须支持 OpenAI 兼容的 /v1/files 与 /v1/batches 接口
+BATCH_ENDPOINT = None
+
+# 单个批量任务最多包含的请求数（OpenAI 的上限为 50000），超出的文章会拆分到多个批量任务中
+BATCH_MAX_REQUESTS = 5000
+
+# 批量任务的完成时限（服务商目前只支持 "24h"）。批次中的文章在此期间由该批次持有租约，租约时长（秒）需略长于时限
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_LEASE_SECONDS = 26 * 3600
+
+# 轮询批量任务状态的间隔（秒），以及一次运行中最多等待的秒数。
+# 超时后本次运行直接结束，未完成的批量任务会在之后的运行（或 `python manage.py batch collect`）中继续取回
+BATCH_POLL_SECONDS = 60
+BATCH_MAX_WAIT_SECONDS = 2 * 3600
+
+# 批量请求文件 (JSONL) 的保存目录
+BATCH_DIR = "batches"
+
+# --- 摘要重新生成配置 (Re-summarization Configuration) ---
+# `python manage.py resummarize` 每次从数据库读取的原文条数。并发数与 SUMMARIZE_WORKERS 相同
+RESUMMARIZE_CHUNK_SIZE = 100
+
+# --- 语义向量配置 (Embedding Configuration) ---
+# 向量后端: "local" 使用本地CPU模型 (需要额外安装 sentence-transformers)，
+# "openai" 使用兼容OpenAI API的嵌入接口 (在 .env 中配置 EMBEDDING_API_BASE / EMBEDDING_API_KEY)
+EMBEDDING_BACKEND = "local"
+
+# 嵌入模型名称。本地后端默认使用一个对中文友好、可在CPU上运行的小模型
+EMBEDDING_MODEL = "BAAI/bge-small-zh-v1.5"
+
+# 每次批量计算向量的文本数量
+EMBEDDING_BATCH_SIZE = 64
+
+# 向量数量超过该阈值后，如果安装了 hnswlib，则改用近似最近邻索引代替暴力检索
+EMBEDDING_ANN_THRESHOLD = 100_000
+
+# 相关简报检索的索引在进程内缓存的最长时间（秒）。向量数量或最大ID变化时立即重建；
+# 其他进程原地覆盖的向量 (数量与最大ID不变) 最迟在这么久之后生效。None 表示只按签名判断
+EMBEDDING_INDEX_TTL_SECONDS = 300
+
+# 话题分组的余弦相似度阈值，越高则分组越细
+TOPIC_SIMILARITY_THRESHOLD = 0.75
+
+
 # --- 邮件配置 (Email Configuration) ---
-# 邮件主题模板，{date} 将被替换为当前日期
-EMAIL_SUBJECT_TEMPLATE = "您的雅典娜每日简报 - {date}"
\ No newline at end of file
+# 邮件主题模板，{date} 将被替换为当前简报周期的日期
+EMAIL_SUBJECT_TEMPLATE = "您的雅典娜简报 - {date}"
+
+# 简报周期: "hourly" 每小时 / "daily" 每天 / "weekly" 每周（周一开始）。
+# 每个收件人在一个周期内只会收到一封简报，每封只包含上次发送之后的新摘要 (见 digest.py)
+DIGEST_WINDOW = "daily"
+
+# 计算简报周期边界与显示日期所用的时区，例如 "Asia/Shanghai"；为 None 时使用服务器本地时区
+DELIVERY_TIMEZONE = None
+
+# 单封简报最多包含的摘要数量，超出的部分留到下一封
+DIGEST_MAX_ITEMS = 200
+
+# 邮件中简报的分组方式: "source" 按信源分组，"topic" 按语义话题分组
+EMAIL_GROUP_BY = "source"
+
+# --- 网页/API 服务配置 (Web API Configuration) ---
+# 列表接口默认每页的摘要数量，以及客户端通过 ?limit= 最多可以请求的数量（也是网页视图最多显示的数量）
+WEB_PAGE_SIZE = 50
+WEB_MAX_PAGE_SIZE = 200
+
+# 响应在进程内缓存的秒数，同时作为 Cache-Control 的 max-age；新入库的摘要最多延迟这么久才会出现
+WEB_CACHE_TTL_SECONDS = 30
+
+# 进程内缓存最多保存的响应数量
+WEB_CACHE_MAX_ENTRIES = 1024
+
+# --- 性能剖析配置 (Profiling Configuration) ---
+# 剖析默认关闭，可通过命令行参数 --profile 或环境变量 ATHENA_PROFILE=1 开启。
+# 结果写入 logs/profiles/<任务>-<时间>/，用 `python manage.py profile show` 查看。
+# 每个阶段的热点函数与内存分配位置最多保留的条数
+PROFILE_TOP_N = 25
+
+# tracemalloc 记录的调用栈深度，越深越能定位到业务代码，但开销也越大
+PROFILE_TRACEMALLOC_FRAMES = 10
+
+# 内存采样间隔（秒）: 每当已分配内存创出新高时，记录一次分配位置快照
+PROFILE_MEMORY_SAMPLE_SECONDS = 2
+
+# 最多保留的剖析结果数量，更早的结果会被自动删除
+PROFILE_KEEP_RUNS = 20
+
+
+# --- 日志配置 (Logging Configuration) ---
+# 全局日志级别: "DEBUG" / "INFO" / "WARNING" / "ERROR"
+LOG_LEVEL = "INFO"
+
+# 日志输出格式: "text" 为人类可读的文本，"json" 为每行一个JSON对象（便于日志系统采集）
+LOG_FORMAT = "text"
+
+# 逐篇文章的详细日志（下载、提取、摘要、入库）的级别。None 表示沿用 LOG_LEVEL；
+# 文章数量很多时可设为 "WARNING"，只保留异常情况
+ARTICLE_LOG_LEVEL = None
+
+# 逐篇文章 INFO 日志的抽样比例 (0~1)，1 表示全部保留；WARNING 及以上级别不受抽样影响
+ARTICLE_LOG_SAMPLE_RATE = 1.0
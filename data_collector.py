@@ -3,12 +3,18 @@
 # ==============================================================================
 # 1. 导入工具箱 (Import necessary tools)
 # ==============================================================================
+import calendar
+from datetime import datetime, timezone
+
 import feedparser
+import httpx
 import trafilatura
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+import config
+from html_cache import default_cache
 # --- 核心改动: 从我们的新模块导入已配置好的logger实例 ---
-from logger_config import logger
+from logger_config import logger, article_logger
 
 # ==============================================================================
 # 2. 为网络请求函数包裹上重试"盔甲" (Retry-enabled network function)
@@ -22,63 +28,157 @@ def fetch_url_with_retry(url: str):
     """
     一个带重试逻辑的网页下载函数。
     """
-    logger.info(f"    ~ 正在下载: {url}")
+    article_logger.info(f"    ~ 正在下载: {url}")
     return trafilatura.fetch_url(url)
 
 
+def parse_entry_published(entry) -> datetime | None:
+    """
+    从RSS条目中解析发布时间（UTC）。
+    feedparser 会把各种日期格式统一解析为 UTC 的 struct_time；缺失时返回 None。
+    """
+    parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+    if not parsed:
+        return None
+    return datetime.fromtimestamp(calendar.timegm(parsed), tz=timezone.utc)
+
+
 # ==============================================================================
-# 3. 核心函数 (Core Function - Now using the central logger)
+# 3. 核心函数 (Core Functions - Now using the central logger)
+#
+# 采集被拆分为两个可以独立调度的步骤，供流式流水线在不同阶段并发执行:
+# - fetch_feed_entries: 解析一个RSS源，返回待处理的文章条目（只含元数据，很轻量）；
+# - extract_article:    下载并提取单个条目的正文，返回完整的文章字典。
 # ==============================================================================
-def fetch_and_clean_articles(rss_url: str, max_articles: int = 5):
+class FeedError(Exception):
+    """RSS源无法获取或解析。"""
+
+
+# 下载RSS源共用的HTTP客户端 (线程安全)，复用连接池与SSL上下文，避免每次请求都重新创建
+_feed_client = httpx.Client(follow_redirects=True, headers={'User-Agent': feedparser.USER_AGENT})
+
+
+def download_feed(rss_url: str, timeout: float):
+    """在 timeout 秒的超时内下载RSS源再交给 feedparser 解析（feedparser 自己下载时没有超时）。"""
+    try:
+        response = _feed_client.get(rss_url, timeout=timeout)
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        raise FeedError(f"无法获取RSS源: {rss_url}. 异常: {e}") from e
+    return feedparser.parse(response.content, response_headers=dict(response.headers))
+
+
+def parse_feed(rss_url: str, max_articles: int = 5, source_name: str | None = None,
+               timeout: float | None = None) -> list[dict]:
     """
-    从给定的RSS源URL中获取、清洁并验证文章。(版本 2.1)
+    解析RSS源，返回最多 max_articles 个文章条目；无法获取或解析时抛出 FeedError。
+    每个条目包含 url、source_name、feed_url、title 与 published_at，不包含正文。
+    source_name 为空时使用RSS中的标题；timeout 为下载RSS的超时秒数（见 circuit_breaker.py 中的采集时限）。
     """
     logger.info(f"开始处理RSS源: {rss_url}")
     
-    feed = feedparser.parse(rss_url)
+    feed = feedparser.parse(rss_url) if timeout is None else download_feed(rss_url, timeout)
     
     if feed.bozo:
-        logger.error(f"无法解析RSS源: {rss_url}. 异常: {feed.bozo_exception}")
-        return []
+        raise FeedError(f"无法解析RSS源: {rss_url}. 异常: {feed.bozo_exception}")
 
-    source_name = feed.feed.title if 'title' in feed.feed else "未知来源"
+    source_name = source_name or (feed.feed.title if 'title' in feed.feed else "未知来源")
     logger.info(f"成功解析到信源: '{source_name}'")
 
-    processed_articles = []
-    
-    for entry in feed.entries[:max_articles]:
-        article_url = entry.link
-        logger.info(f"  > ----------------------------------------------------")
-        logger.info(f"  > 正在处理文章: {article_url}")
+    return [
+        {
+            'url': entry.link,
+            'source_name': source_name,
+            'feed_url': rss_url,
+            'title': entry.get('title', ''),
+            'published_at': parse_entry_published(entry),
+        }
+        for entry in feed.entries[:max_articles]
+        if entry.get('link')
+    ]
 
+
+def fetch_feed_entries(rss_url: str, max_articles: int = 5) -> list[dict]:
+    """与 parse_feed 相同，但无法解析时只记录错误并返回空列表。"""
+    try:
+        return parse_feed(rss_url, max_articles=max_articles)
+    except FeedError as e:
+        logger.error(str(e))
+        return []
+
+
+def extract_article(entry: dict, min_content_length: int | None = None,
+                    extract_options: dict | None = None, breakers=None) -> dict | None:
+    """
+    下载一个文章条目的网页并提取、验证正文。
+    min_content_length 为正文的最小长度（默认 config.MIN_CONTENT_LENGTH），
+    extract_options 为传给 trafilatura.extract 的额外选项（来自信源设置，见 feed_registry.py）。
+    breakers 为网站熔断器 (circuit_breaker.HostBreakers)，下载的成败会记录到文章所在的网站上；
+    正文提取失败或过短说明网站本身是正常的，按成功记录。
+    成功时返回在条目基础上增加了 'clean_content' 的文章字典，失败时返回 None。
+    """
+    if min_content_length is None:
+        min_content_length = config.MIN_CONTENT_LENGTH
+    article_url = entry['url']
+    article_logger.info(f"  > 正在处理文章: {article_url}")
+
+    try:
         try:
             downloaded_html = fetch_url_with_retry(article_url)
-            
-            if not downloaded_html:
-                logger.warning(f"  - 下载成功但内容为空: {article_url}")
-                continue
+        except Exception as e:
+            if breakers is not None:
+                breakers.record_failure(article_url, str(e))
+            raise
 
-            clean_text = trafilatura.extract(downloaded_html)
+        # trafilatura 在HTTP错误或超时时不抛出异常而是返回空内容，同样计为网站的一次失败
+        if breakers is not None:
+            if downloaded_html:
+                breakers.record_success(article_url)
+            else:
+                breakers.record_failure(article_url, "下载内容为空")
 
-            if not clean_text:
-                logger.warning(f"  - 无法从HTML中提取正文: {article_url}")
-                continue
+        if not downloaded_html:
+            article_logger.warning(f"  - 下载成功但内容为空: {article_url}")
+            return None
 
-            min_content_length = 200 # 应该从config.py导入，下一步可以优化
-            if len(clean_text) < min_content_length:
-                logger.warning(f"  - 内容太短 ({len(clean_text)} chars)，已跳过: {article_url}")
-                continue
+        # 开启快照缓存时先保存网页，之后调整提取参数可以离线重新提取 (见 reextract.py)。
+        # 缓存是可选的: 写入失败 (磁盘已满、没有权限等) 不影响文章本身的处理
+        html_hash = None
+        cache = default_cache()
+        if cache is not None:
+            try:
+                html_hash = cache.put(downloaded_html)
+            except Exception as e:
+                logger.warning(f"  - 保存网页快照失败，继续处理文章: {article_url}, 错误: {e}")
 
-            logger.info(f"  + 内容验证通过。长度: {len(clean_text)} chars.")
-            processed_articles.append({
-                'url': article_url,
-                'source_name': source_name,
-                'clean_content': clean_text
-            })
+        clean_text = trafilatura.extract(downloaded_html, **(extract_options or {}))
 
-        except Exception as e:
-            logger.error(f"  - 下载文章失败 (已重试3次): {article_url}, 错误: {e}")
-            continue
+        if not clean_text:
+            article_logger.warning(f"  - 无法从HTML中提取正文: {article_url}")
+            return None
+
+        if len(clean_text) < min_content_length:
+            article_logger.warning(f"  - 内容太短 ({len(clean_text)} chars)，已跳过: {article_url}")
+            return None
+
+        article_logger.info(f"  + 内容验证通过。长度: {len(clean_text)} chars.")
+        return {**entry, 'clean_content': clean_text, 'html_hash': html_hash}
+
+    except Exception as e:
+        logger.error(f"  - 下载文章失败 (已重试3次): {article_url}, 错误: {e}")
+        return None
+
+
+def fetch_and_clean_articles(rss_url: str, max_articles: int = 5):
+    """
+    从给定的RSS源URL中获取、清洁并验证文章。(版本 2.2)
+    这是 fetch_feed_entries + extract_article 的顺序组合，适合独立测试或小规模使用。
+    """
+    processed_articles = []
+    for entry in fetch_feed_entries(rss_url, max_articles=max_articles):
+        article = extract_article(entry)
+        if article:
+            processed_articles.append(article)
 
     logger.info(f"RSS源处理完成。共获取到 {len(processed_articles)} 篇有效文章。")
     return processed_articles
@@ -1,66 +1,396 @@
-# main.py (Version 3.0 - Data Pipeline Only)
+# data_pipeline.py (Version 5.0 - Resumable Streaming Pipeline)
 
+import argparse
 import logging
+import signal
+import threading
+import time
+from collections import Counter
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import IntegrityError
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 import config
 from database import DATABASE_URL
 from models import BriefingItem, OriginalContent
-from data_collector import fetch_and_clean_articles
+from data_collector import parse_feed, extract_article
+from feed_registry import load_feeds, record_poll
+from circuit_breaker import HostBreakers, Deadline, FeedTimeBudgets, earliest_remaining
+import quality_filter
 from ai_core import summarize_article
-from logger_config import logger
+import batch_summarizer
+from scoring import score_article, estimate_tokens, TokenBudget
+import metrics
+from pipeline_stages import make_queue, start_source, start_map, start_batch, start_task, drain
+from work_queue import (
+    make_worker_id, enqueue_entries, claim, advance, advance_in_session, reject_in_session, release, defer, fail,
+    retry_on_lock, DISCOVERED, EXTRACTED, SUMMARIZED, STORED,
+)
+from sharding import ShardCoordinator
+from profiling import profiled
+from logger_config import logger, article_logger, with_run_id
 
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def run_data_pipeline():
+
+# ==============================================================================
+# 从工作队列领取任务的源阶段 (Claiming Source)
+# ==============================================================================
+def claim_stream(state: str, worker_id: str, upstream_done: threading.Event,
+                 by_score: bool = False, should_stop=None, max_tokens=None):
+    """
+    持续从工作队列中领取处于 state 状态的任务并逐个产出。
+    队列暂时为空时等待上游继续产出；上游已结束且再也领不到任务时停止。
+    这样既能处理本次运行新产生的任务，也能接上之前中断的运行遗留下来的任务。
+    max_tokens 是一个返回当前剩余token预算的函数，领取时跳过放不下的任务。
+    """
+    db_session = SessionLocal()
+    try:
+        while not (should_stop and should_stop()):
+            # 必须在领取之前读取上游状态: 上游结束前写入的任务一定能被这次领取看到
+            upstream_finished = upstream_done.is_set()
+            rows = claim(db_session, state, worker_id, config.WORK_CLAIM_BATCH_SIZE, by_score=by_score,
+                         max_estimated_tokens=max_tokens() if max_tokens else None)
+            if rows:
+                yield from rows
+            elif upstream_finished:
+                return
+            else:
+                time.sleep(config.WORK_POLL_SECONDS)
+    finally:
+        db_session.close()
+
+
+# ==============================================================================
+# 各阶段的处理函数 (Stage Functions)
+# ==============================================================================
+def discover_entries(entries: list[dict]) -> list:
+    """
+    去重并入队: 剔除数据库中已有摘要的文章，其余以 discovered 状态写入工作队列。
+    去重只依赖URL，因此放在下载正文之前，已入库的文章不会被重复下载。
+    """
+    urls = [entry['url'] for entry in entries]
+    with SessionLocal() as db_session:
+        existing_urls = {
+            url for (url,) in db_session.query(BriefingItem.source_url).filter(BriefingItem.source_url.in_(urls))
+        }
+        new_entries = [entry for entry in entries if entry['url'] not in existing_urls]
+        queued = enqueue_entries(db_session, new_entries)
+    if existing_urls:
+        logger.info(f"{len(existing_urls)} 篇文章已存在于数据库中，跳过。")
+    if queued:
+        logger.info(f"{queued} 篇新文章已加入工作队列。")
+    return []
+
+
+def poll_feed(feed: dict, timeout: float | None = None) -> list[dict]:
+    """
+    按信源设置采集一个RSS源，并把耗时、条目数或失败原因记录到信源注册表中。
+    timeout 为下载RSS的超时秒数，为空时不限。
+    """
+    start = time.perf_counter()
+    entries, error = [], None
+    try:
+        entries = parse_feed(feed['url'], max_articles=feed['max_articles'], source_name=feed['name'],
+                             timeout=timeout)
+    except Exception as e:
+        error = str(e)
+        logger.error(f"采集RSS源失败: {feed['url']}, 错误: {e}")
+    try:
+        with SessionLocal() as db_session:
+            record_poll(db_session, feed['id'], time.perf_counter() - start, len(entries), error)
+    except Exception as e:
+        logger.warning(f"记录信源 {feed['url']} 的采集统计失败: {e}")
+    return entries
+
+
+def make_poller(run_deadline: Deadline, feed_budgets: FeedTimeBudgets):
+    """
+    在本次运行的采集时限与该信源的时间预算内采集RSS源。剩余时间不足 FEED_MIN_POLL_TIMEOUT_SECONDS 时
+    不再采集，信源留到下次运行，也不记为该信源的失败。
+    """
+    def poll(feed: dict) -> list[dict]:
+        timeout = earliest_remaining(run_deadline.remaining(), feed_budgets.remaining(feed['url']))
+        if timeout is not None and timeout < config.FEED_MIN_POLL_TIMEOUT_SECONDS:
+            metrics.incr("collector.deadline_skipped_feeds")
+            logger.info(f"采集时限将到 (剩余 {timeout:.1f} 秒)，跳过信源 {feed['url']}，留到下次运行。")
+            return []
+        with feed_budgets.timed(feed['url']):
+            return poll_feed(feed, timeout=timeout)
+
+    return poll
+
+
+def make_extractor(worker_id: str, feeds_by_url: dict[str, dict], breakers: HostBreakers | None = None,
+                   run_deadline: Deadline | None = None, feed_budgets: FeedTimeBudgets | None = None):
+    """
+    按所属信源的设置下载并提取正文并评分，交给质量过滤阶段 (见 make_quality_gate)。
+    feeds_by_url 为本次运行开始时读取的信源设置；不在注册表中的信源使用全局默认值。
+    文章不会在以下情况下载，而是留在队列中且不消耗重试次数 (见 circuit_breaker.py):
+    本次运行的采集时限已到（放回队列）、所属信源的时间预算已用完或所在网站正处于熔断冷却中（推迟领取）。
+    """
+    run_deadline = run_deadline or Deadline(None)
+    feed_budgets = feed_budgets or FeedTimeBudgets(None)
+
+    def extract(item: dict):
+        if run_deadline.expired:
+            with SessionLocal() as db_session:
+                release(db_session, item['id'], worker_id)
+            return None
+        if feed_budgets.exhausted(item['feed_url']):
+            metrics.incr("collector.deadline_deferred")
+            with SessionLocal() as db_session:
+                defer(db_session, item['id'], worker_id,
+                      datetime.now(timezone.utc) + timedelta(seconds=config.WORK_RETRY_DELAY_SECONDS))
+            return None
+        if breakers is not None and not breakers.allow(item['url']):
+            with SessionLocal() as db_session:
+                defer(db_session, item['id'], worker_id, breakers.retry_at(item['url']))
+            return None
+
+        feed = feeds_by_url.get(item['feed_url'], {})
+        with feed_budgets.timed(item['feed_url']):
+            article = extract_article(item, min_content_length=feed.get('min_content_length'),
+                                      extract_options=feed.get('extract_options'), breakers=breakers)
+        if article is None:
+            with SessionLocal() as db_session:
+                fail(db_session, item['id'], worker_id, "正文下载或提取失败")
+            return None
+        return {
+            'id': item['id'],
+            'url': item['url'],
+            'feed_url': item['feed_url'],
+            'clean_content': article['clean_content'],
+            'html_hash': article.get('html_hash'),
+            'score': score_article({**article, 'source_weight': feed.get('weight')}),
+            'estimated_tokens': estimate_tokens(article),
+        }
+
+    return extract
+
+
+def make_quality_gate(worker_id: str, feeds_by_url: dict[str, dict], rejected: Counter):
+    """
+    正文质量过滤阶段: 对提取阶段攒成的一小批文章做一次向量化检查 (见 quality_filter.py)，
+    在同一个事务中把通过的文章作为检查点写回队列 (discovered -> extracted)，未通过的标记为 rejected，
+    它们不会再调用AI。各原因代码的拒绝数量累加到 rejected 中。
+    """
+    @retry_on_lock
+    def write_verdicts(items: list[dict], verdicts: list[dict]):
+        with SessionLocal() as db_session:
+            try:
+                for item, verdict in zip(items, verdicts):
+                    fields = {key: item[key] for key in ('clean_content', 'html_hash', 'score', 'estimated_tokens')}
+                    if verdict['reasons']:
+                        reject_in_session(db_session, item['id'], worker_id, ",".join(verdict['reasons']), **fields)
+                    else:
+                        advance_in_session(db_session, item['id'], worker_id, EXTRACTED, **fields)
+                db_session.commit()
+            except Exception:
+                db_session.rollback()
+                raise
+
+    def gate(items: list[dict]) -> list:
+        verdicts = quality_filter.evaluate(
+            [item['clean_content'] for item in items],
+            [feeds_by_url.get(item['feed_url'], {}).get('quality_thresholds') for item in items],
+        )
+        write_verdicts(items, verdicts)
+        metrics.incr("quality.checked", len(items))
+        for item, verdict in zip(items, verdicts):
+            if not verdict['reasons']:
+                continue
+            reason = verdict['reasons'][0]
+            rejected[reason] += 1
+            metrics.incr(f"quality.rejected.{reason}")
+            article_logger.warning(
+                f"  - 质量过滤拒绝 [{','.join(verdict['reasons'])}]: {item['url']} "
+                f"(语言 {verdict['language']}，字母占比 {verdict['letter_ratio']:.2f}，数字占比 {verdict['digit_ratio']:.2f}，"
+                f"重复行占比 {verdict['duplicate_line_ratio']:.2f}，付费墙短语 {verdict['paywall_hits']} 处)")
+        return []
+
+    return gate
+
+
+def make_summarizer(worker_id: str, budget: TokenBudget):
+    """在预算内调用AI生成摘要，并作为检查点写回队列 (extracted -> summarized)。"""
+    def summarize(item: dict):
+        if not budget.try_spend(item['estimated_tokens'] or estimate_tokens(item)):
+            # 只跳过这一篇放不下的文章，后面更小的文章仍可使用剩余预算。
+            # 推迟而不是直接释放，避免同一篇文章在本次运行中被反复领取
+            with SessionLocal() as db_session:
+                defer(db_session, item['id'], worker_id,
+                      datetime.now(timezone.utc) + timedelta(seconds=config.WORK_RETRY_DELAY_SECONDS))
+            metrics.incr("budget.skipped")
+            return None
+
+        processed_data = summarize_article(item)
+        with SessionLocal() as db_session:
+            if processed_data is None:
+                fail(db_session, item['id'], worker_id, "AI摘要生成失败")
+                return None
+            summary = processed_data['summary_data']
+            advance(db_session, item['id'], worker_id, SUMMARIZED,
+                    summary_text=summary['summary_text'], model_used=summary['model_used'],
+                    prompt_version=summary['prompt_version'])
+        return None
+
+    return summarize
+
+
+def make_batch_summarizer(budget: TokenBudget, upstream_done: threading.Event, results: list):
+    """
+    批量模式下代替逐篇摘要的阶段: 等提取阶段结束后，把 extracted 状态的文章提交为批量任务，
+    在 BATCH_MAX_WAIT_SECONDS 内轮询并直接批量入库（包括之前的运行提交、尚未取回的任务）。
+    写入的摘要数量追加到 results 中。
     """
-    执行纯粹的数据处理流水线：采集 -> ETL -> 增强 -> 持久化。
+    def summarize_in_batches():
+        upstream_done.wait()
+        with SessionLocal() as db_session:
+            batch_summarizer.submit_pending(db_session, budget)
+            results.append(batch_summarizer.collect(db_session, max_wait=config.BATCH_MAX_WAIT_SECONDS))
+
+    return summarize_in_batches
+
+
+def persist_item(db_session, item: dict, worker_id: str) -> bool:
     """
+    将一条已生成摘要的任务写入摘要表，并在同一个事务中把任务标记为 stored。
+    入库后清空队列行中的正文和摘要，避免与摘要表重复存储。成功写入新摘要时返回 True。
+    """
+    url = item['url']
+    try:
+        new_briefing = BriefingItem(
+            source_url=url,
+            summary_text=item['summary_text'],
+            source_name=item['source_name'],
+            model_used=item['model_used'],
+            prompt_version=item['prompt_version'],
+        )
+        new_briefing.original_content = OriginalContent(content_text=item['clean_content'],
+                                                        html_hash=item.get('html_hash'))
+        db_session.add(new_briefing)
+        if not advance_in_session(db_session, item['id'], worker_id, STORED, clean_content=None, summary_text=None):
+            db_session.rollback()
+            logger.warning(f"任务 #{item['id']} 的租约已失效，放弃入库: {url}")
+            return False
+        db_session.commit()
+        article_logger.info(f"成功存入新摘要: {url}")
+        return True
+    except IntegrityError:
+        db_session.rollback()
+        logger.warning(f"数据库完整性错误，可能文章已存在（并发），已回滚: {url}")
+        advance(db_session, item['id'], worker_id, STORED, clean_content=None, summary_text=None)
+    except Exception as e:
+        db_session.rollback()
+        logger.error(f"存入数据库时发生未知错误: {e}", exc_info=True)
+        fail(db_session, item['id'], worker_id, f"入库失败: {e}")
+    return False
+
+
+# ==============================================================================
+# 流水线主流程 (Pipeline)
+# ==============================================================================
+@with_run_id("pipeline")
+@profiled("data_pipeline")
+def run_data_pipeline(mode: str | None = None, owns_feed=None):
+    """
+    执行纯粹的数据处理流水线，各阶段流式并发运行，并在工作队列中逐条记录检查点:
+    采集RSS -> 去重入队 -> 下载提取正文 -> (按分数、在预算内) AI摘要 -> 持久化。
+    如果上一次运行中途退出，未完成的文章会从它们最后完成的状态继续处理。
+    mode 为摘要模式 ("sync" / "batch")，默认取 config.SUMMARIZE_MODE，见 batch_summarizer.py。
+    owns_feed(url) 用于分片模式 (见 sharding.py)，只采集返回 True 的信源；工作队列中的文章仍由所有进程共同处理。
+    """
+    mode = mode or config.SUMMARIZE_MODE
     logger.info("========================================================")
     logger.info("===== 开始执行'雅典娜'数据处理流水线 =====")
     logger.info("========================================================")
-    
+
+    worker_id = make_worker_id()
+    logger.info(f"工作进程ID: {worker_id}，摘要模式: {mode}")
+    budget = TokenBudget(config.RUN_TOKEN_BUDGET)
+    discovered_done = threading.Event()
+    extracted_done = threading.Event()
+    summarized_done = threading.Event()
+
     db_session = SessionLocal()
     new_items_count = 0
+    batch_stored = []
+    rejected = Counter()
     try:
-        all_articles = []
-        for feed_url in config.RSS_FEEDS:
-            articles_from_feed = fetch_and_clean_articles(
-                feed_url, 
-                max_articles=config.MAX_ARTICLES_PER_FEED
-            )
-            all_articles.extend(articles_from_feed)
-        
-        logger.info(f"所有RSS源处理完毕，共获取到 {len(all_articles)} 篇有效文章。")
-
-        if all_articles:
-            for article in all_articles:
-                exists = db_session.query(BriefingItem).filter(BriefingItem.source_url == article['url']).first()
-                if exists:
-                    logger.info(f"文章已存在于数据库中，跳过: {article['url']}")
-                    continue
-                
-                processed_data = summarize_article(article)
-                
-                if processed_data:
-                    try:
-                        new_briefing = BriefingItem(**processed_data['summary_data'])
-                        new_content = OriginalContent(**processed_data['original_content_data'])
-                        new_briefing.original_content = new_content
-                        db_session.add(new_briefing)
-                        db_session.commit()
-                        new_items_count += 1
-                        logger.info(f"成功存入新摘要: {article['url']}")
-                    except IntegrityError:
-                        db_session.rollback()
-                        logger.warning(f"数据库完整性错误，可能文章已存在（并发），已回滚: {article['url']}")
-                    except Exception as e:
-                        db_session.rollback()
-                        logger.error(f"存入数据库时发生未知错误: {e}", exc_info=True)
+        # --- 读取信源注册表 (一条查询)，只采集启用且到了采集间隔的信源 ---
+        with SessionLocal() as feeds_session:
+            feeds = load_feeds(feeds_session)
+            breakers = HostBreakers(SessionLocal).load(feeds_session)
+        feeds_by_url = {feed['url']: feed for feed in feeds}
+        due_feeds = [feed for feed in feeds if feed['due'] and (owns_feed is None or owns_feed(feed['url']))]
+        logger.info(f"信源注册表中共 {len(feeds)} 个信源，本次采集 {len(due_feeds)} 个。")
+
+        # --- 采集时限: 超时后剩余的信源与文章留到之后的运行，已下载的文章照常摘要入库 ---
+        run_deadline = Deadline(config.RUN_DEADLINE_SECONDS)
+        feed_budgets = FeedTimeBudgets(config.FEED_DEADLINE_SECONDS)
+
+        def extraction_finished():
+            if run_deadline.expired:
+                logger.warning(f"本次运行的采集时限 ({config.RUN_DEADLINE_SECONDS} 秒) 已到，"
+                               f"未采集的信源与文章将在之后的运行中处理。")
+            extracted_done.set()
+
+        # --- 采集并入队 ---
+        feeds_q = make_queue(config.PIPELINE_QUEUE_SIZE)
+        entries_q = make_queue(config.PIPELINE_QUEUE_SIZE)
+        start_source("feeds", lambda: due_feeds, feeds_q)
+        start_map("fetch", make_poller(run_deadline, feed_budgets), feeds_q, entries_q,
+                  workers=config.FETCH_WORKERS, flatten=True)
+        start_batch("discover", discover_entries, entries_q, None,
+                    batch_size=config.ENQUEUE_BATCH_SIZE, max_wait=config.ENQUEUE_MAX_WAIT_SECONDS,
+                    on_done=discovered_done.set)
+
+        # --- 提取正文并过滤低质量页面: discovered -> extracted (或 rejected) ---
+        to_extract_q = make_queue(config.PIPELINE_QUEUE_SIZE)
+        to_filter_q = make_queue(config.PIPELINE_QUEUE_SIZE)
+        start_source("claim-discovered",
+                     lambda: claim_stream(DISCOVERED, worker_id, discovered_done,
+                                          should_stop=lambda: run_deadline.expired),
+                     to_extract_q)
+        start_map("extract", make_extractor(worker_id, feeds_by_url, breakers, run_deadline, feed_budgets),
+                  to_extract_q, to_filter_q, workers=config.EXTRACT_WORKERS)
+        start_batch("quality", make_quality_gate(worker_id, feeds_by_url, rejected), to_filter_q, None,
+                    batch_size=config.QUALITY_BATCH_SIZE, max_wait=config.QUALITY_MAX_WAIT_SECONDS,
+                    on_done=extraction_finished)
+
+        # --- AI摘要: extracted -> summarized，按分数从高到低领取，跳过剩余预算放不下的文章，预算用尽即停止 ---
+        if mode == "batch":
+            # 批量模式直接入库 (extracted -> stored)，URL冲突时才会留下 summarized 检查点交给持久化阶段
+            start_task("summarize-batch", make_batch_summarizer(budget, extracted_done, batch_stored),
+                       on_done=summarized_done.set)
+        else:
+            to_summarize_q = make_queue(config.PIPELINE_QUEUE_SIZE)
+            start_source("claim-extracted",
+                         lambda: claim_stream(EXTRACTED, worker_id, extracted_done, by_score=True,
+                                              should_stop=lambda: budget.exhausted, max_tokens=lambda: budget.remaining),
+                         to_summarize_q)
+            start_map("summarize", make_summarizer(worker_id, budget), to_summarize_q, None,
+                      workers=config.SUMMARIZE_WORKERS, on_done=summarized_done.set)
+
+        # --- 持久化阶段在主线程中运行: summarized -> stored ---
+        to_store_q = make_queue(config.PIPELINE_QUEUE_SIZE)
+        start_source("claim-summarized", lambda: claim_stream(SUMMARIZED, worker_id, summarized_done), to_store_q)
+        for item in drain(to_store_q):
+            with metrics.timed("stage.persist"):
+                stored = persist_item(db_session, item, worker_id)
+            if stored:
+                new_items_count += 1
+        new_items_count += sum(batch_stored)
+
+        if rejected:
+            logger.info(f"质量过滤共拒绝 {sum(rejected.values())} 篇文章，节省同样次数的AI调用: "
+                        f"{', '.join(f'{reason} {count}' for reason, count in rejected.most_common())}")
+        if budget.exhausted or budget.skipped:
+            logger.warning(f"本次运行的token预算不足 ({budget.spent}/{budget.total})，"
+                           f"放不下的文章将在下次运行时处理。")
     except Exception as e:
         logger.critical(f"数据处理流水线执行过程中发生严重错误: {e}", exc_info=True)
     finally:
@@ -70,5 +400,60 @@ def run_data_pipeline():
     logger.info(f"===== '雅典娜'数据处理流水线执行完毕，共存入 {new_items_count} 条新数据 =====")
     logger.info("========================================================\n")
 
+def run_daemon(interval: int, profile: bool | None = None, mode: str | None = None, owns_feed=None):
+    """
+    常驻模式: 每隔 interval 秒执行一轮流水线。每篇摘要完成后立即入库，无需等待整轮结束。
+    收到 SIGINT/SIGTERM 时会在当前这一轮结束后退出；再次收到 SIGINT 则立即中断。
+    """
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        if stop.is_set() and signum == signal.SIGINT:
+            raise KeyboardInterrupt
+        logger.warning("收到退出信号，将在本轮处理结束后退出...")
+        stop.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+    logger.info(f"'雅典娜'数据处理流水线以常驻模式启动，每 {interval} 秒执行一轮。")
+
+    while not stop.is_set():
+        started = time.monotonic()
+        run_data_pipeline(mode, owns_feed, profile=profile)
+        remaining = interval - (time.monotonic() - started)
+        if remaining > 0 and not stop.is_set():
+            logger.info(f"下一轮将在 {remaining:.0f} 秒后开始。")
+            stop.wait(remaining)
+    logger.info("常驻模式已退出。")
+
+def run_worker(interval: int, profile: bool | None = None, mode: str | None = None):
+    """
+    分片工作进程: 在数据库中登记并维持心跳，以常驻模式运行流水线，每轮只采集本进程持有的分片中的信源。
+    可以在一台或多台机器上启动任意多个，进程退出或崩溃后其分片会被其余进程接管。
+    """
+    coordinator = ShardCoordinator(SessionLocal, make_worker_id())
+    logger.info(f"以分片工作进程模式启动: {coordinator.worker_id}，共 {coordinator.shards} 个分片。")
+    coordinator.start()
+    try:
+        run_daemon(interval, profile=profile, mode=mode, owns_feed=coordinator.owns_feed)
+    finally:
+        coordinator.stop()
+
 if __name__ == "__main__":
-    run_data_pipeline()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile", action="store_true",
+                        help="记录本次运行的性能剖析数据 (也可设置环境变量 ATHENA_PROFILE=1)")
+    parser.add_argument("--daemon", action="store_true", help="常驻运行，按固定间隔反复执行流水线")
+    parser.add_argument("--interval", type=int, default=config.DAEMON_INTERVAL_SECONDS,
+                        help=f"常驻模式下两轮之间的间隔秒数 (默认为 {config.DAEMON_INTERVAL_SECONDS})")
+    parser.add_argument("--mode", choices=["sync", "batch"],
+                        help=f"摘要模式: sync 逐篇实时调用，batch 通过 Batch API 批量提交 (默认为 {config.SUMMARIZE_MODE})")
+    parser.add_argument("--worker", action="store_true",
+                        help="以分片工作进程运行（常驻）: 可同时启动多个进程，信源按分片分配给存活的进程")
+    args = parser.parse_args()
+    if args.worker:
+        run_worker(args.interval, profile=args.profile or None, mode=args.mode)
+    elif args.daemon:
+        run_daemon(args.interval, profile=args.profile or None, mode=args.mode)
+    else:
+        run_data_pipeline(args.mode, profile=args.profile or None)
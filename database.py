@@ -1,13 +1,29 @@
 # database.py
 
+import os
+
 # 从 sqlalchemy 导入创建数据库引擎的工具
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 
 # 从我们刚刚编写的 models.py 文件中，导入那个包含了所有表定义的 Base
 from models import Base
+from search import ensure_search_index
 
 # 定义我们的数据库文件路径。'sqlite:///briefings.db' 表示在当前目录下创建一个名为 briefings.db 的SQLite数据库
-DATABASE_URL = "sqlite:///briefings.db"
+# 可以通过环境变量 DATABASE_URL 指向其他数据库（例如基准测试使用的临时数据库）。
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///briefings.db")
+
+# 流水线的多个工作线程（以及多个工作进程）会同时读写同一个SQLite文件。
+# 这里为每个新建立的SQLite连接开启 WAL 模式（读写互不阻塞）并设置忙等待超时，
+# 写入冲突时连接会等待锁释放，而不是立即报 "database is locked"。
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    if type(dbapi_connection).__module__.startswith("sqlite3"):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA busy_timeout=30000")
+        cursor.close()
 
 # 创建一个数据库引擎。引擎是SQLAlchemy与数据库沟通的“翻译官”和“连接器”
 engine = create_engine(DATABASE_URL)
@@ -21,6 +37,8 @@ def create_db_and_tables():
     # SQLAlchemy会找到所有继承自 Base 的类，并根据它们的定义，在数据库中创建相应的表。
     # bind=engine 告诉它要在哪个数据库上执行这个操作。
     Base.metadata.create_all(bind=engine)
+    # FTS5 全文索引是 SQLite 虚拟表，不在 Base 的管理范围内，需要单独创建（含同步触发器）。
+    ensure_search_index(engine)
     print("Database and tables created successfully.")
 
 # 这是Python脚本的一个标准写法。
@@ -1,57 +1,115 @@
 # send_briefing.py
 
+import argparse
 import logging
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from datetime import datetime, timezone
+from datetime import datetime
 
 import config
 from database import DATABASE_URL
-from models import BriefingItem
+from digest import local_zone, window_start, window_label, get_mark, sent_in_window, fetch_new_briefings, advance_mark
 from email_sender import send_briefing_email, RECEIVER_EMAIL
 from templating import create_html_content
-from logger_config import logger
+from embeddings import group_briefings_by_topic
+from profiling import profiled
+from logger_config import logger, with_run_id
 
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def send_todays_briefing():
+def build_groups(db_session, briefings):
     """
-    专门负责查询今日简报并执行发送任务的脚本。
+    根据 config.EMAIL_GROUP_BY 决定邮件的分组方式。
+    返回 None 表示使用模板默认的按来源分组；按话题分组失败时也会安全地退回到按来源分组。
+    """
+    if config.EMAIL_GROUP_BY != "topic":
+        return None
+    try:
+        groups = group_briefings_by_topic(db_session, briefings)
+        logger.info(f"已将 {len(briefings)} 条简报聚合为 {len(groups)} 个话题。")
+        return groups
+    except Exception as e:
+        db_session.rollback()
+        logger.warning(f"按话题分组失败，将退回按来源分组: {e}")
+        return None
+
+def parse_recipients(value: str | None) -> list[str]:
+    """RECEIVER_EMAIL 可以是逗号分隔的多个地址。"""
+    return [address.strip() for address in (value or "").split(",") if address.strip()]
+
+
+def deliver_to(db_session, recipient: str, start: datetime, label: str, force: bool = False) -> int:
+    """
+    为一个收件人发送当前周期的增量简报，返回发送的摘要数量。
+    同一周期内已经发送过时跳过 (force=True 除外)；邮件发送成功后才推进该收件人的水位线。
+    """
+    mark = get_mark(db_session, recipient)
+    if not force and sent_in_window(mark, start):
+        logger.info(f"{recipient}: 本周期 ({label}) 的简报已经发送过，跳过。")
+        return 0
+
+    briefings = fetch_new_briefings(db_session, mark, start, config.DIGEST_MAX_ITEMS)
+    if not briefings:
+        logger.info(f"{recipient}: 没有新的简报内容，无需发送邮件。")
+        return 0
+
+    logger.info(f"{recipient}: 查询到 {len(briefings)} 条新简报，正在生成HTML...")
+    # 查询按ID顺序读取（水位线取最后一条），邮件中仍然最新的排在前面
+    newest_first = briefings[::-1]
+    html_content = create_html_content(newest_first, groups=build_groups(db_session, newest_first), date_label=label)
+    subject = config.EMAIL_SUBJECT_TEMPLATE.format(date=label)
+
+    if not send_briefing_email(recipient, subject, html_content):
+        logger.error(f"{recipient}: 邮件发送失败，水位线保持不变，这些摘要会在下次运行时重新发送。")
+        return 0
+    advance_mark(db_session, recipient, briefings[-1])
+    if len(briefings) == config.DIGEST_MAX_ITEMS:
+        logger.warning(f"{recipient}: 本封简报达到上限 {config.DIGEST_MAX_ITEMS} 条，其余的新摘要留到下一封。")
+    return len(briefings)
+
+
+@with_run_id("delivery")
+@profiled("delivery")
+def send_todays_briefing(force: bool = False):
+    """
+    为每个收件人发送当前简报周期 (config.DIGEST_WINDOW) 的增量简报: 只包含该收件人上次收到之后的新摘要。
+    force=True 时即使本周期已经发送过也会再发送一次（只包含之后的新摘要）。
     """
     logger.info("========================================================")
-    logger.info("===== 开始执行'雅典娜'每日简报发送任务 =====")
+    logger.info("===== 开始执行'雅典娜'简报发送任务 =====")
     logger.info("========================================================")
-    
-    if not RECEIVER_EMAIL:
+
+    recipients = parse_recipients(RECEIVER_EMAIL)
+    if not recipients:
         logger.error("错误: RECEIVER_EMAIL 未在 .env 文件中配置，无法发送邮件。任务终止。")
         return
 
+    start = window_start(datetime.now(local_zone()), config.DIGEST_WINDOW)
+    label = window_label(start, config.DIGEST_WINDOW)
+    logger.info(f"简报周期: {config.DIGEST_WINDOW}，从 {start.isoformat()} 开始。")
+
     db_session = SessionLocal()
     try:
-        today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-        todays_briefings = db_session.query(BriefingItem).filter(BriefingItem.created_at >= today_start).order_by(BriefingItem.created_at.desc()).all()
-
-        if todays_briefings:
-            logger.info(f"查询到 {len(todays_briefings)} 条今日简报，正在生成HTML...")
-            html_content = create_html_content(todays_briefings)
-            
-            today_str_subject = datetime.now(timezone.utc).strftime('%Y年%m月%d日')
-            subject = config.EMAIL_SUBJECT_TEMPLATE.format(date=today_str_subject)
-            
-            send_briefing_email(RECEIVER_EMAIL, subject, html_content)
-        else:
-            logger.info("数据库中没有找到今日的简报内容，无需发送邮件。")
-
-    except Exception as e:
-        logger.critical(f"发送简报邮件过程中发生严重错误: {e}", exc_info=True)
+        for recipient in recipients:
+            try:
+                deliver_to(db_session, recipient, start, label, force=force)
+            except Exception as e:
+                db_session.rollback()
+                logger.critical(f"为 {recipient} 发送简报邮件过程中发生严重错误: {e}", exc_info=True)
     finally:
         db_session.close()
         logger.info("数据库会话已关闭。")
-        
-    logger.info("===== '雅典娜'每日简报发送任务执行完毕 =====")
+
+    logger.info("===== '雅典娜'简报发送任务执行完毕 =====")
     logger.info("========================================================\n")
 
 
 if __name__ == "__main__":
-    send_todays_briefing()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--force", action="store_true",
+                        help="本周期已经发送过时仍然发送（只包含上次发送之后的新摘要）")
+    parser.add_argument("--profile", action="store_true",
+                        help="记录本次运行的性能剖析数据 (也可设置环境变量 ATHENA_PROFILE=1)")
+    args = parser.parse_args()
+    send_todays_briefing(force=args.force, profile=args.profile or None)
@@ -0,0 +1,103 @@
+# digest.py (Version 1.0 - Incremental Digest Windows)
+
+# ==============================================================================
+# 1. 导入工具箱 (Import necessary tools)
+# ==============================================================================
+from datetime import datetime, timedelta, timezone, tzinfo
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select
+
+import config
+from models import BriefingItem, DeliveryMark
+
+# ==============================================================================
+# "雅典娜"增量简报
+#
+# 简报发送不再查询"UTC今天"的全部摘要，而是为每个收件人维护一条高水位线 (delivery_marks 表):
+# - 每次只按主键做 keyset 查询 `id > 水位线 ORDER BY id LIMIT n`，无论历史数据有多少，查询代价只与新摘要数量有关；
+# - 简报周期 (config.DIGEST_WINDOW) 可以是每小时 / 每天 / 每周，周期的边界按收件人所在的时区
+#   (config.DELIVERY_TIMEZONE) 计算，例如北京时间的零点，而不是UTC零点；
+# - 同一周期内已经发送过的收件人默认会被跳过；邮件发送成功后才推进水位线，发送失败的摘要会在下次运行时重新发送。
+# 本模块只负责计算周期与读写水位线，不依赖邮件配置，发送逻辑见 delivery_pipeline.py。
+# ==============================================================================
+
+WINDOWS = ("hourly", "daily", "weekly")
+
+
+# ==============================================================================
+# 2. 简报周期 (Digest Windows)
+# ==============================================================================
+def local_zone() -> tzinfo:
+    """发送简报使用的时区；config.DELIVERY_TIMEZONE 为空时使用服务器本地时区。"""
+    if config.DELIVERY_TIMEZONE:
+        return ZoneInfo(config.DELIVERY_TIMEZONE)
+    return datetime.now().astimezone().tzinfo
+
+
+def window_start(now: datetime, window: str) -> datetime:
+    """
+    返回 now 所在简报周期的起点（与 now 同一时区）。
+    hourly 为整点，daily 为当天零点，weekly 为本周一零点。
+    """
+    if window == "hourly":
+        return now.replace(minute=0, second=0, microsecond=0)
+    day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if window == "daily":
+        return day_start
+    if window == "weekly":
+        return day_start - timedelta(days=day_start.weekday())
+    raise ValueError(f"未知的简报周期 '{window}'，可选: {', '.join(WINDOWS)}。")
+
+
+def window_label(start: datetime, window: str) -> str:
+    """简报周期在邮件标题与正文中显示的日期。"""
+    if window == "hourly":
+        return start.strftime('%Y年%m月%d日 %H:00')
+    if window == "weekly":
+        end = start + timedelta(days=6)
+        return f"{start.strftime('%Y年%m月%d日')} - {end.strftime('%m月%d日')}"
+    return start.strftime('%Y年%m月%d日')
+
+
+def as_utc(value: datetime) -> datetime:
+    """数据库中的时间按UTC保存；SQLite 读回时不带时区信息，视为UTC。"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+# ==============================================================================
+# 3. 水位线 (High-Water Marks)
+# ==============================================================================
+def get_mark(db_session, recipient: str) -> DeliveryMark | None:
+    return db_session.scalar(select(DeliveryMark).where(DeliveryMark.recipient == recipient))
+
+
+def sent_in_window(mark: DeliveryMark | None, start: datetime) -> bool:
+    """该收件人在 start 开始的周期内是否已经收到过简报。"""
+    return mark is not None and mark.last_sent_at is not None and as_utc(mark.last_sent_at) >= as_utc(start)
+
+
+def fetch_new_briefings(db_session, mark: DeliveryMark | None, since: datetime, limit: int) -> list[BriefingItem]:
+    """
+    按ID顺序读取水位线之后的新摘要，最多 limit 条。
+    收件人第一次收到简报时还没有水位线，此时从当前周期的起点 since 开始读取，而不是把全部历史摘要都发出去。
+    """
+    query = select(BriefingItem).order_by(BriefingItem.id).limit(limit)
+    if mark is not None:
+        query = query.where(BriefingItem.id > mark.last_briefing_id)
+    else:
+        query = query.where(BriefingItem.created_at >= as_utc(since))
+    return list(db_session.scalars(query))
+
+
+def advance_mark(db_session, recipient: str, last_item: BriefingItem, sent_at: datetime | None = None) -> DeliveryMark:
+    """邮件发送成功后，把收件人的水位线推进到本次发送的最后一条摘要。"""
+    mark = get_mark(db_session, recipient) or DeliveryMark(recipient=recipient)
+    mark.last_briefing_id = last_item.id
+    mark.last_created_at = last_item.created_at
+    mark.last_sent_at = sent_at or datetime.now(timezone.utc)
+    db_session.add(mark)
+    db_session.commit()
+    return mark
@@ -13,6 +13,7 @@ RECEIVER_EMAIL = os.getenv("RECEIVER_EMAIL")
 SMTP_HOST = os.getenv("SMTP_HOST")
 SMTP_PORT_STR = os.getenv("SMTP_PORT")
 SMTP_SSL_STR = os.getenv("SMTP_SSL")
+SMTP_STARTTLS_STR = os.getenv("SMTP_STARTTLS")
 
 required_configs = {
     "SENDER_EMAIL": SENDER_EMAIL,
@@ -28,12 +29,16 @@ yag = None
 try:
     smtp_port = int(SMTP_PORT_STR)
     smtp_ssl = SMTP_SSL_STR.lower() == 'true' if SMTP_SSL_STR else False
+    # 未配置 SMTP_STARTTLS 时交给 yagmail 决定（非SSL连接默认启用STARTTLS）；
+    # 对于不支持TLS的内网中继或本地测试服务器，可将其设为 False。
+    smtp_starttls = SMTP_STARTTLS_STR.lower() == 'true' if SMTP_STARTTLS_STR else None
     yag = yagmail.SMTP(
         user=SENDER_EMAIL,
         password=SENDER_PASSWORD,
         host=SMTP_HOST,
         port=smtp_port,
-        smtp_ssl=smtp_ssl
+        smtp_ssl=smtp_ssl,
+        smtp_starttls=smtp_starttls
     )
     logger.info(f"邮件客户端初始化成功，连接到 {SMTP_HOST}:{smtp_port}，发件人: {SENDER_EMAIL}")
 except ValueError:
@@ -0,0 +1,358 @@
+# embeddings.py (Version 1.0 - Local Semantic Index)
+
+# ==============================================================================
+# 1. 导入工具箱 (Import necessary tools)
+# ==============================================================================
+import os
+import hashlib
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import func
+
+import config
+from models import BriefingItem, BriefingEmbedding
+from logger_config import logger
+
+# ==============================================================================
+# "雅典娜"语义向量模块
+#
+# 为每条摘要计算一个归一化的 float32 向量，并以二进制形式存放在 briefing_embeddings 表中。
+# - 计算: 支持本地CPU模型 (sentence-transformers) 或兼容OpenAI API的嵌入接口，均按批次调用。
+# - 缓存: 以 (模型, 文本SHA-256) 为键，文本未变化时绝不重复计算。
+# - 检索: 向量已归一化，余弦相似度即点积，使用 NumPy 一次矩阵乘法完成 top-k 检索；
+#   当向量数量超过 config.EMBEDDING_ANN_THRESHOLD 且安装了 hnswlib 时，改用 HNSW 近似索引。
+#   索引在进程内缓存，只有向量发生变化时才重新加载和构建。
+# ==============================================================================
+
+load_dotenv(override=True)
+
+
+# ==============================================================================
+# 2. 向量后端 (Embedding Backends)
+# ==============================================================================
+class LocalEmbedder:
+    """使用 sentence-transformers 在本地CPU上计算向量。"""
+
+    def __init__(self, model_name: str):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise RuntimeError(
+                "本地向量后端需要安装 sentence-transformers: pip install sentence-transformers"
+            ) from e
+        self.model_name = model_name
+        self._model = SentenceTransformer(model_name, device="cpu")
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        return self._model.encode(texts, batch_size=len(texts), convert_to_numpy=True,
+                                  normalize_embeddings=True, show_progress_bar=False)
+
+
+class OpenAIEmbedder:
+    """调用兼容OpenAI API的 /embeddings 接口计算向量。"""
+
+    def __init__(self, model_name: str):
+        from openai import OpenAI
+
+        api_key = os.getenv("EMBEDDING_API_KEY") or os.getenv("OPENAI_API_KEY")
+        base_url = os.getenv("EMBEDDING_API_BASE") or os.getenv("OPENAI_API_BASE")
+        if not api_key:
+            raise ValueError("错误: EMBEDDING_API_KEY 或 OPENAI_API_KEY 未在 .env 文件中找到。")
+
+        client_params = {"api_key": api_key}
+        if base_url: client_params["base_url"] = base_url
+        self.model_name = model_name
+        self._client = OpenAI(**client_params)
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        response = self._client.embeddings.create(model=self.model_name, input=texts)
+        vectors = [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+        return np.asarray(vectors, dtype=np.float32)
+
+
+@lru_cache(maxsize=1)
+def get_embedder():
+    """按 config.EMBEDDING_BACKEND 创建向量后端（进程内只创建一次）。"""
+    backends = {"local": LocalEmbedder, "openai": OpenAIEmbedder}
+    if config.EMBEDDING_BACKEND not in backends:
+        raise ValueError(f"未知的向量后端: '{config.EMBEDDING_BACKEND}'，可选值: {', '.join(backends)}")
+    embedder = backends[config.EMBEDDING_BACKEND](config.EMBEDDING_MODEL)
+    logger.info(f"向量后端已初始化: {config.EMBEDDING_BACKEND} / {config.EMBEDDING_MODEL}")
+    return embedder
+
+
+# ==============================================================================
+# 3. 向量的序列化 (Vector Serialization)
+# ==============================================================================
+def text_hash(text: str) -> str:
+    """计算文本的SHA-256摘要，作为向量缓存的键。"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """将向量（或向量矩阵的每一行）归一化为单位长度的 float32。"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def pack_vector(vector: np.ndarray) -> bytes:
+    """将一个向量编码为紧凑的 float32 二进制。"""
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def unpack_vectors(blobs: list[bytes], dim: int) -> np.ndarray:
+    """将若干个 float32 二进制一次性解码为 (n, dim) 的矩阵，避免逐行拷贝。"""
+    if not blobs:
+        return np.empty((0, dim), dtype=np.float32)
+    return np.frombuffer(b"".join(blobs), dtype=np.float32).reshape(len(blobs), dim)
+
+
+# ==============================================================================
+# 4. 计算并缓存向量 (Compute & Cache Embeddings)
+# ==============================================================================
+def embed_briefings(db_session, items: list[BriefingItem], batch_size: int = None) -> dict[int, np.ndarray]:
+    """
+    确保给定的每条摘要都有与当前模型、当前文本对应的向量，并返回 {briefing_id: 向量}。
+
+    - 已有且未过期的向量直接复用；
+    - 其他摘要中相同文本的向量（例如转载的同一篇文章）会被复制过来；
+    - 只有剩余的文本才会按批次交给向量后端计算。
+    """
+    batch_size = batch_size or config.EMBEDDING_BATCH_SIZE
+    model_name = config.EMBEDDING_MODEL
+    vectors = {}
+    pending = []
+
+    for item in items:
+        digest = text_hash(item.summary_text)
+        existing = item.embedding
+        if existing and existing.model == model_name and existing.text_hash == digest:
+            vectors[item.id] = unpack_vectors([existing.vector], existing.dim)[0]
+        else:
+            pending.append((item, digest))
+
+    if not pending:
+        return vectors
+
+    # --- 复用相同文本已计算过的向量 ---
+    reusable = {
+        row.text_hash: row
+        for row in db_session.query(BriefingEmbedding).filter(
+            BriefingEmbedding.model == model_name,
+            BriefingEmbedding.text_hash.in_({digest for _, digest in pending}),
+        )
+    }
+
+    to_compute = []
+    for item, digest in pending:
+        if digest in reusable:
+            row = reusable[digest]
+            vector = unpack_vectors([row.vector], row.dim)[0]
+            _store_embedding(item, model_name, digest, vector)
+            vectors[item.id] = vector
+        else:
+            to_compute.append((item, digest))
+
+    # --- 按批次计算剩余文本的向量 ---
+    if to_compute:
+        embedder = get_embedder()
+        logger.info(f"需要计算 {len(to_compute)} 条摘要的向量 (已复用 {len(pending) - len(to_compute)} 条)...")
+        for start in range(0, len(to_compute), batch_size):
+            batch = to_compute[start:start + batch_size]
+            batch_vectors = normalize(embedder.embed([item.summary_text for item, _ in batch]))
+            for (item, digest), vector in zip(batch, batch_vectors):
+                _store_embedding(item, model_name, digest, vector)
+                vectors[item.id] = vector
+            db_session.commit()
+
+    db_session.commit()
+    return vectors
+
+
+def _store_embedding(item: BriefingItem, model_name: str, digest: str, vector: np.ndarray):
+    """写入或覆盖一条摘要的向量。"""
+    global _generation
+    _generation += 1
+    if item.embedding is None:
+        item.embedding = BriefingEmbedding()
+    item.embedding.model = model_name
+    item.embedding.text_hash = digest
+    item.embedding.dim = int(vector.shape[0])
+    item.embedding.vector = pack_vector(vector)
+
+
+def embed_missing(db_session, batch_size: int = None) -> int:
+    """为所有缺少向量（或向量已过期）的摘要补算向量，按批次流式处理。返回处理的摘要数量。"""
+    batch_size = batch_size or config.EMBEDDING_BATCH_SIZE
+    processed = 0
+    last_id = 0
+    while True:
+        items = (
+            db_session.query(BriefingItem)
+            .filter(BriefingItem.id > last_id)
+            .order_by(BriefingItem.id)
+            .limit(batch_size * 4)
+            .all()
+        )
+        if not items:
+            break
+        embed_briefings(db_session, items, batch_size=batch_size)
+        processed += len(items)
+        last_id = items[-1].id
+        db_session.expunge_all()
+    return processed
+
+
+# ==============================================================================
+# 5. 相似度检索 (Similarity Search)
+# ==============================================================================
+def top_k(query: np.ndarray, matrix: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    在归一化的向量矩阵中找出与 query 最相似的 k 行。
+    返回 (行下标, 相似度)，按相似度从高到低排序。
+    使用 argpartition 只对前 k 个结果排序，复杂度为 O(n)。
+    """
+    if matrix.shape[0] == 0 or k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    scores = matrix @ np.asarray(query, dtype=np.float32)
+    k = min(k, scores.shape[0])
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    order = candidates[np.argsort(-scores[candidates])]
+    return order, scores[order]
+
+
+class VectorIndex:
+    """
+    一个只读的向量索引。
+    默认使用 NumPy 暴力检索；当向量数量超过阈值且安装了 hnswlib 时，自动构建 HNSW 近似索引。
+    """
+
+    def __init__(self, ids: np.ndarray, matrix: np.ndarray):
+        self.ids = ids
+        self.matrix = matrix
+        self._hnsw = None
+        if len(ids) >= config.EMBEDDING_ANN_THRESHOLD:
+            self._hnsw = self._build_hnsw(matrix)
+
+    @staticmethod
+    def _build_hnsw(matrix: np.ndarray):
+        try:
+            import hnswlib
+        except ImportError:
+            logger.warning("向量数量已超过近似索引阈值，但未安装 hnswlib，将继续使用暴力检索。")
+            return None
+        index = hnswlib.Index(space="ip", dim=matrix.shape[1])
+        index.init_index(max_elements=matrix.shape[0], ef_construction=200, M=16)
+        index.add_items(matrix, np.arange(matrix.shape[0]))
+        index.set_ef(64)
+        return index
+
+    def search(self, query: np.ndarray, k: int) -> list[tuple[int, float]]:
+        """返回 [(briefing_id, 相似度), ...]，按相似度从高到低排序。"""
+        if self._hnsw is not None:
+            labels, distances = self._hnsw.knn_query(query, k=min(k, len(self.ids)))
+            return [(int(self.ids[i]), float(1.0 - d)) for i, d in zip(labels[0], distances[0])]
+        rows, scores = top_k(query, self.matrix, k)
+        return [(int(self.ids[i]), float(s)) for i, s in zip(rows, scores)]
+
+
+def load_index(db_session) -> VectorIndex:
+    """从数据库中一次性加载当前模型的全部向量，构建检索索引。"""
+    rows = (
+        db_session.query(BriefingEmbedding.briefing_id, BriefingEmbedding.dim, BriefingEmbedding.vector)
+        .filter(BriefingEmbedding.model == config.EMBEDDING_MODEL)
+        .order_by(BriefingEmbedding.briefing_id)
+        .all()
+    )
+    if not rows:
+        return VectorIndex(np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32))
+    dim = rows[0].dim
+    ids = np.fromiter((row.briefing_id for row in rows), dtype=np.int64, count=len(rows))
+    matrix = unpack_vectors([row.vector for row in rows], dim)
+    return VectorIndex(ids, matrix)
+
+
+# 进程内缓存的索引、其对应的向量表签名与构建时间。签名取自数据库，其他进程新增的向量也会让缓存失效；
+# _generation 在本进程每次写入向量时递增，使原地覆盖的向量 (行数与最大ID不变) 立即生效，
+# 其他进程原地覆盖的向量则在 EMBEDDING_INDEX_TTL_SECONDS 之后随索引过期重建
+_index_lock = threading.Lock()
+_cached_index: tuple[tuple, float, VectorIndex] | None = None
+_generation = 0
+
+
+def index_signature(db_session) -> tuple:
+    """当前模型的向量表签名: (模型, 向量数量, 最大向量ID, 本进程的写入次数)。"""
+    count, max_id = db_session.query(func.count(BriefingEmbedding.id), func.max(BriefingEmbedding.id)).filter(
+        BriefingEmbedding.model == config.EMBEDDING_MODEL).one()
+    return config.EMBEDDING_MODEL, count, max_id, _generation
+
+
+def cached_index(db_session) -> VectorIndex:
+    """返回缓存的检索索引；向量表签名变化或缓存过期时才重新加载并构建 (HNSW 构建代价较高)。"""
+    global _cached_index
+    with _index_lock:
+        signature = index_signature(db_session)
+        ttl = config.EMBEDDING_INDEX_TTL_SECONDS
+        if (_cached_index is None or _cached_index[0] != signature
+                or (ttl is not None and time.monotonic() - _cached_index[1] >= ttl)):
+            _cached_index = (signature, time.monotonic(), load_index(db_session))
+        return _cached_index[2]
+
+
+def find_related(db_session, briefing_id: int, k: int = 5) -> list[tuple[BriefingItem, float]]:
+    """找出与指定摘要语义最相近的 k 条历史摘要（不含其自身）。"""
+    item = db_session.get(BriefingItem, briefing_id)
+    if item is None:
+        return []
+    query = embed_briefings(db_session, [item])[item.id]
+    hits = [(hit_id, score) for hit_id, score in cached_index(db_session).search(query, k + 1) if hit_id != item.id]
+    hits = hits[:k]
+    items = {row.id: row for row in db_session.query(BriefingItem).filter(BriefingItem.id.in_([h for h, _ in hits]))}
+    return [(items[hit_id], score) for hit_id, score in hits if hit_id in items]
+
+
+# ==============================================================================
+# 6. 话题分组 (Topic Grouping)
+# ==============================================================================
+def group_by_topic(items: list, vectors: np.ndarray, threshold: float = None) -> list[tuple[str, list]]:
+    """
+    按语义相似度对条目进行贪心聚类，返回 [(话题标题, 条目列表), ...]。
+
+    依次处理每个条目: 若与某个已有话题中心的余弦相似度不低于阈值，则并入相似度最高的话题，
+    否则新开一个话题。话题标题取该话题首个条目的信源名称与条目数量。
+    """
+    threshold = config.TOPIC_SIMILARITY_THRESHOLD if threshold is None else threshold
+    vectors = normalize(vectors)
+    centroids = []   # 每个话题的向量之和（未归一化）
+    members = []     # 每个话题包含的条目下标
+
+    for i, vector in enumerate(vectors):
+        if centroids:
+            sims = normalize(np.vstack(centroids)) @ vector
+            best = int(np.argmax(sims))
+            if sims[best] >= threshold:
+                centroids[best] = centroids[best] + vector
+                members[best].append(i)
+                continue
+        centroids.append(vector.copy())
+        members.append([i])
+
+    groups = []
+    for indices in members:
+        group_items = [items[i] for i in indices]
+        title = group_items[0].source_name or "未知来源"
+        if len(group_items) > 1:
+            title = f"{title} 等 · {len(group_items)} 篇相关报道"
+        groups.append((title, group_items))
+    return groups
+
+
+def group_briefings_by_topic(db_session, items: list[BriefingItem]) -> list[tuple[str, list]]:
+    """为给定的摘要补齐向量（优先命中缓存），再按话题分组。"""
+    vectors = embed_briefings(db_session, items)
+    return group_by_topic(items, np.vstack([vectors[item.id] for item in items]))
@@ -0,0 +1,185 @@
+# feed_registry.py (Version 1.0 - Feed Source Registry)
+
+# ==============================================================================
+# 1. 导入工具箱 (Import necessary tools)
+# ==============================================================================
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update, func, case
+
+import config
+from digest import as_utc
+from models import Feed
+from quality_filter import validate_quality_thresholds
+from work_queue import retry_on_lock
+from logger_config import logger
+
+# ==============================================================================
+# "雅典娜"信源注册表
+#
+# RSS源保存在数据库的 feeds 表中，而不是写死在 config.RSS_FEEDS 里，每个信源可以有自己的采集策略:
+# 是否启用、每次最多处理的文章数、正文最小长度、采集间隔、评分权重、正文提取选项以及正文质量过滤的阈值。
+# - 流水线每次运行只用一条查询读取所有信源，得到一份与数据库无关的设置字典列表，各工作线程直接使用；
+# - 每次采集的耗时、条目数和失败原因都记录在该信源的行中 (一条 UPDATE)，`manage.py feeds list` 可以查看；
+# - feeds 表为空时（例如刚升级），会用 config.RSS_FEEDS 初始化一次；没有设置权重的信源沿用 config.SOURCE_WEIGHTS。
+# 通过 `python manage.py feeds add/list/enable/disable/import-opml` 管理信源。
+# ==============================================================================
+
+# 允许写入 extract_options 的 trafilatura.extract 参数
+EXTRACT_OPTIONS = {
+    "favor_precision": bool,
+    "favor_recall": bool,
+    "include_comments": bool,
+    "include_tables": bool,
+    "include_formatting": bool,
+    "include_links": bool,
+    "deduplicate": bool,
+    "target_language": str,
+}
+
+# 采集耗时滑动平均的平滑系数
+LATENCY_EWMA_ALPHA = 0.3
+
+
+# ==============================================================================
+# 2. 读取设置 (Loading Settings)
+# ==============================================================================
+def validate_extract_options(options: dict | None) -> dict | None:
+    """校验正文提取选项，只允许 EXTRACT_OPTIONS 中的参数及其类型。"""
+    if not options:
+        return None
+    for key, value in options.items():
+        expected = EXTRACT_OPTIONS.get(key)
+        if expected is None:
+            raise ValueError(f"未知的正文提取选项 '{key}'，可选: {', '.join(sorted(EXTRACT_OPTIONS))}。")
+        if not isinstance(value, expected):
+            raise ValueError(f"正文提取选项 '{key}' 应为 {expected.__name__} 类型。")
+    return dict(options)
+
+
+def is_due(feed: Feed, now: datetime) -> bool:
+    """该信源距离上次采集是否已经超过了它的采集间隔。"""
+    if not feed.poll_interval_seconds or feed.last_polled_at is None:
+        return True
+    return as_utc(feed.last_polled_at) + timedelta(seconds=feed.poll_interval_seconds) <= now
+
+
+def feed_settings(feed: Feed, now: datetime) -> dict:
+    """把一行信源转换为流水线使用的设置字典，空字段以 config 中的默认值补全。"""
+    return {
+        'id': feed.id,
+        'url': feed.url,
+        'name': feed.name,
+        'enabled': feed.enabled,
+        'due': feed.enabled and is_due(feed, now),
+        'max_articles': feed.max_articles or config.MAX_ARTICLES_PER_FEED,
+        'min_content_length': (feed.min_content_length if feed.min_content_length is not None
+                               else config.MIN_CONTENT_LENGTH),
+        'weight': feed.weight,
+        'extract_options': feed.extract_options or {},
+        'quality_thresholds': feed.quality_thresholds or {},
+    }
+
+
+def seed_from_config(db_session) -> int:
+    """
+    feeds 表为空时，用 config.RSS_FEEDS 初始化。返回写入的数量。
+    导入的信源不设置权重，评分时仍按 config.SOURCE_WEIGHTS 查找 (键可以是RSS链接或信源名称)。
+    """
+    if db_session.scalar(select(func.count(Feed.id))) or not config.RSS_FEEDS:
+        return 0
+    urls = list(dict.fromkeys(config.RSS_FEEDS))
+    db_session.add_all(Feed(url=url) for url in urls)
+    db_session.commit()
+    logger.info(f"信源注册表为空，已从 config.RSS_FEEDS 导入 {len(urls)} 个信源。")
+    return len(urls)
+
+
+def load_feeds(db_session, now: datetime | None = None) -> list[dict]:
+    """用一条查询读取所有信源（包括停用的），返回设置字典列表；'due' 表示本次运行需要采集。"""
+    now = now or datetime.now(timezone.utc)
+    seed_from_config(db_session)
+    return [feed_settings(feed, now) for feed in db_session.scalars(select(Feed).order_by(Feed.id))]
+
+
+# ==============================================================================
+# 3. 采集统计 (Poll Statistics)
+# ==============================================================================
+@retry_on_lock
+def record_poll(db_session, feed_id: int, seconds: float, entry_count: int, error: str | None = None):
+    """用一条 UPDATE 记录一次采集的结果，不需要先读取该行。"""
+    now = datetime.now(timezone.utc)
+    latency_ms = seconds * 1000
+    ok = error is None
+    values = {
+        'poll_count': Feed.poll_count + 1,
+        'last_polled_at': now,
+        'last_entry_count': entry_count,
+        'avg_latency_ms': case(
+            (Feed.avg_latency_ms.is_(None), latency_ms),
+            else_=(1 - LATENCY_EWMA_ALPHA) * Feed.avg_latency_ms + LATENCY_EWMA_ALPHA * latency_ms,
+        ),
+    }
+    if ok:
+        values.update(consecutive_failures=0, last_success_at=now, last_error=None)
+    else:
+        values.update(consecutive_failures=Feed.consecutive_failures + 1,
+                      failure_count=Feed.failure_count + 1, last_error=error[:1000])
+    try:
+        db_session.execute(update(Feed).where(Feed.id == feed_id).values(**values))
+        db_session.commit()
+    except Exception:
+        db_session.rollback()
+        raise
+
+
+# ==============================================================================
+# 4. 管理 (Management)
+# ==============================================================================
+def find_feed(db_session, key: str) -> Feed | None:
+    """按ID或URL查找信源。"""
+    if key.isdigit():
+        return db_session.get(Feed, int(key))
+    return db_session.scalar(select(Feed).where(Feed.url == key))
+
+
+def add_feed(db_session, url: str, **settings) -> tuple[Feed, bool]:
+    """
+    添加一个信源；信源已存在时更新给出的设置（值为 None 的设置保持不变）。
+    返回 (信源, 是否为新建)。
+    """
+    settings = {key: value for key, value in settings.items() if value is not None}
+    if 'extract_options' in settings:
+        settings['extract_options'] = validate_extract_options(settings['extract_options'])
+    if 'quality_thresholds' in settings:
+        settings['quality_thresholds'] = validate_quality_thresholds(settings['quality_thresholds'])
+    feed = db_session.scalar(select(Feed).where(Feed.url == url))
+    created = feed is None
+    if created:
+        feed = Feed(url=url)
+        db_session.add(feed)
+    for key, value in settings.items():
+        setattr(feed, key, value)
+    db_session.commit()
+    return feed, created
+
+
+def parse_opml(path: str) -> list[tuple[str, str | None]]:
+    """读取OPML文件中所有带 xmlUrl 的条目，返回 [(RSS地址, 标题), ...]，保持文件中的顺序并去重。"""
+    feeds = {}
+    for outline in ET.parse(path).iter("outline"):
+        url = (outline.get("xmlUrl") or "").strip()
+        if url and url not in feeds:
+            feeds[url] = outline.get("title") or outline.get("text") or None
+    return list(feeds.items())
+
+
+def import_opml(db_session, path: str) -> tuple[int, int]:
+    """从OPML文件导入信源，已存在的信源保持不变。返回 (新增数量, 跳过数量)。"""
+    entries = parse_opml(path)
+    existing = set(db_session.scalars(select(Feed.url).where(Feed.url.in_([url for url, _ in entries]))))
+    added = [Feed(url=url, name=name) for url, name in entries if url not in existing]
+    db_session.add_all(added)
+    db_session.commit()
+    return len(added), len(entries) - len(added)
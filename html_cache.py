@@ -0,0 +1,157 @@
+# html_cache.py (Version 1.0 - Content-Addressed HTML Snapshot Cache)
+
+# ==============================================================================
+# 1. 导入工具箱 (Import necessary tools)
+# ==============================================================================
+import gzip
+import hashlib
+import os
+import tempfile
+import threading
+
+import config
+from logger_config import logger
+
+# ==============================================================================
+# "雅典娜"网页快照缓存 (可选，config.HTML_CACHE_DIR)
+#
+# 下载的网页HTML在提取正文后原本就被丢弃了，调整提取参数或最小长度时只能重新下载。
+# 开启缓存后，每个下载的网页都以 gzip 压缩保存在磁盘上:
+# - 按内容寻址: 文件名是HTML内容的 SHA-256，相同的网页只保存一份；原文表 (original_contents.html_hash)
+#   记录每篇文章对应的快照，`python manage.py reextract` 据此离线重新提取正文 (见 reextract.py)；
+# - 目录按哈希的前两位分为 256 个子目录，避免单个目录中的文件过多；写入先写临时文件再原子改名，
+#   多个线程或进程同时写入同一个快照也是安全的；
+# - 按总大小做 LRU 淘汰: 读取时刷新文件的修改时间，总大小超过 HTML_CACHE_MAX_BYTES 时，
+#   从最久未使用的快照开始删除，直到降到上限的 90%。被淘汰的快照在重新提取时会被跳过。
+# ==============================================================================
+
+SUFFIX = ".html.gz"
+
+# 触发淘汰后，删除到上限的这个比例为止，避免每次写入都触发一次目录扫描
+EVICT_TO_RATIO = 0.9
+
+
+def content_hash(html: str) -> str:
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+class HtmlCache:
+    """一个目录中的网页快照集合。"""
+
+    def __init__(self, directory: str, max_bytes: int | None = None, compression_level: int | None = None):
+        self.directory = directory
+        self.max_bytes = max_bytes if max_bytes is not None else config.HTML_CACHE_MAX_BYTES
+        self.compression_level = compression_level or config.HTML_CACHE_COMPRESSION_LEVEL
+        self._lock = threading.Lock()
+        # 缓存的总大小（字节），第一次写入时扫描目录得到，之后按写入量累加；淘汰时重新扫描校正
+        self._size = None
+
+    def path_for(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest + SUFFIX)
+
+    # --- 读写 ---
+    def put(self, html: str) -> str:
+        """保存一个网页快照，返回它的内容哈希。已存在的快照只刷新使用时间。"""
+        digest = content_hash(html)
+        path = self.path_for(digest)
+        if os.path.exists(path):
+            self._touch(path)
+            return digest
+
+        data = gzip.compress(html.encode("utf-8"), compresslevel=self.compression_level)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+        return digest
+
+    def get(self, digest: str) -> str | None:
+        """读取一个快照；不存在（例如已被淘汰）时返回 None。"""
+        path = self.path_for(digest)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        self._touch(path)
+        return gzip.decompress(data).decode("utf-8")
+
+    @staticmethod
+    def _touch(path: str):
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+    # --- 淘汰 ---
+    def _entries(self) -> list[tuple[float, int, str]]:
+        """返回所有快照的 (修改时间, 大小, 路径)。"""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(SUFFIX):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        """从最久未使用的快照开始删除，直到总大小降到上限的 EVICT_TO_RATIO。调用方持有锁。"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICT_TO_RATIO
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        self._size = total
+        if removed:
+            logger.info(f"网页快照缓存超过上限，已淘汰 {removed} 个最久未使用的快照，当前 {total / 1024 / 1024:.1f} MB。")
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        return {'files': len(entries), 'bytes': sum(size for _, size, _ in entries), 'max_bytes': self.max_bytes}
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> HtmlCache | None:
+    """按 config.HTML_CACHE_DIR 返回进程内共享的缓存；未开启缓存时返回 None。"""
+    global _default_cache
+    if not config.HTML_CACHE_DIR:
+        return None
+    with _default_lock:
+        if _default_cache is None or _default_cache.directory != config.HTML_CACHE_DIR:
+            _default_cache = HtmlCache(config.HTML_CACHE_DIR)
+        return _default_cache
@@ -1,24 +1,142 @@
-# logger_config.py (Version 1.2 - Refined Comments Final Edition)
+# logger_config.py (Version 2.0 - Non-blocking Queue Logging)
 
+import atexit
+import copy
+import functools
+import json
 import logging
-from logging.handlers import TimedRotatingFileHandler
+import queue
+import random
 import sys
 import os
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+
+import config
 
 # ==============================================================================
 # "雅典娜"项目全局日志配置中心
 #
 # 通过在项目启动时最先导入此模块，确保所有后续模块共享同一个、
 # 经过完整配置的logger实例。
+#
+# 非阻塞设计: 根logger上只挂一个 QueueHandler，业务线程记录日志时只是把记录放进内存队列；
+# 真正的控制台与文件输出由后台的 QueueListener 线程完成，多个工作线程不会再因为写文件而互相排队。
+# 进程退出时 QueueListener 会被停止，队列中剩余的日志会全部写出。
+#
+# 此外:
+# - 每条日志都带有本次运行的关联ID (run_id)，方便在同一个日志文件中区分不同的运行；
+# - config.LOG_FORMAT = "json" 时输出每行一个JSON对象，便于日志系统采集；
+# - 逐篇文章的详细日志统一记录到 article_logger，可以通过 config.ARTICLE_LOG_LEVEL
+#   单独调整级别，或通过 config.ARTICLE_LOG_SAMPLE_RATE 按比例抽样。
+# ==============================================================================
+
+LOG_DIR = "logs"
+LOG_FILE = os.path.join(LOG_DIR, "athena.log")
+TEXT_FORMAT = '%(asctime)s - %(run_id)s - %(name)s - %(levelname)s - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 当前运行的关联ID。一个进程同一时间只执行一次流水线，且各阶段的工作线程都属于这次运行，
+# 因此用进程级变量而不是 contextvars（新线程不会继承调用方的 context）。
+# 入口函数之外的日志（例如 manage.py 的命令）使用进程级的默认ID。
+_run_id = f"proc-{uuid.uuid4().hex[:8]}"
+_listener = None
+
+
+# ==============================================================================
+# 1. 关联ID (Correlation IDs)
+# ==============================================================================
+def get_run_id() -> str:
+    return _run_id
+
+
+def with_run_id(prefix: str):
+    """装饰器: 在函数执行期间生成并设置一个新的运行关联ID，结束后恢复原值。"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            global _run_id
+            previous = _run_id
+            _run_id = f"{prefix}-{uuid.uuid4().hex[:8]}"
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _run_id = previous
+        return wrapper
+    return decorator
+
+
+class RunIdFilter(logging.Filter):
+    """为每条日志记录附加 run_id 字段。挂在 QueueHandler 上，所有子logger的记录都会经过。"""
+
+    def filter(self, record):
+        record.run_id = _run_id
+        return True
+
+
+class SampleFilter(logging.Filter):
+    """按比例抽样 INFO 及以下级别的日志，WARNING 及以上级别总是保留。"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or self.rate >= 1 or random.random() < self.rate
+
+
+# ==============================================================================
+# 2. 输出格式 (Formatters)
 # ==============================================================================
+class JsonFormatter(logging.Formatter):
+    """每条日志输出为一行JSON。"""
 
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'run_id': getattr(record, 'run_id', '-'),
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_text:
+            payload['exc_info'] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False)
+
+
+def make_formatter(fmt: str) -> logging.Formatter:
+    if fmt == "json":
+        return JsonFormatter()
+    return logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT)
+
+
+class _QueueHandler(QueueHandler):
+    """
+    标准的 QueueHandler 会在业务线程中把整条日志格式化成字符串，这里只做必须在当前线程完成的部分:
+    合并消息参数、把异常堆栈渲染为文本（traceback 对象不能跨线程保留），其余格式化交给后台线程。
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+# ==============================================================================
+# 3. 初始化 (Setup)
+# ==============================================================================
 def setup_logger():
     """
     配置并返回一个全局的根logger实例。
     该函数会自动检查并创建日志目录，并设置日志同时输出到控制台和文件。
     """
-    LOG_DIR = "logs"
-    LOG_FILE = os.path.join(LOG_DIR, "athena.log")
+    global _listener
 
     # 核心健壮性设计：确保日志目录存在。
     # 这是为了让项目在被克隆到一个新环境后，首次运行时能自动创建所需目录。
@@ -29,25 +147,20 @@ def setup_logger():
         except OSError as e:
             print(f"FATAL: 无法创建日志目录 '{LOG_DIR}'. 错误原因: {e}")
             sys.exit(1)
-            
+
     # 获取根logger，以便所有子模块的logger都能继承此配置。
     logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
+    logger.setLevel(getattr(logging, config.LOG_LEVEL, logging.INFO))
 
     # 防止因重复导入而多次添加handler，导致日志重复输出。
     if logger.hasHandlers():
         return logger
 
-    # 定义统一的日志格式。
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    formatter = make_formatter(config.LOG_FORMAT)
 
     # --- 配置控制台输出 ---
     stream_handler = logging.StreamHandler(sys.stdout)
     stream_handler.setFormatter(formatter)
-    logger.addHandler(stream_handler)
 
     # --- 配置文件输出，并实现按日轮换 ---
     # TimedRotatingFileHandler能够自动管理日志文件，防止单个文件无限增大。
@@ -58,11 +171,35 @@ def setup_logger():
         encoding='utf-8'
     )
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
-    
+
+    # --- 业务线程只负责入队，由后台线程统一输出 ---
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(RunIdFilter())
+    logger.addHandler(queue_handler)
+
+    _listener = QueueListener(log_queue, stream_handler, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
     logger.info(f"日志系统初始化成功，输出至控制台和 '{LOG_FILE}'。")
 
     return logger
 
+
+def setup_article_logger() -> logging.Logger:
+    """
+    逐篇文章的详细日志使用的子logger，级别与抽样比例可单独配置。
+    未配置 ARTICLE_LOG_LEVEL 时级别为 NOTSET，沿用根logger的级别 (LOG_LEVEL)。
+    """
+    article = logging.getLogger("athena.article")
+    level = config.ARTICLE_LOG_LEVEL
+    article.setLevel(getattr(logging, level, logging.NOTSET) if level else logging.NOTSET)
+    if not any(isinstance(f, SampleFilter) for f in article.filters):
+        article.addFilter(SampleFilter(config.ARTICLE_LOG_SAMPLE_RATE))
+    return article
+
+
 # 在模块导入时立即执行配置，生成全局唯一的logger实例。
-logger = setup_logger()
\ No newline at end of file
+logger = setup_logger()
+article_logger = setup_article_logger()
@@ -6,8 +6,19 @@ from sqlalchemy import create_engine, inspect
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime, timedelta, timezone
 
+import config
 from database import DATABASE_URL
-from models import Base, BriefingItem, OriginalContent
+from models import Base, BriefingItem, OriginalContent, SummaryBatch, DeliveryMark, Feed
+from embeddings import embed_missing, find_related
+from work_queue import queue_stats, rejection_stats, release_all_leases, retry_failed, purge_stored, ALL_STATES
+from profiling import load_summaries, aggregate
+from search import ensure_search_index, rebuild_search_index, drop_search_index, search_briefings
+from resummarize import run_resummarize
+from feed_registry import add_feed, find_feed, import_opml, seed_from_config, validate_extract_options
+from sharding import cluster_status
+from circuit_breaker import breaker_status, reset_breaker, OPEN, HALF_OPEN
+from html_cache import HtmlCache
+from reextract import run_reextract
 from logger_config import logger
 
 # ==============================================================================
@@ -105,13 +116,400 @@ def db_reset():
         
     try:
         logger.info("正在删除所有表...")
+        drop_search_index(engine)
         Base.metadata.drop_all(bind=engine)
         logger.info("正在重建所有表...")
         Base.metadata.create_all(bind=engine)
+        ensure_search_index(engine)
         logger.info("数据库已成功重置。")
     except Exception as e:
         logger.error(f"重置数据库时发生错误: {e}")
 
+def parse_date(value: str) -> datetime:
+    """argparse 的日期类型转换器，接受 YYYY-MM-DD 格式。"""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的日期 '{value}'，请使用 YYYY-MM-DD 格式。")
+
+def search(query: str, source: str = None, since: datetime = None, until: datetime = None,
+           limit: int = 20, rebuild: bool = False):
+    """在摘要和原文中进行全文检索，并按相关度输出结果。"""
+    try:
+        ensure_search_index(engine)
+        if rebuild:
+            count = rebuild_search_index(engine)
+            logger.info(f"全文索引已重建，共 {count} 条记录。")
+        if not query:
+            return
+
+        # --until 是包含当天的，因此查询时取次日零点作为上界
+        until_exclusive = until + timedelta(days=1) if until else None
+        with engine.connect() as conn:
+            results = search_briefings(conn, query, source=source, since=since,
+                                       until=until_exclusive, limit=limit)
+
+        if not results:
+            logger.info(f"没有找到与 '{query}' 匹配的简报。")
+            return
+
+        logger.info(f"--- 找到 {len(results)} 条与 '{query}' 相关的简报 ---")
+        for i, row in enumerate(results, start=1):
+            created_at = str(row['created_at'])[:16]
+            logger.info(f"[{i}] #{row['id']} {created_at} | {row['source_name']} | score={row['score']:.2f}")
+            logger.info(f"    {row['snippet']}")
+            logger.info(f"    {row['source_url']}")
+    except Exception as e:
+        logger.error(f"全文检索时发生错误: {e}")
+
+def embeddings_build(batch_size: int = None):
+    """为所有缺少向量（或向量已过期）的摘要批量计算向量。"""
+    logger.info("--- 正在为摘要补算语义向量 ---")
+    db_session = SessionLocal()
+    try:
+        count = embed_missing(db_session, batch_size=batch_size)
+        logger.info(f"向量检查完毕，共检查了 {count} 条摘要。")
+    except Exception as e:
+        logger.error(f"计算向量时发生错误: {e}")
+        db_session.rollback()
+    finally:
+        db_session.close()
+
+def embeddings_related(briefing_id: int, k: int = 5):
+    """列出与指定摘要语义最相近的历史摘要。"""
+    db_session = SessionLocal()
+    try:
+        related = find_related(db_session, briefing_id, k=k)
+        if not related:
+            logger.info(f"没有找到与 #{briefing_id} 相关的简报（或该简报不存在）。")
+            return
+        logger.info(f"--- 与 #{briefing_id} 最相关的 {len(related)} 条简报 ---")
+        for item, score in related:
+            created_at = str(item.created_at)[:16]
+            logger.info(f"#{item.id} {created_at} | {item.source_name} | 相似度={score:.3f}")
+            logger.info(f"    {item.summary_text[:80]}")
+    except Exception as e:
+        logger.error(f"检索相关简报时发生错误: {e}")
+        db_session.rollback()
+    finally:
+        db_session.close()
+
+def queue_status():
+    """显示工作队列中各状态的任务数量。"""
+    db_session = SessionLocal()
+    try:
+        stats = queue_stats(db_session)
+        logger.info("--- 工作队列状态 ---")
+        for state in ALL_STATES:
+            logger.info(f"{state:>12}: {stats.get(state, 0)}")
+        rejections = rejection_stats(db_session)
+        if rejections:
+            logger.info("--- 质量过滤拒绝原因 (每篇节省一次AI调用) ---")
+            for reason, count in sorted(rejections.items(), key=lambda item: -item[1]):
+                logger.info(f"{reason:>16}: {count}")
+    except Exception as e:
+        logger.error(f"读取工作队列时发生错误: {e}")
+    finally:
+        db_session.close()
+
+def queue_release():
+    """强制释放所有未完成任务的租约。"""
+    logger.warning("请确认当前没有正在运行的数据处理流水线，否则可能导致文章被重复处理。")
+    confirm = input("您确定要继续吗？ (yes/no): ")
+    if confirm.lower() != 'yes':
+        logger.info("操作已取消。")
+        return
+    db_session = SessionLocal()
+    try:
+        logger.info(f"已释放 {release_all_leases(db_session)} 个任务的租约。")
+    finally:
+        db_session.close()
+
+def queue_retry():
+    """将所有失败的任务重新放回队列。"""
+    db_session = SessionLocal()
+    try:
+        logger.info(f"已将 {retry_failed(db_session)} 个失败的任务重新放回队列。")
+    finally:
+        db_session.close()
+
+def queue_purge(days: int):
+    """删除指定天数之前已经入库的队列记录。"""
+    cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
+    db_session = SessionLocal()
+    try:
+        logger.info(f"已删除 {purge_stored(db_session, cutoff_date)} 条已入库的队列记录。")
+    finally:
+        db_session.close()
+
+def batch_status(limit: int = 20):
+    """列出最近提交的批量摘要任务及其状态。"""
+    db_session = SessionLocal()
+    try:
+        batches = db_session.query(SummaryBatch).order_by(SummaryBatch.id.desc()).limit(limit).all()
+        if not batches:
+            logger.info("还没有提交过批量摘要任务。")
+            return
+        logger.info(f"--- 最近 {len(batches)} 个批量摘要任务 ---")
+        for batch in batches:
+            ingested = str(batch.ingested_at)[:16] if batch.ingested_at else "待取回"
+            logger.info(f"{batch.batch_id} | {str(batch.created_at)[:16]} | {batch.endpoint} ({batch.model}) | "
+                        f"{batch.request_count} 篇 | {batch.status} | 结果: {ingested}")
+    except Exception as e:
+        logger.error(f"读取批量任务时发生错误: {e}")
+    finally:
+        db_session.close()
+
+def batch_collect(wait: int = 0):
+    """检查所有尚未取回结果的批量任务，取回已完成的任务并入库。"""
+    # 批量模块依赖模型端点配置 (.env)，只在执行该命令时才加载，其余管理命令不受影响
+    from batch_summarizer import collect
+    db_session = SessionLocal()
+    try:
+        logger.info(f"批量任务检查完毕，共入库 {collect(db_session, max_wait=wait)} 条新摘要。")
+    except Exception as e:
+        logger.error(f"取回批量任务结果时发生错误: {e}")
+        db_session.rollback()
+    finally:
+        db_session.close()
+
+def parse_option(value: str) -> tuple[str, object]:
+    """解析 KEY=VALUE 形式的选项（正文提取选项、质量阈值），true/false 转换为布尔值。"""
+    key, sep, raw = value.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"选项格式应为 KEY=VALUE: {value}")
+    lowered = raw.strip().lower()
+    return key.strip(), (lowered == "true") if lowered in ("true", "false") else raw.strip()
+
+def feeds_add(url: str, name: str = None, max_articles: int = None, min_length: int = None,
+              interval: int = None, weight: float = None, options: list = None, quality: list = None):
+    """添加信源，或更新已有信源的设置。"""
+    db_session = SessionLocal()
+    try:
+        seed_from_config(db_session)
+        feed, created = add_feed(db_session, url, name=name, max_articles=max_articles,
+                                 min_content_length=min_length, poll_interval_seconds=interval,
+                                 weight=weight, extract_options=dict(options) if options else None,
+                                 quality_thresholds=dict(quality) if quality else None)
+        logger.info(f"{'已添加' if created else '已更新'}信源 #{feed.id}: {feed.url}")
+    except Exception as e:
+        logger.error(f"添加信源时发生错误: {e}")
+        db_session.rollback()
+    finally:
+        db_session.close()
+
+def feeds_list():
+    """列出所有信源及其设置与采集统计。"""
+    db_session = SessionLocal()
+    try:
+        seed_from_config(db_session)
+        feeds = db_session.query(Feed).order_by(Feed.id).all()
+        if not feeds:
+            logger.info("信源注册表为空，请使用 'feeds add' 或 'feeds import-opml' 添加信源。")
+            return
+        logger.info(f"--- 共 {len(feeds)} 个信源 ---")
+        for feed in feeds:
+            settings = [f"权重 {feed.weight:g}" if feed.weight is not None else "权重 (按配置)"]
+            if feed.max_articles:
+                settings.append(f"每次 {feed.max_articles} 篇")
+            if feed.min_content_length is not None:
+                settings.append(f"最短 {feed.min_content_length} 字")
+            if feed.poll_interval_seconds:
+                settings.append(f"间隔 {feed.poll_interval_seconds}s")
+            if feed.extract_options:
+                settings.append(f"提取选项 {feed.extract_options}")
+            if feed.quality_thresholds:
+                settings.append(f"质量阈值 {feed.quality_thresholds}")
+            latency = f"{feed.avg_latency_ms:.0f}ms" if feed.avg_latency_ms is not None else "-"
+            logger.info(f"#{feed.id} [{'启用' if feed.enabled else '停用'}] {feed.name or feed.url} | "
+                        f"{', '.join(settings)} | 采集 {feed.poll_count} 次，失败 {feed.failure_count} 次"
+                        f" (连续 {feed.consecutive_failures})，平均耗时 {latency}，"
+                        f"最近采集: {str(feed.last_polled_at)[:16] if feed.last_polled_at else '从未'}")
+            if feed.last_error:
+                logger.info(f"    最近一次错误: {feed.last_error[:200]}")
+    except Exception as e:
+        logger.error(f"读取信源时发生错误: {e}")
+    finally:
+        db_session.close()
+
+def feeds_set_enabled(key: str, enabled: bool):
+    """启用或停用一个信源（按ID或URL）。"""
+    db_session = SessionLocal()
+    try:
+        feed = find_feed(db_session, key)
+        if feed is None:
+            logger.error(f"没有找到信源: {key}")
+            return
+        feed.enabled = enabled
+        db_session.commit()
+        logger.info(f"已{'启用' if enabled else '停用'}信源 #{feed.id}: {feed.url}")
+    except Exception as e:
+        logger.error(f"修改信源时发生错误: {e}")
+        db_session.rollback()
+    finally:
+        db_session.close()
+
+def feeds_import_opml(path: str):
+    """从OPML文件批量导入信源。"""
+    db_session = SessionLocal()
+    try:
+        seed_from_config(db_session)
+        added, skipped = import_opml(db_session, path)
+        logger.info(f"OPML导入完成: 新增 {added} 个信源，{skipped} 个已存在。")
+    except Exception as e:
+        logger.error(f"导入OPML时发生错误: {e}")
+        db_session.rollback()
+    finally:
+        db_session.close()
+
+def workers_status():
+    """列出分片采集模式下登记的工作进程及其持有的分片数量。"""
+    db_session = SessionLocal()
+    try:
+        nodes = cluster_status(db_session)
+        if not nodes:
+            logger.info("当前没有登记的分片工作进程。")
+            return
+        logger.info(f"--- 分片工作进程 (共 {config.FEED_SHARDS} 个分片) ---")
+        for node in nodes:
+            logger.info(f"{node['worker_id']} | {'存活' if node['alive'] else '已失联'} | 持有 {node['shards']} 个分片 | "
+                        f"启动于 {str(node['started_at'])[:19]} | 最近心跳 {str(node['heartbeat_at'])[:19]}")
+    except Exception as e:
+        logger.error(f"读取工作进程状态时发生错误: {e}")
+    finally:
+        db_session.close()
+
+def hosts_status():
+    """列出下载失败过的网站及其熔断状态。"""
+    db_session = SessionLocal()
+    try:
+        hosts = breaker_status(db_session)
+        if not hosts:
+            logger.info("没有下载失败过的网站。")
+            return
+        labels = {OPEN: "熔断中", HALF_OPEN: "待试探"}
+        logger.info(f"--- 网站熔断状态 (连续失败 {config.HOST_FAILURE_THRESHOLD} 次熔断，"
+                    f"冷却 {config.HOST_COOLDOWN_SECONDS} 秒) ---")
+        for host in hosts:
+            line = (f"{host['host']} | {labels.get(host['state'], '正常')} | 连续失败 {host['consecutive_failures']} 次，"
+                    f"累计 {host['failure_count']} 次，熔断 {host['trip_count']} 次")
+            if host['state'] == OPEN:
+                line += f" | 冷却至 {str(host['opened_until'])[:19]}"
+            logger.info(line)
+            if host['last_error']:
+                logger.info(f"    最近一次错误 ({str(host['last_failure_at'])[:16]}): {host['last_error'][:200]}")
+    except Exception as e:
+        logger.error(f"读取网站熔断状态时发生错误: {e}")
+    finally:
+        db_session.close()
+
+def hosts_reset(host: str):
+    """手动解除一个网站的熔断，下次运行时立即恢复下载（已推迟的文章仍需等到原定时间才会被领取）。"""
+    db_session = SessionLocal()
+    try:
+        if reset_breaker(db_session, host):
+            logger.info(f"已解除网站 {host} 的熔断。")
+        else:
+            logger.info(f"没有找到网站 {host} 的失败记录。")
+    except Exception as e:
+        logger.error(f"解除熔断时发生错误: {e}")
+        db_session.rollback()
+    finally:
+        db_session.close()
+
+def delivery_status():
+    """列出每个收件人的简报发送进度（高水位线）。"""
+    db_session = SessionLocal()
+    try:
+        marks = db_session.query(DeliveryMark).order_by(DeliveryMark.recipient).all()
+        if not marks:
+            logger.info("还没有发送过简报。")
+            return
+        latest_id = db_session.query(BriefingItem.id).order_by(BriefingItem.id.desc()).limit(1).scalar() or 0
+        logger.info("--- 简报发送进度 ---")
+        for mark in marks:
+            pending = db_session.query(BriefingItem).filter(BriefingItem.id > mark.last_briefing_id).count()
+            logger.info(f"{mark.recipient} | 已发送到摘要 #{mark.last_briefing_id} (最新 #{latest_id}) | "
+                        f"待发送 {pending} 条 | 最近发送: {str(mark.last_sent_at)[:16]}")
+    except Exception as e:
+        logger.error(f"读取发送进度时发生错误: {e}")
+    finally:
+        db_session.close()
+
+def delivery_reset(recipient: str):
+    """删除收件人的发送进度，下次发送时从当前简报周期的起点重新开始。"""
+    db_session = SessionLocal()
+    try:
+        deleted = db_session.query(DeliveryMark).filter(DeliveryMark.recipient == recipient).delete()
+        db_session.commit()
+        if deleted:
+            logger.info(f"已重置 {recipient} 的发送进度。")
+        else:
+            logger.info(f"没有找到 {recipient} 的发送进度。")
+    except Exception as e:
+        logger.error(f"重置发送进度时发生错误: {e}")
+        db_session.rollback()
+    finally:
+        db_session.close()
+
+def resummarize(since: datetime = None, until: datetime = None, source: str = None, model: str = None,
+                limit: int = None, activate: bool = False):
+    """根据已保存的原文，用当前的Prompt与模型池重新生成摘要。"""
+    # ai_core 依赖模型端点配置 (.env)，只在执行该命令时才加载，其余管理命令不受影响
+    from ai_core import summarize_article, router, SUMMARY_PROMPT
+    try:
+        # --until 是包含当天的，因此查询时取次日零点作为上界
+        until_exclusive = until + timedelta(days=1) if until else None
+        run_resummarize(SessionLocal, summarize_article, SUMMARY_PROMPT.version,
+                        sorted({endpoint.model for endpoint in router.endpoints}),
+                        activate=activate, limit=limit,
+                        since=since, until=until_exclusive, source=source, model=model)
+    except Exception as e:
+        logger.error(f"重新生成摘要时发生错误: {e}", exc_info=True)
+
+def reextract(since: datetime = None, until: datetime = None, source: str = None, min_length: int = None,
+              options: list = None, workers: int = None, dry_run: bool = False):
+    """根据网页快照缓存，离线重新提取原文表中的正文。"""
+    if not config.HTML_CACHE_DIR:
+        logger.error("未开启网页快照缓存 (config.HTML_CACHE_DIR)，没有可用于重新提取的快照。")
+        return
+    try:
+        extract_options = validate_extract_options(dict(options)) if options else None
+        stats = HtmlCache(config.HTML_CACHE_DIR).stats()
+        logger.info(f"网页快照缓存: {stats['files']} 个快照，{stats['bytes'] / 1024 / 1024:.1f} MB "
+                    f"(上限 {stats['max_bytes'] / 1024 / 1024:.0f} MB)。")
+        until_exclusive = until + timedelta(days=1) if until else None
+        run_reextract(SessionLocal, config.HTML_CACHE_DIR, min_length=min_length, options=extract_options,
+                      workers=workers, dry_run=dry_run, since=since, until=until_exclusive, source=source)
+    except Exception as e:
+        logger.error(f"重新提取正文时发生错误: {e}", exc_info=True)
+
+def profile_show(last: int = 5, top: int = 15, task: str = None):
+    """汇总最近几次运行的性能剖析结果: 热点函数与内存分配位置。"""
+    summaries = load_summaries(last, task=task)
+    if not summaries:
+        logger.info("没有找到性能剖析结果。请使用 --profile 或 ATHENA_PROFILE=1 运行流水线。")
+        return
+
+    logger.info(f"--- 最近 {len(summaries)} 次剖析运行 ---")
+    for summary in summaries:
+        logger.info(f"{summary['run_id']}: 耗时 {summary['duration_seconds']:.1f}s，"
+                    f"tracemalloc 峰值 {summary['traced_peak_mb']:.1f} MB")
+        idle = ", ".join(f"{name}={seconds:.1f}s" for name, seconds in sorted(summary.get('idle_seconds', {}).items()))
+        if idle:
+            logger.info(f"    各阶段空闲等待: {idle}")
+        for name, t in sorted(summary.get('timings', {}).items()):
+            logger.info(f"    {name:<22} 次数={t['count']:<6} p50={t['p50'] * 1000:.1f}ms p90={t['p90'] * 1000:.1f}ms")
+
+    result = aggregate(summaries, top)
+    logger.info(f"--- 热点函数 (按自身耗时累计，前 {top}) ---")
+    for row in result['functions']:
+        logger.info(f"{row['tottime']:>9.3f}s 自身 {row['cumtime']:>9.3f}s 累计 {row['ncalls']:>9} 次 "
+                    f"[{row['stage']}] {row['function']}")
+    logger.info(f"--- 内存分配位置 (内存峰值时刻，前 {top}) ---")
+    for row in result['allocations']:
+        logger.info(f"{row['size_kb'] / 1024:>9.2f} MB  {row['site']}  (出现在 {row['runs']} 次运行中)")
+
 # ==============================================================================
 # --- 主程序入口：解析命令行参数 ---
 # ==============================================================================
@@ -134,6 +532,115 @@ if __name__ == "__main__":
     # 定义 'db reset' 命令
     db_reset_parser = db_subparsers.add_parser("reset", help="重置整个数据库（删除所有数据）")
 
+    # 创建 'search' 子命令的解析器
+    search_parser = subparsers.add_parser("search", help="全文检索历史简报与原文")
+    search_parser.add_argument("query", nargs="?", default="", help="检索词，多个词之间以空格分隔（AND关系）")
+    search_parser.add_argument("--source", help="只检索指定信源名称的简报")
+    search_parser.add_argument("--since", type=parse_date, help="起始日期 (YYYY-MM-DD，包含)")
+    search_parser.add_argument("--until", type=parse_date, help="结束日期 (YYYY-MM-DD，包含)")
+    search_parser.add_argument("--limit", type=int, default=20, help="最多返回的结果数量 (默认为20)")
+    search_parser.add_argument("--rebuild", action="store_true", help="检索前重建全文索引")
+
+    # 创建 'embeddings' 子命令的解析器
+    emb_parser = subparsers.add_parser("embeddings", help="语义向量相关操作")
+    emb_subparsers = emb_parser.add_subparsers(dest="emb_command", help="向量命令")
+
+    # 定义 'embeddings build' 命令
+    emb_build_parser = emb_subparsers.add_parser("build", help="为缺少向量的摘要批量计算向量")
+    emb_build_parser.add_argument("--batch-size", type=int, default=None, help="每批计算的文本数量 (默认取 config.EMBEDDING_BATCH_SIZE)")
+
+    # 定义 'embeddings related' 命令
+    emb_related_parser = emb_subparsers.add_parser("related", help="查找与指定摘要相关的历史简报")
+    emb_related_parser.add_argument("briefing_id", type=int, help="摘要的ID")
+    emb_related_parser.add_argument("-k", type=int, default=5, help="返回的结果数量 (默认为5)")
+
+    # 创建 'queue' 子命令的解析器
+    queue_parser = subparsers.add_parser("queue", help="文章工作队列相关操作")
+    queue_subparsers = queue_parser.add_subparsers(dest="queue_command", help="工作队列命令")
+    queue_subparsers.add_parser("status", help="显示各状态的任务数量")
+    queue_subparsers.add_parser("release", help="强制释放所有未完成任务的租约")
+    queue_subparsers.add_parser("retry", help="将失败的任务重新放回队列")
+    queue_purge_parser = queue_subparsers.add_parser("purge", help="删除已入库的旧队列记录")
+    queue_purge_parser.add_argument("--days", type=int, default=30, help="保留最近多少天的记录 (默认为30)")
+
+    # 创建 'batch' 子命令的解析器
+    batch_parser = subparsers.add_parser("batch", help="批量摘要任务相关操作")
+    batch_subparsers = batch_parser.add_subparsers(dest="batch_command", help="批量任务命令")
+    batch_status_parser = batch_subparsers.add_parser("status", help="列出最近的批量摘要任务")
+    batch_status_parser.add_argument("--limit", type=int, default=20, help="最多显示的任务数量 (默认为20)")
+    batch_collect_parser = batch_subparsers.add_parser("collect", help="取回已完成的批量任务结果并入库")
+    batch_collect_parser.add_argument("--wait", type=int, default=0, help="最多等待多少秒，期间持续轮询 (默认为0，只检查一次)")
+
+    # 创建 'feeds' 子命令的解析器
+    feeds_parser = subparsers.add_parser("feeds", help="信源注册表相关操作")
+    feeds_subparsers = feeds_parser.add_subparsers(dest="feeds_command", help="信源命令")
+    feeds_add_parser = feeds_subparsers.add_parser("add", help="添加信源（已存在时更新给出的设置）")
+    feeds_add_parser.add_argument("url", help="RSS/Atom 地址")
+    feeds_add_parser.add_argument("--name", help="显示名称，默认使用RSS中的标题")
+    feeds_add_parser.add_argument("--max-articles", type=int, help="每次最多处理的文章数")
+    feeds_add_parser.add_argument("--min-length", type=int, help="正文的最小长度（字符数）")
+    feeds_add_parser.add_argument("--interval", type=int, help="两次采集之间的最短间隔（秒）")
+    feeds_add_parser.add_argument("--weight", type=float, help="优先级评分中的信源权重")
+    feeds_add_parser.add_argument("--option", dest="options", type=parse_option, action="append",
+                                  help="正文提取选项 KEY=VALUE，可重复，例如 --option favor_precision=true")
+    feeds_add_parser.add_argument("--quality", type=parse_option, action="append",
+                                  help="正文质量阈值 KEY=VALUE，可重复，覆盖 config.QUALITY_THRESHOLDS，"
+                                       "例如 --quality languages=zh,latin --quality max_digit_ratio=0.4")
+    feeds_subparsers.add_parser("list", help="列出所有信源及其采集统计")
+    feeds_enable_parser = feeds_subparsers.add_parser("enable", help="启用信源")
+    feeds_enable_parser.add_argument("feed", help="信源ID或URL")
+    feeds_disable_parser = feeds_subparsers.add_parser("disable", help="停用信源")
+    feeds_disable_parser.add_argument("feed", help="信源ID或URL")
+    feeds_import_parser = feeds_subparsers.add_parser("import-opml", help="从OPML文件导入信源")
+    feeds_import_parser.add_argument("path", help="OPML文件路径")
+
+    # 创建 'workers' 子命令的解析器
+    workers_parser = subparsers.add_parser("workers", help="分片工作进程相关操作")
+    workers_subparsers = workers_parser.add_subparsers(dest="workers_command", help="工作进程命令")
+    workers_subparsers.add_parser("status", help="显示工作进程的心跳与分片分配")
+
+    # 创建 'hosts' 子命令的解析器
+    hosts_parser = subparsers.add_parser("hosts", help="网站熔断相关操作")
+    hosts_subparsers = hosts_parser.add_subparsers(dest="hosts_command", help="网站熔断命令")
+    hosts_subparsers.add_parser("status", help="显示下载失败过的网站及其熔断状态")
+    hosts_reset_parser = hosts_subparsers.add_parser("reset", help="手动解除一个网站的熔断")
+    hosts_reset_parser.add_argument("host", help="网站主机名，例如 www.example.com")
+
+    # 创建 'delivery' 子命令的解析器
+    delivery_parser = subparsers.add_parser("delivery", help="简报发送进度相关操作")
+    delivery_subparsers = delivery_parser.add_subparsers(dest="delivery_command", help="发送进度命令")
+    delivery_subparsers.add_parser("status", help="显示每个收件人已发送到的摘要")
+    delivery_reset_parser = delivery_subparsers.add_parser("reset", help="重置收件人的发送进度")
+    delivery_reset_parser.add_argument("recipient", help="收件人邮箱地址")
+
+    # 创建 'resummarize' 子命令的解析器
+    resum_parser = subparsers.add_parser("resummarize", help="根据已保存的原文重新生成摘要（可中断后继续）")
+    resum_parser.add_argument("--since", type=parse_date, help="只处理该日期及之后创建的摘要 (YYYY-MM-DD)")
+    resum_parser.add_argument("--until", type=parse_date, help="只处理该日期及之前创建的摘要 (YYYY-MM-DD)")
+    resum_parser.add_argument("--source", help="只处理指定信源名称的摘要")
+    resum_parser.add_argument("--model", help="只处理由指定模型生成的摘要")
+    resum_parser.add_argument("--limit", type=int, help="最多处理的摘要数量")
+    resum_parser.add_argument("--activate", action="store_true", help="用新版本替换当前摘要（旧摘要会保存为一个版本）")
+
+    # 创建 'reextract' 子命令的解析器
+    reextract_parser = subparsers.add_parser("reextract", help="根据网页快照缓存离线重新提取正文（使用全部CPU核心）")
+    reextract_parser.add_argument("--since", type=parse_date, help="只处理该日期及之后创建的摘要 (YYYY-MM-DD)")
+    reextract_parser.add_argument("--until", type=parse_date, help="只处理该日期及之前创建的摘要 (YYYY-MM-DD)")
+    reextract_parser.add_argument("--source", help="只处理指定信源名称的文章")
+    reextract_parser.add_argument("--min-length", type=int, help="新正文的最小长度，更短的保持原样 (默认使用各信源的设置)")
+    reextract_parser.add_argument("--option", dest="options", type=parse_option, action="append",
+                                  help="正文提取选项 KEY=VALUE，可重复，覆盖信源设置中的同名选项，例如 --option favor_recall=true")
+    reextract_parser.add_argument("--workers", type=int, help="进程数 (默认为CPU核心数)")
+    reextract_parser.add_argument("--dry-run", action="store_true", help="只统计会发生的变化，不写入数据库")
+
+    # 创建 'profile' 子命令的解析器
+    profile_parser = subparsers.add_parser("profile", help="性能剖析结果相关操作")
+    profile_subparsers = profile_parser.add_subparsers(dest="profile_command", help="剖析命令")
+    profile_show_parser = profile_subparsers.add_parser("show", help="汇总最近几次运行的热点函数与内存分配位置")
+    profile_show_parser.add_argument("--last", type=int, default=5, help="汇总最近多少次运行 (默认为5)")
+    profile_show_parser.add_argument("--top", type=int, default=15, help="每个列表显示的条数 (默认为15)")
+    profile_show_parser.add_argument("--task", choices=["data_pipeline", "delivery"], help="只看指定任务的运行")
+
     # 解析参数
     args = parser.parse_args()
 
@@ -147,5 +654,75 @@ if __name__ == "__main__":
             db_reset()
         else:
             db_parser.print_help()
+    elif args.command == "embeddings":
+        if args.emb_command == "build":
+            embeddings_build(args.batch_size)
+        elif args.emb_command == "related":
+            embeddings_related(args.briefing_id, args.k)
+        else:
+            emb_parser.print_help()
+    elif args.command == "queue":
+        if args.queue_command == "status":
+            queue_status()
+        elif args.queue_command == "release":
+            queue_release()
+        elif args.queue_command == "retry":
+            queue_retry()
+        elif args.queue_command == "purge":
+            queue_purge(args.days)
+        else:
+            queue_parser.print_help()
+    elif args.command == "batch":
+        if args.batch_command == "status":
+            batch_status(args.limit)
+        elif args.batch_command == "collect":
+            batch_collect(args.wait)
+        else:
+            batch_parser.print_help()
+    elif args.command == "feeds":
+        if args.feeds_command == "add":
+            feeds_add(args.url, name=args.name, max_articles=args.max_articles, min_length=args.min_length,
+                      interval=args.interval, weight=args.weight, options=args.options, quality=args.quality)
+        elif args.feeds_command == "list":
+            feeds_list()
+        elif args.feeds_command in ("enable", "disable"):
+            feeds_set_enabled(args.feed, args.feeds_command == "enable")
+        elif args.feeds_command == "import-opml":
+            feeds_import_opml(args.path)
+        else:
+            feeds_parser.print_help()
+    elif args.command == "workers":
+        if args.workers_command == "status":
+            workers_status()
+        else:
+            workers_parser.print_help()
+    elif args.command == "hosts":
+        if args.hosts_command == "status":
+            hosts_status()
+        elif args.hosts_command == "reset":
+            hosts_reset(args.host)
+        else:
+            hosts_parser.print_help()
+    elif args.command == "delivery":
+        if args.delivery_command == "status":
+            delivery_status()
+        elif args.delivery_command == "reset":
+            delivery_reset(args.recipient)
+        else:
+            delivery_parser.print_help()
+    elif args.command == "resummarize":
+        resummarize(since=args.since, until=args.until, source=args.source, model=args.model,
+                    limit=args.limit, activate=args.activate)
+    elif args.command == "reextract":
+        reextract(since=args.since, until=args.until, source=args.source, min_length=args.min_length,
+                  options=args.options, workers=args.workers, dry_run=args.dry_run)
+    elif args.command == "profile":
+        if args.profile_command == "show":
+            profile_show(args.last, args.top, args.task)
+        else:
+            profile_parser.print_help()
+    elif args.command == "search":
+        search(args.query, source=args.source, since=args.since, until=args.until,
+               limit=args.limit, rebuild=args.rebuild)
     else:
         parser.print_help()
\ No newline at end of file
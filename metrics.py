@@ -0,0 +1,93 @@
+# metrics.py (Version 1.0 - In-Process Latency Metrics)
+
+# ==============================================================================
+# 1. 导入工具箱 (Import necessary tools)
+# ==============================================================================
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+# ==============================================================================
+# "雅典娜"进程内指标收集
+#
+# 一个极简的、线程安全的耗时与计数器收集器。流水线的每个阶段都会自动记录单条数据的处理耗时，
+# 基准测试和日志可以据此计算各阶段的延迟分位数。
+# 每个指标最多保留 MAX_SAMPLES 个样本（超出后使用蓄水池抽样），内存占用有上限。
+# ==============================================================================
+
+MAX_SAMPLES = 100_000
+
+_lock = threading.Lock()
+_samples = defaultdict(list)
+_seen = Counter()
+_counters = Counter()
+
+
+def record(name: str, seconds: float):
+    """记录一次耗时样本（秒）。"""
+    with _lock:
+        _seen[name] += 1
+        samples = _samples[name]
+        if len(samples) < MAX_SAMPLES:
+            samples.append(seconds)
+        else:
+            slot = random.randrange(_seen[name])
+            if slot < MAX_SAMPLES:
+                samples[slot] = seconds
+
+
+@contextmanager
+def timed(name: str):
+    """记录 with 代码块的耗时。"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def incr(name: str, amount: int = 1):
+    """计数器加一（或加 amount）。"""
+    with _lock:
+        _counters[name] += amount
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    index = min(int(round(q * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summary() -> dict:
+    """
+    返回当前所有指标的汇总:
+    {'timings': {名称: {count, mean, p50, p90, p99, max}}, 'counters': {名称: 数值}}
+    其中耗时单位为秒，count 为记录的总次数（不受抽样影响）。
+    """
+    with _lock:
+        samples = {name: sorted(values) for name, values in _samples.items()}
+        seen = dict(_seen)
+        counters = dict(_counters)
+
+    timings = {}
+    for name, values in samples.items():
+        if not values:
+            continue
+        timings[name] = {
+            'count': seen[name],
+            'mean': sum(values) / len(values),
+            'p50': _percentile(values, 0.50),
+            'p90': _percentile(values, 0.90),
+            'p99': _percentile(values, 0.99),
+            'max': values[-1],
+        }
+    return {'timings': timings, 'counters': counters}
+
+
+def reset():
+    """清空所有指标。"""
+    with _lock:
+        _samples.clear()
+        _seen.clear()
+        _counters.clear()
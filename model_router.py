@@ -0,0 +1,283 @@
+# model_router.py (Version 1.0 - Latency-Aware Model Pool)
+
+# ==============================================================================
+# 1. 导入工具箱 (Import necessary tools)
+# ==============================================================================
+import os
+import threading
+import time
+
+import httpx
+from openai import OpenAI, APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+
+import config
+import metrics
+from logger_config import logger
+
+# ==============================================================================
+# "雅典娜"多模型路由
+#
+# 摘要请求不再绑定单一模型，而是由一个模型池 (config.MODEL_POOL) 提供服务:
+# - 每个端点（OpenAI兼容接口 + 模型）有自己的并发上限，一个慢的服务商不会占满所有工作线程；
+# - 短文章优先交给便宜快速的 "cheap" 档位，长文章（超过 ROUTING_LONG_ARTICLE_CHARS）优先交给 "strong" 档位；
+# - 路由器持续统计每个端点的延迟与错误率（指数滑动平均）。变慢或频繁出错的端点会被排到后面，
+#   被限流 (429) 或连续失败的端点会冷却一段时间，请求会立即转给下一个端点，而不是在原地退避重试；
+# - 实际完成请求的端点会被返回，调用方据此记录 model_used。
+# ==============================================================================
+
+# httpx.TransportError: 流式响应在读取过程中断开或超时，SDK 不会把它包装成 APIError
+RETRYABLE_ERRORS = (APIConnectionError, APITimeoutError, RateLimitError, APIStatusError, httpx.TransportError)
+
+
+class AllEndpointsFailed(Exception):
+    """模型池中的所有端点都未能完成请求。"""
+
+
+# ==============================================================================
+# 2. 端点 (Endpoint)
+# ==============================================================================
+class Endpoint:
+    """模型池中的一个端点，记录它的并发限制与健康状况。"""
+
+    def __init__(self, name: str, model: str, client, tier: str = "strong", max_concurrency: int = 4):
+        self.name = name
+        self.model = model
+        self.client = client
+        self.tier = tier
+        self.max_concurrency = max_concurrency
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self.latency = None        # 成功请求耗时的滑动平均（秒），None 表示还没有观测数据
+        self.error_rate = 0.0      # 失败率的滑动平均
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    def __repr__(self):
+        return f"Endpoint({self.name!r}, model={self.model!r}, tier={self.tier!r})"
+
+    # --- 并发槽位 ---
+    def try_acquire(self) -> bool:
+        return self._slots.acquire(blocking=False)
+
+    def acquire(self):
+        self._slots.acquire()
+
+    def release(self):
+        self._slots.release()
+
+    # --- 健康统计 ---
+    def cooling_down(self, now: float | None = None) -> bool:
+        return (now or time.monotonic()) < self.cooldown_until
+
+    def degraded(self) -> bool:
+        """错误率或延迟超过阈值时视为降级，排在其他档位的健康端点之后。"""
+        return (self.error_rate > config.ROUTER_MAX_ERROR_RATE
+                or (self.latency is not None and self.latency > config.ROUTER_SLOW_SECONDS))
+
+    def cost(self) -> float:
+        """同一优先级内的排序依据: 延迟越低、错误率越低越靠前；没有观测数据的端点优先被试用。"""
+        return (self.latency or 0.0) * (1 + 4 * self.error_rate)
+
+    def record_success(self, seconds: float):
+        alpha = config.ROUTER_EWMA_ALPHA
+        with self._lock:
+            self.latency = seconds if self.latency is None else (1 - alpha) * self.latency + alpha * seconds
+            self.error_rate = (1 - alpha) * self.error_rate
+            self.consecutive_failures = 0
+        metrics.record(f"llm.{self.name}", seconds)
+
+    def record_failure(self, error: Exception):
+        alpha = config.ROUTER_EWMA_ALPHA
+        with self._lock:
+            self.error_rate = (1 - alpha) * self.error_rate + alpha
+            self.consecutive_failures += 1
+            cooldown = 0.0
+            if isinstance(error, RateLimitError):
+                cooldown = retry_after_seconds(error) or config.ROUTER_COOLDOWN_SECONDS
+            elif self.consecutive_failures >= config.ROUTER_FAILURES_BEFORE_COOLDOWN:
+                cooldown = config.ROUTER_COOLDOWN_SECONDS
+            if cooldown:
+                self.cooldown_until = max(self.cooldown_until, time.monotonic() + cooldown)
+        metrics.incr(f"llm.{self.name}.errors")
+        if cooldown:
+            logger.warning(f"模型端点 '{self.name}' 暂停使用 {cooldown:.0f} 秒: {type(error).__name__}")
+
+
+def is_client_error(error: Exception) -> bool:
+    """除限流 (429) 以外的 4xx 错误。"""
+    return (isinstance(error, APIStatusError) and not isinstance(error, RateLimitError)
+            and error.status_code < 500)
+
+
+def retry_after_seconds(error: Exception) -> float | None:
+    """从 429 响应的 Retry-After 头中读取等待秒数。"""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+# ==============================================================================
+# 3. 路由器 (Router)
+# ==============================================================================
+class ModelRouter:
+    """按文章长度选择档位，并根据端点的健康状况决定尝试顺序。"""
+
+    def __init__(self, endpoints: list[Endpoint]):
+        if not endpoints:
+            raise ValueError("模型池中至少需要一个端点。")
+        self.endpoints = endpoints
+
+    def preferred_tier(self, content_chars: int) -> str:
+        return "strong" if content_chars > config.ROUTING_LONG_ARTICLE_CHARS else "cheap"
+
+    def candidates(self, content_chars: int) -> list[Endpoint]:
+        """
+        返回本次请求的端点尝试顺序:
+        首选档位的健康端点 -> 其他档位的健康端点 -> 降级的端点 -> 冷却中的端点；同组内按 cost() 排序。
+        """
+        tier = self.preferred_tier(content_chars)
+        now = time.monotonic()
+
+        def rank(endpoint: Endpoint):
+            if endpoint.cooling_down(now):
+                group = 3
+            elif endpoint.degraded():
+                group = 2
+            else:
+                group = 0 if endpoint.tier == tier else 1
+            return group, endpoint.cost()
+
+        return sorted(self.endpoints, key=rank)
+
+    def _acquire(self, ordered: list[Endpoint]) -> list[Endpoint]:
+        """
+        占用一个端点的并发槽位，返回以该端点开头的尝试顺序。
+        按顺序寻找有空闲槽位的端点；全部占满时在首选端点上排队等待。
+        """
+        for i, endpoint in enumerate(ordered):
+            if endpoint.try_acquire():
+                return [endpoint] + ordered[:i] + ordered[i + 1:]
+        ordered[0].acquire()
+        return ordered
+
+    def complete(self, content_chars: int, consume=None, **request):
+        """
+        发送一次对话补全请求，失败时立即转给下一个端点。
+        consume(response, started) 在占用端点槽位期间读取响应（例如逐块读取流式响应），
+        读取过程中的网络错误同样会触发切换端点；started 为本次请求发出时的 time.perf_counter()。
+        返回 (consume 的结果或原始 response, endpoint)；所有端点都失败时抛出 AllEndpointsFailed。
+        """
+        ordered = self._acquire(self.candidates(content_chars))
+        errors = []
+        for attempt, endpoint in enumerate(ordered):
+            if attempt > 0:
+                endpoint.acquire()
+            start = time.perf_counter()
+            try:
+                response = endpoint.client.chat.completions.create(model=endpoint.model, **request)
+                if consume is not None:
+                    response = consume(response, start)
+            except RETRYABLE_ERRORS as e:
+                if is_client_error(e):
+                    # 请求本身有问题 (4xx)，换端点也无济于事
+                    raise
+                endpoint.record_failure(e)
+                errors.append(f"{endpoint.name}: {type(e).__name__}")
+                logger.warning(f"模型端点 '{endpoint.name}' 请求失败 ({type(e).__name__})，尝试下一个端点。")
+                continue
+            finally:
+                endpoint.release()
+            endpoint.record_success(time.perf_counter() - start)
+            return response, endpoint
+        raise AllEndpointsFailed("; ".join(errors))
+
+
+# ==============================================================================
+# 4. 从配置构建 (Build from Config)
+# ==============================================================================
+def endpoint_from_spec(spec: dict, default_concurrency: int) -> Endpoint:
+    """
+    根据 config.MODEL_POOL 中的一项创建端点。密钥与地址从 .env 中读取:
+    spec 只写环境变量的名字 (api_key_env / base_url_env)，模型名可以直接写 model，也可以写 model_env。
+    """
+    api_key = os.getenv(spec.get("api_key_env", "OPENAI_API_KEY"))
+    base_url = os.getenv(spec.get("base_url_env", "OPENAI_API_BASE")) or None
+    model = spec.get("model") or os.getenv(spec.get("model_env", "DEFAULT_MODEL"))
+    name = spec.get("name") or model
+    if not api_key:
+        raise ValueError(f"错误: 模型端点 '{name}' 的API密钥 ({spec.get('api_key_env', 'OPENAI_API_KEY')}) 未在 .env 文件中找到。")
+    if not model:
+        raise ValueError(f"错误: 模型端点 '{name}' 没有配置模型名称。")
+
+    # 失败时由路由器立即切换端点，因此关闭SDK内部的重试
+    client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0, timeout=config.ROUTER_REQUEST_TIMEOUT)
+    return Endpoint(name, model, client, tier=spec.get("tier", "strong"),
+                    max_concurrency=spec.get("max_concurrency", default_concurrency))
+
+
+def build_router() -> ModelRouter:
+    """根据 config.MODEL_POOL 构建路由器；模型池为空时只使用 .env 中的 OPENAI_API_KEY / DEFAULT_MODEL。"""
+    specs = config.MODEL_POOL or [{"name": "default"}]
+    endpoints = [endpoint_from_spec(spec, config.SUMMARIZE_WORKERS) for spec in specs]
+    return ModelRouter(endpoints)
+
+
+# ==============================================================================
+# 5. 读取响应 (Reading Responses)
+#
+# 两种读取方式返回同样结构的字典: {'text', 'ttft', 'total', 'finish_reason'}，
+# 其中 ttft 为首个token到达的耗时，total 为总耗时（秒，均从请求发出时算起）。
+# 流式模式下，输出超过 SUMMARY_MAX_CHARS 个字符或耗时超过 SUMMARY_MAX_SECONDS 时会立即中止生成，
+# finish_reason 相应地记为 "length_cap" / "time_cap"。
+# ==============================================================================
+def read_stream(stream, started: float) -> dict:
+    """
+    逐块读取流式响应，达到长度或时间上限时提前关闭连接。
+    时间上限对每一块都检查，包括没有内容的块 (例如保活块)；完全没有数据到达的情况由 stream_timeout 的读取超时兜底。
+    """
+    parts, length, ttft, finish_reason = [], 0, None, None
+    try:
+        for chunk in stream:
+            choice = chunk.choices[0] if chunk.choices else None
+            delta = choice.delta.content if choice is not None and choice.delta else None
+            if choice is not None and choice.finish_reason:
+                finish_reason = choice.finish_reason
+            if delta:
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                parts.append(delta)
+                length += len(delta)
+                if length >= config.SUMMARY_MAX_CHARS:
+                    finish_reason = "length_cap"
+                    break
+            if time.perf_counter() - started >= config.SUMMARY_MAX_SECONDS:
+                finish_reason = "time_cap"
+                break
+    finally:
+        stream.close()
+    total = time.perf_counter() - started
+    return {'text': "".join(parts), 'ttft': ttft if ttft is not None else total,
+            'total': total, 'finish_reason': finish_reason}
+
+
+def stream_timeout() -> httpx.Timeout:
+    """流式请求的超时: 两块数据之间最多等待 SUMMARY_MAX_SECONDS 秒 (且不超过 ROUTER_REQUEST_TIMEOUT)。"""
+    return httpx.Timeout(config.ROUTER_REQUEST_TIMEOUT,
+                         read=min(config.SUMMARY_MAX_SECONDS, config.ROUTER_REQUEST_TIMEOUT))
+
+
+def read_response(response, started: float) -> dict:
+    """读取普通（非流式）响应；此时首个token与完整响应同时到达。"""
+    total = time.perf_counter() - started
+    choice = response.choices[0]
+    return {'text': choice.message.content or "", 'ttft': total, 'total': total,
+            'finish_reason': choice.finish_reason}
+
+
+def trim_to_sentence(text: str) -> str:
+    """被截断的摘要只保留到最后一个完整的句子；找不到句末标点时原样返回。"""
+    cut = max(text.rfind(mark) for mark in "。！？.!?")
+    return text[:cut + 1] if cut >= len(text) // 2 else text
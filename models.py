@@ -9,7 +9,13 @@ from sqlalchemy import (
     String,         # 短字符串类型
     Text,           # 长文本类型
     DateTime,       # 日期和时间类型
-    ForeignKey      # 用于定义外键，建立表之间的关联
+    ForeignKey,     # 用于定义外键，建立表之间的关联
+    LargeBinary,    # 二进制类型，用于存储紧凑的向量数据
+    Float,          # 浮点数类型
+    Boolean,        # 布尔类型
+    JSON,           # JSON类型，用于存储结构化的选项
+    Index,          # 用于定义复合索引
+    UniqueConstraint  # 用于定义多列唯一约束
 )
 from sqlalchemy.orm import declarative_base, relationship
 from datetime import datetime, timezone
@@ -51,17 +57,23 @@ class BriefingItem(Base):
     summary_text = Column(Text, nullable=False)
     
     # source_name: 信源的名称，例如 '阮一峰的网络日志'。方便未来按来源进行筛选和展示。
-    source_name = Column(String)
+    # index=True: 网页/API 按信源分页浏览 (web_api.py)；SQLite 的索引隐含主键，同一信源内可以直接按ID顺序读取。
+    source_name = Column(String, index=True)
     
     # model_used: 记录生成这条摘要时使用的AI模型名称，例如 'hunyuan-turbo-latest'。
     # 这个元数据对于未来的调试、成本分析和效果对比至关重要。
     model_used = Column(String)
+
+    # prompt_version: 生成这条摘要时使用的Prompt版本，例如 'summarizer_v2' (见 prompts/ 目录)。
+    # 与 model_used 一起，可以判断哪些摘要需要在修改Prompt后重新生成。
+    prompt_version = Column(String)
     
     # created_at: 记录这条数据被创建的时间戳。
     # default=lambda: datetime.now(timezone.utc) 是一个强大的功能：
     # 当我们创建一条新记录时，如果没提供这个字段，数据库会自动调用这个lambda函数，
     # 填入当前的、带UTC时区的标准时间。这修复了之前的DeprecationWarning。
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # index=True: 发送简报、按日期清理和检索时都会按创建时间过滤。
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
 
     # --- 定义对象间的关系 (Relationships) ---
     
@@ -73,6 +85,12 @@ class BriefingItem(Base):
     # cascade="all, delete-orphan" 是一个级联操作：当我们删除一条摘要时，与之关联的原文也会被自动删除。
     original_content = relationship("OriginalContent", back_populates="briefing", uselist=False, cascade="all, delete-orphan")
 
+    # embedding: 摘要的语义向量，与摘要同样是“一对一”关系，删除摘要时一并删除。
+    embedding = relationship("BriefingEmbedding", back_populates="briefing", uselist=False, cascade="all, delete-orphan")
+
+    # versions: 重新生成摘要时保存的各个版本（见 SummaryVersion），删除摘要时一并删除。
+    versions = relationship("SummaryVersion", back_populates="briefing", cascade="all, delete-orphan")
+
 
 class OriginalContent(Base):
     """
@@ -85,6 +103,10 @@ class OriginalContent(Base):
     
     # content_text: 存储从网页中提取出的、干净的纯文本内容。
     content_text = Column(Text, nullable=False)
+
+    # html_hash: 网页快照的内容哈希 (见 html_cache.py)，未开启快照缓存时为空。
+    # `python manage.py reextract` 根据它从快照离线重新提取正文。
+    html_hash = Column(String)
     
     # briefing_id: 外键，这是实现两张表“一对一”关联的核心。
     # ForeignKey('briefings.id') 建立了一个数据库层面的约束：
@@ -94,4 +116,274 @@ class OriginalContent(Base):
     # briefing: 与BriefingItem中的original_content配对的关系属性。
     # 它允许我们通过一个OriginalContent对象(比如 an_original_content)，
     # 用 an_original_content.briefing 的方式，反向访问到它所属的那个BriefingItem对象。
-    briefing = relationship("BriefingItem", back_populates="original_content")
\ No newline at end of file
+    briefing = relationship("BriefingItem", back_populates="original_content")
+
+
+class BriefingEmbedding(Base):
+    """
+    摘要向量表 (Briefing Embeddings Table)
+    存储每条摘要的语义向量，用于相关简报检索和按话题分组。
+    """
+    __tablename__ = 'briefing_embeddings'
+
+    id = Column(Integer, primary_key=True)
+
+    # briefing_id: 外键，每条摘要最多只有一个向量。
+    briefing_id = Column(Integer, ForeignKey('briefings.id'), unique=True, nullable=False)
+
+    # model: 生成该向量的嵌入模型名称。更换模型后，旧向量会被视为过期并重新计算。
+    model = Column(String, nullable=False)
+
+    # text_hash: 被嵌入文本的SHA-256摘要。文本未变化时直接复用已有向量，避免重复计算。
+    text_hash = Column(String(64), nullable=False, index=True)
+
+    # dim: 向量维度；vector: 归一化后的 float32 向量，以紧凑的二进制形式存储。
+    dim = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)
+
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    briefing = relationship("BriefingItem", back_populates="embedding")
+
+
+class SummaryVersion(Base):
+    """
+    摘要版本表 (Summary Versions Table)
+    修改Prompt或更换模型后，可以用 `manage.py resummarize` 根据已保存的原文重新生成摘要。
+    每个版本以 (摘要, Prompt版本, 模型) 为键单独保存，生成过程中不会改动摘要表，读取方不受影响；
+    只有显式启用 (--activate) 时，新版本才会替换摘要表中的当前摘要，被替换的旧摘要同样保存为一个版本。
+    """
+    __tablename__ = 'summary_versions'
+
+    id = Column(Integer, primary_key=True)
+
+    # briefing_id: 所属摘要。
+    briefing_id = Column(Integer, ForeignKey('briefings.id'), nullable=False)
+
+    # prompt_version: 生成该版本所用的Prompt版本，例如 'summarizer_v1'；model: 实际生成该版本的模型。
+    prompt_version = Column(String, nullable=False)
+    model = Column(String, nullable=False)
+
+    summary_text = Column(Text, nullable=False)
+
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    briefing = relationship("BriefingItem", back_populates="versions")
+
+    # 同一条摘要在同一个 (Prompt版本, 模型) 下只保存一个版本，中断后重新运行时据此跳过已完成的摘要。
+    __table_args__ = (
+        UniqueConstraint('briefing_id', 'prompt_version', 'model', name='uq_summary_versions_key'),
+    )
+
+
+class ArticleQueueItem(Base):
+    """
+    文章工作队列表 (Article Work Queue Table)
+    记录每篇文章在流水线中的处理进度，使中断的运行可以从每篇文章最后完成的状态继续，
+    并允许多个工作进程通过租约 (lease) 安全地并发领取任务。
+
+    状态流转: discovered(已发现) -> extracted(已提取正文) -> summarized(已生成摘要) -> stored(已入库)
+    终止状态: failed(多次重试后仍失败)、rejected(未通过正文质量过滤，last_error 为原因代码)
+    """
+    __tablename__ = 'article_queue'
+
+    id = Column(Integer, primary_key=True)
+
+    # --- 文章元数据 (来自RSS条目) ---
+    url = Column(String, unique=True, nullable=False)
+    feed_url = Column(String)
+    source_name = Column(String)
+    title = Column(String)
+    published_at = Column(DateTime)
+
+    # state: 当前处理状态，见类注释。
+    state = Column(String, nullable=False, default='discovered')
+
+    # --- 各阶段的中间结果 (检查点) ---
+    clean_content = Column(Text)
+    html_hash = Column(String)
+    score = Column(Float)
+    estimated_tokens = Column(Integer)
+    summary_text = Column(Text)
+    model_used = Column(String)
+    prompt_version = Column(String)
+
+    # --- 租约与重试 ---
+    # lease_owner / lease_expires_at: 领取该任务的工作进程及租约到期时间。
+    # 进程崩溃后租约会自然过期，任务随即可以被其他进程重新领取。
+    lease_owner = Column(String)
+    lease_expires_at = Column(DateTime)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    # 领取任务时按 (状态, 租约到期时间) 过滤，这个复合索引让领取操作无需全表扫描。
+    __table_args__ = (
+        Index('ix_article_queue_state_lease', 'state', 'lease_expires_at'),
+    )
+
+class SummaryBatch(Base):
+    """
+    批量摘要任务表 (Summary Batches Table)
+    记录每个提交到 Batch API 的批量摘要任务。批量任务可能需要数小时才能完成，
+    这张表让提交任务的运行退出后，之后的任何一次运行都能继续轮询并取回结果。
+    """
+    __tablename__ = 'summary_batches'
+
+    id = Column(Integer, primary_key=True)
+
+    # batch_id: 服务商返回的批量任务ID；input_file_id: 上传的JSONL请求文件ID。
+    batch_id = Column(String, unique=True, nullable=False)
+    input_file_id = Column(String)
+
+    # endpoint / model: 提交任务所用的模型端点名称 (见 config.MODEL_POOL) 与模型名称。
+    endpoint = Column(String, nullable=False)
+    model = Column(String, nullable=False)
+
+    # prompt_version: 批次中所有请求使用的Prompt版本，入库时记录到每条摘要上。
+    prompt_version = Column(String)
+
+    # lease_owner: 批次中的文章在工作队列中的租约持有者。每个批次使用独立的ID，
+    # 取回结果时只推进仍由该批次持有的文章。
+    lease_owner = Column(String, nullable=False)
+
+    # status: 服务商报告的最新状态 (validating / in_progress / finalizing / completed / failed / expired / cancelled)。
+    status = Column(String, nullable=False)
+    request_count = Column(Integer, nullable=False, default=0)
+
+    # 结果文件与错误文件的ID，任务结束后才会出现。
+    output_file_id = Column(String)
+    error_file_id = Column(String)
+
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    completed_at = Column(DateTime)
+
+    # ingested_at: 结果写回工作队列的时间。为空表示这个批次还需要继续轮询或取回结果。
+    ingested_at = Column(DateTime, index=True)
+
+
+class DeliveryMark(Base):
+    """
+    简报发送进度表 (Delivery Marks Table)
+    为每个收件人记录已经发送到的最后一条摘要（高水位线）。每次发送只查询ID大于水位线的新摘要，
+    发送成功后才推进水位线: 发送之后才入库的摘要会出现在下一封简报中，重复运行也不会重复发送。
+    """
+    __tablename__ = 'delivery_marks'
+
+    id = Column(Integer, primary_key=True)
+
+    # recipient: 收件人邮箱地址。
+    recipient = Column(String, unique=True, nullable=False)
+
+    # last_briefing_id / last_created_at: 已发送的最后一条摘要的ID及其创建时间。
+    last_briefing_id = Column(Integer, nullable=False, default=0)
+    last_created_at = Column(DateTime)
+
+    # last_sent_at: 最近一次发送简报的时间，用于判断当前的简报周期内是否已经发送过。
+    last_sent_at = Column(DateTime)
+
+
+class Feed(Base):
+    """
+    信源注册表 (Feeds Table)
+    每个RSS源一行，保存它自己的采集策略以及最近的采集统计，通过 `python manage.py feeds ...` 管理 (见 feed_registry.py)。
+    策略字段为空时使用 config.py 中的全局默认值。
+    """
+    __tablename__ = 'feeds'
+
+    id = Column(Integer, primary_key=True)
+
+    # url: RSS/Atom 地址；name: 可选的显示名称，为空时使用RSS中的标题。
+    url = Column(String, unique=True, nullable=False)
+    name = Column(String)
+
+    # enabled: 停用的信源不再采集，但保留统计数据，之前入队的文章仍会继续处理。
+    enabled = Column(Boolean, nullable=False, default=True)
+
+    # --- 采集策略 (为空时使用 config 中的默认值) ---
+    # max_articles: 每次最多处理的文章数 (默认 MAX_ARTICLES_PER_FEED)
+    # min_content_length: 正文的最小长度 (默认 MIN_CONTENT_LENGTH)
+    # poll_interval_seconds: 两次采集之间的最短间隔，为空表示每次运行都采集
+    # weight: 优先级评分中的信源权重 (为空时按 config.SOURCE_WEIGHTS 中的RSS链接或信源名称查找，默认 1.0)
+    # extract_options: 传给 trafilatura.extract 的选项，例如 {"favor_precision": true}
+    max_articles = Column(Integer)
+    min_content_length = Column(Integer)
+    poll_interval_seconds = Column(Integer)
+    weight = Column(Float)
+    extract_options = Column(JSON)
+
+    # quality_thresholds: 正文质量过滤的阈值，覆盖 config.QUALITY_THRESHOLDS 中的同名项，例如 {"languages": ["zh"]}
+    quality_thresholds = Column(JSON)
+
+    # --- 采集统计 (Poll Statistics) ---
+    # poll_count / failure_count: 累计采集次数与失败次数；consecutive_failures: 连续失败次数，成功后清零。
+    poll_count = Column(Integer, nullable=False, default=0)
+    failure_count = Column(Integer, nullable=False, default=0)
+    consecutive_failures = Column(Integer, nullable=False, default=0)
+
+    # avg_latency_ms: 采集耗时的滑动平均（毫秒）；last_entry_count: 最近一次采集到的条目数。
+    avg_latency_ms = Column(Float)
+    last_entry_count = Column(Integer)
+
+    # last_polled_at / last_success_at: 最近一次采集、最近一次成功采集的时间；last_error: 最近一次失败的原因。
+    last_polled_at = Column(DateTime)
+    last_success_at = Column(DateTime)
+    last_error = Column(Text)
+
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class WorkerNode(Base):
+    """
+    采集工作进程表 (Worker Nodes Table)
+    分片采集模式下 (见 sharding.py)，每个存活的工作进程有一行，并定期刷新心跳。
+    expires_at 过期的进程被视为已经退出，它负责的分片会被其余进程接管。
+    """
+    __tablename__ = 'worker_nodes'
+
+    id = Column(Integer, primary_key=True)
+    worker_id = Column(String, unique=True, nullable=False)
+    started_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    heartbeat_at = Column(DateTime)
+    expires_at = Column(DateTime, index=True)
+
+
+class WorkerLease(Base):
+    """
+    分片租约表 (Worker Leases Table)
+    信源按URL的稳定哈希分为固定数量的分片，每个分片一行，记录当前持有它的工作进程与租约到期时间。
+    只有持有有效租约的进程才会采集该分片中的信源；租约随心跳续期，进程退出后租约过期，分片被重新分配。
+    """
+    __tablename__ = 'worker_leases'
+
+    shard = Column(Integer, primary_key=True, autoincrement=False)
+    owner = Column(String, index=True)
+    heartbeat_at = Column(DateTime)
+    expires_at = Column(DateTime)
+
+
+class HostBreaker(Base):
+    """
+    网站熔断器表 (Host Circuit Breakers Table)
+    记录每个网站 (按URL的主机名) 下载文章时的连续失败次数。连续失败达到 HOST_FAILURE_THRESHOLD 次后熔断:
+    在 opened_until 之前不再下载该网站的任何文章；冷却结束后放行一次试探请求，成功则恢复，失败则再次熔断。
+    状态保存在数据库中，跨运行、跨工作进程共享 (见 circuit_breaker.py)。
+    """
+    __tablename__ = 'host_breakers'
+
+    host = Column(String, primary_key=True)
+
+    # consecutive_failures: 连续失败次数，任意一次下载成功后清零；failure_count: 累计失败次数。
+    consecutive_failures = Column(Integer, nullable=False, default=0)
+    failure_count = Column(Integer, nullable=False, default=0)
+
+    # opened_until: 熔断的冷却结束时间，为空表示从未熔断；trip_count: 累计熔断次数。
+    opened_until = Column(DateTime)
+    trip_count = Column(Integer, nullable=False, default=0)
+
+    # last_failure_at / last_error: 最近一次失败的时间与原因。
+    last_failure_at = Column(DateTime)
+    last_error = Column(Text)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,189 @@
+# pipeline_stages.py (Version 1.0 - Bounded Streaming Stages)
+
+# ==============================================================================
+# 1. 导入工具箱 (Import necessary tools)
+# ==============================================================================
+import queue
+import threading
+import time
+from typing import Callable, Iterable, Iterator
+
+import metrics
+from logger_config import logger
+from profiling import stage_profile
+
+# ==============================================================================
+# "雅典娜"流式流水线的基础构件
+#
+# 每个阶段由若干个工作线程组成，阶段之间通过有界队列 (queue.Queue(maxsize=N)) 相连:
+# - 下游处理得慢时，上游的 put() 会被阻塞，形成天然的背压，内存占用不会随数据量增长；
+# - 每条数据处理完立即流向下一阶段，第一条结果在几秒内就能落库，无需等待全部采集完成。
+#
+# 数据流结束时，上游会向队列放入一个 STAGE_DONE 哨兵。一个阶段的所有工作线程都退出后，
+# 才会把哨兵继续传递给下游，并调用该阶段的 on_done 回调。
+#
+# 阶段的结果也可以不交给下游队列 (outbox=None)，而是直接写入数据库（例如工作队列），
+# 这时下游阶段通过 on_done 回调得知上游已经结束。
+#
+# 映射阶段与批处理阶段每处理一条（一批）数据，都会以 "stage.<阶段名>" 记录一次耗时 (见 metrics.py)。
+# ==============================================================================
+
+STAGE_DONE = object()
+
+
+def make_queue(maxsize: int) -> queue.Queue:
+    """创建一个连接两个阶段的有界队列。"""
+    return queue.Queue(maxsize=maxsize)
+
+
+def _finish(outbox: queue.Queue | None, on_done: Callable | None):
+    """一个阶段结束时: 通知下游，并调用结束回调。"""
+    if outbox is not None:
+        outbox.put(STAGE_DONE)
+    if on_done is not None:
+        on_done()
+
+
+def _start_threads(name: str, target: Callable, workers: int) -> list[threading.Thread]:
+    def run():
+        # 开启性能剖析时，每个工作线程的 cProfile 数据按阶段名合并 (见 profiling.py)
+        with stage_profile(name):
+            target()
+
+    threads = [
+        threading.Thread(target=run, name=f"{name}-{i}", daemon=True)
+        for i in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def _put_results(outbox: queue.Queue | None, result, flatten: bool):
+    """把一个处理结果放入下游队列。None 表示丢弃；flatten=True 时结果是一个可迭代对象。"""
+    if result is None or outbox is None:
+        return
+    if flatten:
+        for element in result:
+            outbox.put(element)
+    else:
+        outbox.put(result)
+
+
+# ==============================================================================
+# 2. 阶段类型 (Stage Types)
+# ==============================================================================
+def start_source(name: str, produce: Callable[[], Iterable], outbox: queue.Queue,
+                 on_done: Callable | None = None) -> list[threading.Thread]:
+    """
+    源阶段: 在一个线程中遍历 produce() 返回的可迭代对象，逐个放入下游队列，结束后放入哨兵。
+    """
+    def run():
+        try:
+            for element in produce():
+                outbox.put(element)
+        except Exception as e:
+            logger.error(f"流水线阶段 '{name}' 发生错误: {e}", exc_info=True)
+        finally:
+            _finish(outbox, on_done)
+
+    return _start_threads(name, run, 1)
+
+
+def start_map(name: str, fn: Callable, inbox: queue.Queue, outbox: queue.Queue | None,
+              workers: int = 1, flatten: bool = False, on_done: Callable | None = None) -> list[threading.Thread]:
+    """
+    映射阶段: workers 个线程并发地从 inbox 取数据，调用 fn(item)，把结果放入 outbox。
+    - fn 返回 None 表示丢弃该条数据；
+    - flatten=True 时 fn 返回一个可迭代对象，其中每个元素分别放入 outbox（一对多）；
+    - 单条数据处理失败只会被记录并丢弃，不会中断整个阶段。
+    """
+    remaining = [workers]
+    lock = threading.Lock()
+
+    def run():
+        try:
+            while True:
+                item = inbox.get()
+                if item is STAGE_DONE:
+                    # 把哨兵放回去，让同一阶段的其他工作线程也能看到
+                    inbox.put(STAGE_DONE)
+                    break
+                try:
+                    with metrics.timed(f"stage.{name}"):
+                        result = fn(item)
+                except Exception as e:
+                    logger.error(f"流水线阶段 '{name}' 处理数据时发生错误: {e}", exc_info=True)
+                    continue
+                _put_results(outbox, result, flatten)
+        finally:
+            with lock:
+                remaining[0] -= 1
+                is_last = remaining[0] == 0
+            if is_last:
+                _finish(outbox, on_done)
+
+    return _start_threads(name, run, workers)
+
+
+def start_batch(name: str, fn: Callable[[list], Iterable], inbox: queue.Queue, outbox: queue.Queue | None,
+                batch_size: int, max_wait: float, on_done: Callable | None = None) -> list[threading.Thread]:
+    """
+    批处理阶段: 在一个线程中把数据攒成最多 batch_size 条的小批次后调用 fn(batch)，
+    fn 返回的每个元素分别放入 outbox。批次中第一条数据等待超过 max_wait 秒时，
+    即使未攒满也会立即处理，保证数据不会因为上游变慢而长时间滞留。
+    """
+    def run():
+        batch = []
+        deadline = None
+        done = False
+        while not done:
+            timeout = None if not batch else max(deadline - time.monotonic(), 0)
+            try:
+                item = inbox.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is STAGE_DONE:
+                done = True
+            elif item is not None:
+                if not batch:
+                    deadline = time.monotonic() + max_wait
+                batch.append(item)
+
+            if batch and (done or len(batch) >= batch_size or time.monotonic() >= deadline):
+                try:
+                    with metrics.timed(f"stage.{name}"):
+                        results = fn(batch)
+                    _put_results(outbox, results, flatten=True)
+                except Exception as e:
+                    logger.error(f"流水线阶段 '{name}' 处理批次时发生错误: {e}", exc_info=True)
+                batch = []
+        _finish(outbox, on_done)
+
+    return _start_threads(name, run, 1)
+
+
+def start_task(name: str, fn: Callable[[], None], on_done: Callable | None = None) -> list[threading.Thread]:
+    """
+    任务阶段: 在一个线程中执行一次 fn()，结束（或出错）后调用 on_done。
+    适用于不按条处理数据、而是整体读写数据库的阶段，例如批量摘要模式。
+    """
+    def run():
+        try:
+            with metrics.timed(f"stage.{name}"):
+                fn()
+        except Exception as e:
+            logger.error(f"流水线阶段 '{name}' 发生错误: {e}", exc_info=True)
+        finally:
+            _finish(None, on_done)
+
+    return _start_threads(name, run, 1)
+
+
+def drain(inbox: queue.Queue) -> Iterator:
+    """在当前线程中逐个取出上游的结果，直到收到哨兵为止。"""
+    while True:
+        item = inbox.get()
+        if item is STAGE_DONE:
+            return
+        yield item
@@ -0,0 +1,317 @@
+# profiling.py (Version 1.0 - Opt-in Per-Run Profiling)
+
+# ==============================================================================
+# 1. 导入工具箱 (Import necessary tools)
+# ==============================================================================
+import cProfile
+import functools
+import json
+import os
+import pstats
+import shutil
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+
+import config
+import metrics
+from logger_config import logger
+
+# ==============================================================================
+# "雅典娜"按次运行的性能剖析
+#
+# 默认关闭，不产生任何开销。开启后（--profile 或 ATHENA_PROFILE=1），一次运行会记录:
+# - 每个流水线阶段的 cProfile 数据: cProfile 只能剖析开启它的线程，因此每个阶段的工作线程各自
+#   剖析，线程结束时按阶段合并；主线程记为 "main" 阶段。Python 3.12 起 cProfile 基于 sys.monitoring，
+#   同一进程内只能有一个剖析器，它会记录所有线程: 这时各阶段的数据都合并在 "main" 阶段中；
+# - tracemalloc 分配位置: 各阶段并发运行、共享同一个堆，无法按线程区分内存归属，因此记录的是
+#   整个进程在内存占用最高时刻的分配位置排行，以及运行结束时的排行，调用栈可以指向具体阶段的代码；
+# - 本次运行的各阶段耗时分位数 (metrics.summary())。
+# 结果写入 logs/profiles/<任务>-<时间>/: 每个阶段一个 .prof 文件（可用 snakeviz 等工具打开）
+# 和一份 summary.json，供 `manage.py profile show` 汇总最近几次运行。
+# ==============================================================================
+
+PROFILE_DIR = os.path.join("logs", "profiles")
+PROFILE_ENV_VAR = "ATHENA_PROFILE"
+
+# 阶段之间靠队列和锁衔接，工作线程大部分时间都在等待；这些等待单独计为 idle_seconds，不参与热点排行
+IDLE_FUNCTIONS = (
+    "<method 'acquire' of '_thread.lock' objects>",
+    "<method 'acquire' of '_thread.RLock' objects>",
+    "<built-in method time.sleep>",
+)
+
+_active_run = None
+_active_lock = threading.Lock()
+
+
+def is_enabled_by_env() -> bool:
+    return os.getenv(PROFILE_ENV_VAR, "").lower() in ("1", "true", "yes", "on")
+
+
+# ==============================================================================
+# 2. 单次运行的剖析器 (Run Profiler)
+# ==============================================================================
+class RunProfiler:
+    """收集一次运行中各阶段的 cProfile 数据与内存分配快照。"""
+
+    def __init__(self, task: str):
+        self.task = task
+        self.started_at = datetime.now(timezone.utc)
+        self.run_id = f"{task}-{self.started_at.strftime('%Y%m%d-%H%M%S')}"
+        self.directory = os.path.join(PROFILE_DIR, self.run_id)
+        self._stage_stats = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._peak_bytes = 0
+        self._peak_sites = []
+        self._sampler = None
+
+    # --- cProfile ---
+    @contextmanager
+    def stage(self, name: str):
+        """
+        在当前线程中剖析 with 代码块，结果合并到阶段 name 下。
+        剖析本身出错时（例如 Python 3.12+ 上已有另一个剖析器在运行）不剖析，但代码块照常执行。
+        """
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except Exception as e:
+            if not isinstance(e, ValueError):
+                logger.warning(f"无法剖析阶段 '{name}'，该阶段将不剖析运行: {e}")
+            profile = None
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                try:
+                    with self._lock:
+                        if name in self._stage_stats:
+                            self._stage_stats[name].add(profile)
+                        else:
+                            self._stage_stats[name] = pstats.Stats(profile)
+                except Exception as e:
+                    logger.warning(f"合并阶段 '{name}' 的剖析数据时发生错误: {e}")
+
+    # --- tracemalloc ---
+    def _sample_memory(self):
+        while not self._stop.wait(config.PROFILE_MEMORY_SAMPLE_SECONDS):
+            self._snapshot_if_peak()
+
+    def _snapshot_if_peak(self):
+        current, _ = tracemalloc.get_traced_memory()
+        if current > self._peak_bytes * 1.1:
+            self._peak_bytes = current
+            self._peak_sites = top_allocation_sites(tracemalloc.take_snapshot(), config.PROFILE_TOP_N)
+
+    def start(self):
+        self._metric_counts = {name: t['count'] for name, t in metrics.summary()['timings'].items()}
+        tracemalloc.start(config.PROFILE_TRACEMALLOC_FRAMES)
+        self._started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample_memory, name="profile-memory", daemon=True)
+        self._sampler.start()
+
+    def finish(self) -> str:
+        """停止剖析并写出结果，返回结果目录。"""
+        self._stop.set()
+        self._sampler.join()
+        self._snapshot_if_peak()
+        final_sites = top_allocation_sites(tracemalloc.take_snapshot(), config.PROFILE_TOP_N)
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        os.makedirs(self.directory, exist_ok=True)
+        stages, idle = {}, {}
+        for name, stats in self._stage_stats.items():
+            stats.dump_stats(os.path.join(self.directory, f"{name}.prof"))
+            stages[name] = hottest_functions(stats, config.PROFILE_TOP_N)
+            idle[name] = round(idle_seconds(stats), 3)
+
+        # 指标是进程级累计的，只保留本次运行期间有新样本的那些
+        timings = {
+            name: {**t, 'count': t['count'] - self._metric_counts.get(name, 0)}
+            for name, t in metrics.summary()['timings'].items()
+            if t['count'] > self._metric_counts.get(name, 0)
+        }
+
+        summary = {
+            'run_id': self.run_id,
+            'task': self.task,
+            'started_at': self.started_at.isoformat(),
+            'duration_seconds': round(time.perf_counter() - self._started, 3),
+            'traced_peak_mb': round(traced_peak / 1024 / 1024, 2),
+            'stages': stages,
+            'idle_seconds': idle,
+            'allocations_at_peak': self._peak_sites,
+            'allocations_at_end': final_sites,
+            'timings': timings,
+        }
+        with open(os.path.join(self.directory, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        prune_old_runs(config.PROFILE_KEEP_RUNS)
+        return self.directory
+
+
+def idle_seconds(stats: pstats.Stats) -> float:
+    """阶段线程在锁和 sleep 上等待的总时间。"""
+    return sum(tottime for (_, _, func), (_, _, tottime, _, _) in stats.stats.items() if func in IDLE_FUNCTIONS)
+
+
+def hottest_functions(stats: pstats.Stats, top: int) -> list[dict]:
+    """按函数自身耗时 (tottime) 排序，返回最热的 top 个函数（不含空闲等待）。"""
+    rows = []
+    for (filename, line, func), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        if func in IDLE_FUNCTIONS:
+            continue
+        rows.append({
+            'function': f"{func} ({os.path.basename(filename)}:{line})" if line else func,
+            'ncalls': ncalls,
+            'tottime': round(tottime, 4),
+            'cumtime': round(cumtime, 4),
+        })
+    rows.sort(key=lambda row: row['tottime'], reverse=True)
+    return rows[:top]
+
+
+def top_allocation_sites(snapshot: tracemalloc.Snapshot, top: int) -> list[dict]:
+    """按分配位置汇总快照，返回占用最多的 top 个位置（剖析器自身的分配除外）。"""
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, module.__file__) for module in (tracemalloc, cProfile, pstats)
+    ] + [tracemalloc.Filter(False, __file__)])
+    sites = []
+    for stat in snapshot.statistics("traceback")[:top]:
+        frame = stat.traceback[-1]
+        sites.append({
+            'site': f"{os.path.basename(frame.filename)}:{frame.lineno}",
+            'size_kb': round(stat.size / 1024, 1),
+            'count': stat.count,
+            # tracemalloc 的调用栈从最外层排到最内层，这里保留最内层的5帧，由内向外
+            'traceback': [f"{os.path.basename(f.filename)}:{f.lineno}" for f in list(stat.traceback)[::-1][:5]],
+        })
+    return sites
+
+
+def prune_old_runs(keep: int):
+    """只保留最近 keep 次运行的剖析结果。"""
+    for run_dir in list_run_dirs()[keep:]:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+
+# ==============================================================================
+# 3. 接入点 (Hooks)
+# ==============================================================================
+@contextmanager
+def profile_run(task: str, enabled: bool | None = None):
+    """
+    剖析一次完整的运行。enabled 为 None 时由环境变量 ATHENA_PROFILE 决定。
+    同一时间只剖析一个运行；嵌套调用时内层直接执行。
+    """
+    global _active_run
+    if enabled is None:
+        enabled = is_enabled_by_env()
+    with _active_lock:
+        if not enabled or _active_run is not None:
+            run = None
+        else:
+            run = _active_run = RunProfiler(task)
+    if run is None:
+        yield None
+        return
+
+    logger.info(f"性能剖析已开启，本次运行的结果将写入 {run.directory}")
+    run.start()
+    try:
+        with run.stage("main"):
+            yield run
+    finally:
+        with _active_lock:
+            _active_run = None
+        try:
+            logger.info(f"性能剖析结果已写入: {run.finish()}")
+        except Exception as e:
+            logger.error(f"写出性能剖析结果时发生错误: {e}", exc_info=True)
+
+
+def stage_profile(name: str):
+    """
+    流水线阶段的工作线程调用: 开启剖析时在本线程内剖析，否则什么也不做。
+    剖析失败时只是不剖析，不会抛出异常，阶段本身 (以及它结束时的 STAGE_DONE 通知) 总会执行。
+    """
+    run = _active_run
+    return run.stage(name) if run is not None else nullcontext()
+
+
+def profiled(task: str):
+    """
+    装饰器: 为入口函数增加一个仅限关键字的 profile 参数 (True/False/None)，
+    None 表示由环境变量 ATHENA_PROFILE 决定是否剖析。
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, profile: bool | None = None, **kwargs):
+            with profile_run(task, enabled=profile):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ==============================================================================
+# 4. 读取与汇总 (Reading & Aggregation)
+# ==============================================================================
+def list_run_dirs() -> list[str]:
+    """按时间从新到旧列出所有剖析结果目录。"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    dirs = [
+        os.path.join(PROFILE_DIR, name) for name in os.listdir(PROFILE_DIR)
+        if os.path.isfile(os.path.join(PROFILE_DIR, name, "summary.json"))
+    ]
+    return sorted(dirs, key=lambda d: os.path.getmtime(os.path.join(d, "summary.json")), reverse=True)
+
+
+def load_summaries(last: int, task: str | None = None) -> list[dict]:
+    """读取最近 last 次运行的 summary.json（可按任务名过滤），从新到旧排列。"""
+    summaries = []
+    for run_dir in list_run_dirs():
+        with open(os.path.join(run_dir, "summary.json"), encoding="utf-8") as f:
+            summary = json.load(f)
+        if task and summary.get('task') != task:
+            continue
+        summaries.append(summary)
+        if len(summaries) >= last:
+            break
+    return summaries
+
+
+def aggregate(summaries: list[dict], top: int) -> dict:
+    """
+    汇总多次运行: 热点函数按 (阶段, 函数) 累加自身耗时，分配位置取各次运行峰值时的最大占用。
+    返回 {'functions': [...], 'allocations': [...]}，均已按从大到小排序并截断为 top 条。
+    """
+    functions = {}
+    for summary in summaries:
+        for stage, rows in summary.get('stages', {}).items():
+            for row in rows:
+                entry = functions.setdefault((stage, row['function']), {
+                    'stage': stage, 'function': row['function'], 'tottime': 0.0, 'cumtime': 0.0, 'ncalls': 0, 'runs': 0,
+                })
+                entry['tottime'] += row['tottime']
+                entry['cumtime'] += row['cumtime']
+                entry['ncalls'] += row['ncalls']
+                entry['runs'] += 1
+
+    allocations = {}
+    for summary in summaries:
+        for site in summary.get('allocations_at_peak', []):
+            entry = allocations.setdefault(site['site'], {'site': site['site'], 'size_kb': 0.0, 'runs': 0})
+            entry['size_kb'] = max(entry['size_kb'], site['size_kb'])
+            entry['runs'] += 1
+
+    return {
+        'functions': sorted(functions.values(), key=lambda e: e['tottime'], reverse=True)[:top],
+        'allocations': sorted(allocations.values(), key=lambda e: e['size_kb'], reverse=True)[:top],
+    }
@@ -0,0 +1,148 @@
+# prompt_registry.py (Version 1.0 - Versioned Prompt Registry)
+
+# ==============================================================================
+# 1. 导入工具箱 (Import necessary tools)
+# ==============================================================================
+import glob
+import os
+from string import Formatter
+
+from logger_config import logger
+
+# ==============================================================================
+# "雅典娜"Prompt注册表
+#
+# 启动时一次性加载 prompts/ 目录下的所有 *.prompt 文件，文件名（不含扩展名）即Prompt版本，例如 'summarizer_v2'。
+# 加载时即完成校验与预编译，格式错误的模板会让程序在启动时就失败，而不是在处理到第一篇文章时才报错:
+# - 只允许使用 ALLOWED_PLACEHOLDERS 中的占位符，且必须包含 {clean_content}；
+# - 文件可以用单独一行的 [system] 与 [user] 分成两段。system 段不允许出现占位符，
+#   每次请求都完全相同；文章正文 {clean_content} 必须是 user 段的最后一个占位符。
+#   这样每次请求的开头（system 消息 + user 段中第一个占位符之前的文字）都是同一段静态前缀，
+#   服务商的 Prompt 缓存可以复用它，减少首字延迟和输入token费用；
+# - 没有分段标记的旧模板整体视为 user 段。
+# 模板预先拆分为 (文字, 占位符) 片段，渲染时直接拼接，不再每次解析格式字符串。
+# ==============================================================================
+
+PROMPT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
+PROMPT_EXTENSION = ".prompt"
+
+ALLOWED_PLACEHOLDERS = {"source_name", "title", "clean_content"}
+ARTICLE_PLACEHOLDER = "clean_content"
+SECTION_MARKERS = {"[system]": "system", "[user]": "user"}
+
+
+class PromptError(ValueError):
+    """Prompt模板格式错误。"""
+
+
+# ==============================================================================
+# 2. 单个模板 (Prompt Template)
+# ==============================================================================
+def split_sections(text: str) -> dict[str, str]:
+    """按 [system] / [user] 标记行把模板拆分为两段；没有标记时整个文件为 user 段。"""
+    sections, current, lines = {}, None, []
+    for line in text.splitlines(keepends=True):
+        marker = SECTION_MARKERS.get(line.strip().lower())
+        if marker is None:
+            lines.append(line)
+            continue
+        if current is None:
+            if "".join(lines).strip():
+                raise PromptError("第一个分段标记之前不能有内容。")
+        else:
+            sections[current] = "".join(lines)
+        if marker in sections:
+            raise PromptError(f"[{marker}] 段重复出现。")
+        current, lines = marker, []
+    sections[current or "user"] = "".join(lines)
+    return {name: body.strip("\n") for name, body in sections.items()}
+
+
+def compile_parts(template: str) -> list[tuple[str, str | None]]:
+    """把格式字符串拆分为 (文字, 占位符名) 片段，并校验占位符。"""
+    parts = []
+    try:
+        parsed = list(Formatter().parse(template))
+    except ValueError as e:
+        raise PromptError(f"模板中的花括号不匹配: {e}") from None
+    for literal, field, format_spec, conversion in parsed:
+        if field is not None and (format_spec or conversion):
+            raise PromptError(f"占位符 {{{field}}} 不支持格式说明或转换。")
+        if field is not None and field not in ALLOWED_PLACEHOLDERS:
+            raise PromptError(f"未知的占位符 {{{field}}}，只允许使用: {', '.join(sorted(ALLOWED_PLACEHOLDERS))}。")
+        parts.append((literal, field))
+    return parts
+
+
+class PromptTemplate:
+    """一个经过校验和预编译的Prompt版本。"""
+
+    def __init__(self, version: str, text: str):
+        self.version = version
+        sections = split_sections(text)
+        system = sections.get("system", "")
+        self._user_parts = compile_parts(sections.get("user", ""))
+
+        if any(field for _, field in compile_parts(system)):
+            raise PromptError("[system] 段必须是静态文字，不能包含占位符。")
+        fields = [field for _, field in self._user_parts if field]
+        if ARTICLE_PLACEHOLDER not in fields:
+            raise PromptError(f"模板中缺少文章正文占位符 {{{ARTICLE_PLACEHOLDER}}}。")
+        if fields[-1] != ARTICLE_PLACEHOLDER or fields.count(ARTICLE_PLACEHOLDER) > 1:
+            raise PromptError(f"文章正文 {{{ARTICLE_PLACEHOLDER}}} 必须只出现一次，且是最后一个占位符。")
+
+        self.placeholders = frozenset(fields)
+        self._system_message = {"role": "system", "content": system} if system else None
+        # 每次请求都相同的静态前缀，即可被服务商缓存的部分
+        self.static_prefix = (system + "\n" if system else "") + self._user_parts[0][0]
+
+    def __repr__(self):
+        return f"PromptTemplate({self.version!r})"
+
+    def render_user(self, **values) -> str:
+        """填充 user 段的占位符。"""
+        try:
+            return "".join(literal + (str(values[field]) if field else "") for literal, field in self._user_parts)
+        except KeyError as e:
+            raise PromptError(f"Prompt '{self.version}' 缺少占位符 {e.args[0]} 的值。") from None
+
+    def messages(self, **values) -> list[dict]:
+        """构造一次请求的消息列表: 静态的 system 消息在前，包含文章的 user 消息在后。"""
+        user = {"role": "user", "content": self.render_user(**values)}
+        return [self._system_message, user] if self._system_message else [user]
+
+
+# ==============================================================================
+# 3. 注册表 (Registry)
+# ==============================================================================
+class PromptRegistry:
+    """按版本名称保存所有已加载的Prompt模板。"""
+
+    def __init__(self, templates: dict[str, PromptTemplate]):
+        self.templates = templates
+
+    def get(self, version: str) -> PromptTemplate:
+        try:
+            return self.templates[version]
+        except KeyError:
+            raise PromptError(f"Prompt版本 '{version}' 不存在，可用的版本: {', '.join(sorted(self.templates))}。") from None
+
+    def versions(self) -> list[str]:
+        return sorted(self.templates)
+
+
+def load_registry(directory: str = PROMPT_DIR) -> PromptRegistry:
+    """加载并校验目录下所有的 .prompt 文件。任何一个模板有误都会抛出 PromptError（附带文件名）。"""
+    templates = {}
+    for path in sorted(glob.glob(os.path.join(directory, f"*{PROMPT_EXTENSION}"))):
+        version = os.path.basename(path)[:-len(PROMPT_EXTENSION)]
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        try:
+            templates[version] = PromptTemplate(version, text)
+        except PromptError as e:
+            raise PromptError(f"Prompt文件 {path} 无效: {e}") from None
+    if not templates:
+        raise PromptError(f"目录 {directory} 中没有找到任何 {PROMPT_EXTENSION} 文件。")
+    logger.info(f"已加载 {len(templates)} 个Prompt版本: {', '.join(sorted(templates))}")
+    return PromptRegistry(templates)
@@ -0,0 +1,255 @@
+# quality_filter.py (Version 1.0 - Vectorized Content Quality Filter)
+
+# ==============================================================================
+# 1. 导入工具箱 (Import necessary tools)
+# ==============================================================================
+import re
+
+import numpy as np
+
+import config
+
+# ==============================================================================
+# "雅典娜"正文质量过滤
+#
+# 正文提取原来只检查长度，导航页、付费墙/登录墙的占位页和 Cookie 提示仍然会进入AI摘要，每篇都要花一次调用。
+# 流水线在提取正文之后、摘要之前按小批次调用 evaluate()，用几项廉价的本地检查过滤掉这类页面:
+# - 语言: 按文字系统 (汉字、假名、谚文、拉丁字母、西里尔字母、阿拉伯字母) 判断语言，不依赖额外的模型；
+# - 字符类别占比: 字母（含汉字等）在非空白字符中的占比过低、或数字占比过高的页面多半是导航、表格或乱码；
+# - 重复行占比: 同一行（段落）反复出现，通常是模板化的样板内容；
+# - 付费墙短语: 较短的正文中出现 config.QUALITY_PAYWALL_PHRASES 中的短语，说明只提取到了占位内容。
+# 一个批次的所有正文拼接为一个码点数组，字符分类与按文章计数都是 NumPy 的整体运算，每篇文章的开销可以忽略。
+# 阈值的默认值见 config.QUALITY_THRESHOLDS，每个信源可以单独覆盖 (feeds.quality_thresholds，见 feed_registry.py)。
+# 被拒绝的文章在工作队列中标记为 rejected，并记录原因代码 (REASONS)。
+# ==============================================================================
+
+# 原因代码，按检查顺序排列
+REASONS = ("language", "letter_ratio", "digit_ratio", "duplicate_lines", "paywall")
+
+# 允许写入信源 quality_thresholds 的阈值及其类型
+THRESHOLD_TYPES = {
+    "enabled": bool,
+    "languages": list,
+    "min_letter_ratio": float,
+    "max_digit_ratio": float,
+    "max_duplicate_line_ratio": float,
+    "paywall_max_chars": int,
+}
+
+# 可识别的语言代码
+LANGUAGES = ("zh", "ja", "ko", "latin", "cyrillic", "arabic", "other", "unknown")
+
+# --- 字符类别 (Character Classes) ---
+SPACE, DIGIT, LATIN, HAN, KANA, HANGUL, CYRILLIC, ARABIC, OTHER_LETTER, SYMBOL = range(10)
+N_CLASSES = 10
+LETTER_CLASSES = [LATIN, HAN, KANA, HANGUL, CYRILLIC, ARABIC, OTHER_LETTER]
+
+# 判断语言时，一个汉字/假名/谚文音节大致相当于几个拉丁字母的信息量
+CJK_CHAR_WEIGHT = 3
+# 假名在汉字与假名中的占比达到该值时判为日语，否则判为中文
+KANA_SHARE_FOR_JAPANESE = 0.1
+
+
+def _in(codes: np.ndarray, *ranges: tuple[int, int]) -> np.ndarray:
+    mask = np.zeros(codes.shape, dtype=bool)
+    for low, high in ranges:
+        mask |= (codes >= low) & (codes <= high)
+    return mask
+
+
+def classify_codepoints(codes: np.ndarray) -> np.ndarray:
+    """把一组 Unicode 码点分为上面的字符类别。"""
+    conditions = [
+        _in(codes, (0, 32), (0x7F, 0xA0), (0x2000, 0x200B), (0x2028, 0x2029), (0x3000, 0x3000)),
+        _in(codes, (0x30, 0x39), (0xFF10, 0xFF19)),
+        _in(codes, (0x41, 0x5A), (0x61, 0x7A), (0xC0, 0xD6), (0xD8, 0xF6), (0xF8, 0x24F),
+            (0x1E00, 0x1EFF), (0xFF21, 0xFF3A), (0xFF41, 0xFF5A)),
+        _in(codes, (0x3400, 0x4DBF), (0x4E00, 0x9FFF), (0xF900, 0xFAFF), (0x20000, 0x2FFFF)),
+        _in(codes, (0x3040, 0x309F), (0x30A0, 0x30FF), (0x31F0, 0x31FF), (0xFF66, 0xFF9D)),
+        _in(codes, (0x1100, 0x11FF), (0x3130, 0x318F), (0xAC00, 0xD7AF)),
+        _in(codes, (0x400, 0x4FF)),
+        _in(codes, (0x600, 0x6FF), (0x750, 0x77F)),
+        _in(codes, (0x370, 0x3FF), (0x590, 0x5FF), (0x900, 0xEFF)),
+    ]
+    choices = [SPACE, DIGIT, LATIN, HAN, KANA, HANGUL, CYRILLIC, ARABIC, OTHER_LETTER]
+    return np.select(conditions, choices, default=SYMBOL).astype(np.uint8)
+
+
+# 基本多文种平面 (U+0000 - U+FFFF) 的类别查找表，分类时只需一次索引；平面之外只有扩展汉字需要单独判断
+_BMP_CLASSES = classify_codepoints(np.arange(0x10000, dtype=np.uint32))
+
+
+def codepoint_classes(codes: np.ndarray) -> np.ndarray:
+    classes = _BMP_CLASSES[np.minimum(codes, 0xFFFF)]
+    astral = codes > 0xFFFF
+    if astral.any():
+        classes[astral] = np.where((codes[astral] >= 0x20000) & (codes[astral] <= 0x2FFFF), HAN, SYMBOL)
+    return classes
+
+
+# ==============================================================================
+# 2. 批量特征 (Batched Features)
+# ==============================================================================
+def char_class_counts(texts: list[str]) -> np.ndarray:
+    """每篇正文中各字符类别的数量，形状为 (文章数, N_CLASSES)。"""
+    lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+    # surrogatepass: 网页中偶尔有不成对的代理字符，照样按一个码点计数，保证与 len(text) 一致
+    codes = np.frombuffer("".join(texts).encode("utf-32-le", "surrogatepass"), dtype="<u4")
+    doc_ids = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+    keys = doc_ids * N_CLASSES + codepoint_classes(codes)
+    return np.bincount(keys, minlength=len(texts) * N_CLASSES).reshape(len(texts), N_CLASSES)
+
+
+def detect_languages(counts: np.ndarray) -> list[str]:
+    """按各文字系统的字符数判断每篇正文的语言。"""
+    cjk = (counts[:, HAN] + counts[:, KANA]) * CJK_CHAR_WEIGHT
+    scripts = np.stack([
+        cjk,
+        counts[:, HANGUL] * CJK_CHAR_WEIGHT,
+        counts[:, LATIN],
+        counts[:, CYRILLIC],
+        counts[:, ARABIC],
+        counts[:, OTHER_LETTER],
+    ], axis=1)
+    dominant = scripts.argmax(axis=1)
+    kana_share = counts[:, KANA] / np.maximum(counts[:, HAN] + counts[:, KANA], 1)
+    names = np.array(["zh", "ko", "latin", "cyrillic", "arabic", "other"], dtype=object)[dominant]
+    names[(dominant == 0) & (kana_share >= KANA_SHARE_FOR_JAPANESE)] = "ja"
+    names[scripts.sum(axis=1) == 0] = "unknown"
+    return names.tolist()
+
+
+def duplicate_line_ratios(texts: list[str]) -> np.ndarray:
+    """每篇正文中重复出现的非空行占全部非空行的比例（每行第一次出现不算重复）。"""
+    hashes, doc_ids = [], []
+    for i, text in enumerate(texts):
+        lines = [line.strip() for line in text.splitlines()]
+        line_hashes = [hash(line) for line in lines if line]
+        hashes.extend(line_hashes)
+        doc_ids.extend([i] * len(line_hashes))
+    if not hashes:
+        return np.zeros(len(texts))
+    hashes = np.array(hashes, dtype=np.int64)
+    doc_ids = np.array(doc_ids, dtype=np.int64)
+    order = np.lexsort((hashes, doc_ids))
+    hashes, doc_ids = hashes[order], doc_ids[order]
+    repeated = (hashes[1:] == hashes[:-1]) & (doc_ids[1:] == doc_ids[:-1])
+    duplicates = np.bincount(doc_ids[1:][repeated], minlength=len(texts))
+    totals = np.bincount(doc_ids, minlength=len(texts))
+    return duplicates / np.maximum(totals, 1)
+
+
+_paywall_pattern = None
+_paywall_phrases = None
+
+
+def paywall_pattern() -> re.Pattern | None:
+    """
+    由 config.QUALITY_PAYWALL_PHRASES 编译的正则表达式，配置变化时重新编译。
+    短语统一转为小写，匹配时对小写的正文搜索，比 re.IGNORECASE 快得多。
+    """
+    global _paywall_pattern, _paywall_phrases
+    phrases = tuple(config.QUALITY_PAYWALL_PHRASES)
+    if phrases != _paywall_phrases:
+        _paywall_phrases = phrases
+        _paywall_pattern = (re.compile("|".join(re.escape(phrase.lower()) for phrase in phrases))
+                            if phrases else None)
+    return _paywall_pattern
+
+
+def paywall_hits(texts: list[str], candidates: np.ndarray | None = None) -> np.ndarray:
+    """每篇正文中付费墙短语出现的次数。candidates 为需要检查的文章 (布尔数组)，其余记为0。"""
+    hits = np.zeros(len(texts), dtype=np.int64)
+    pattern = paywall_pattern()
+    if pattern is None:
+        return hits
+    indices = range(len(texts)) if candidates is None else np.flatnonzero(candidates)
+    for i in indices:
+        hits[i] = len(pattern.findall(texts[i].lower()))
+    return hits
+
+
+# ==============================================================================
+# 3. 阈值与判定 (Thresholds & Verdicts)
+# ==============================================================================
+def validate_quality_thresholds(thresholds: dict | None) -> dict | None:
+    """
+    校验信源的质量阈值，只允许 THRESHOLD_TYPES 中的阈值。命令行传入的字符串会被转换为对应的类型，
+    languages 可以是列表或逗号分隔的字符串。
+    """
+    if not thresholds:
+        return None
+    validated = {}
+    for key, value in thresholds.items():
+        expected = THRESHOLD_TYPES.get(key)
+        if expected is None:
+            raise ValueError(f"未知的质量阈值 '{key}'，可选: {', '.join(sorted(THRESHOLD_TYPES))}。")
+        if expected is list:
+            value = [part.strip() for part in value.split(",") if part.strip()] if isinstance(value, str) else value
+            unknown = set(value or []) - set(LANGUAGES)
+            if not isinstance(value, list) or unknown:
+                raise ValueError(f"质量阈值 'languages' 应为语言代码列表，可选: {', '.join(LANGUAGES)}。")
+        elif expected is bool:
+            if not isinstance(value, bool):
+                raise ValueError(f"质量阈值 '{key}' 应为 true 或 false。")
+        else:
+            try:
+                value = expected(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"质量阈值 '{key}' 应为 {expected.__name__} 类型。") from None
+        validated[key] = value
+    return validated
+
+
+def merged_thresholds(overrides: dict | None) -> dict:
+    """全局默认阈值 (config.QUALITY_THRESHOLDS) 与信源设置合并后的阈值。"""
+    return {**config.QUALITY_THRESHOLDS, **(overrides or {})}
+
+
+def evaluate(texts: list[str], thresholds: list[dict | None] | None = None) -> list[dict]:
+    """
+    批量检查一组正文。thresholds 为每篇正文所属信源的阈值覆盖 (可以为 None)。
+    返回与 texts 一一对应的结果字典:
+    reasons (未通过的检查的原因代码列表，为空表示通过)、language、letter_ratio、digit_ratio、
+    duplicate_line_ratio 与 paywall_hits。
+    """
+    if not texts:
+        return []
+    settings = [merged_thresholds(overrides) for overrides in (thresholds or [None] * len(texts))]
+
+    counts = char_class_counts(texts)
+    visible = np.maximum(counts.sum(axis=1) - counts[:, SPACE], 1)
+    letter_ratio = counts[:, LETTER_CLASSES].sum(axis=1) / visible
+    digit_ratio = counts[:, DIGIT] / visible
+    duplicate_ratio = duplicate_line_ratios(texts)
+    languages = detect_languages(counts)
+    lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+
+    def column(key):
+        return np.array([s[key] if s[key] is not None else np.nan for s in settings], dtype=float)
+
+    # 付费墙短语只在足够短的正文中才有意义，长文章不必搜索
+    short = lengths <= column('paywall_max_chars')
+    hits = paywall_hits(texts, short)
+
+    enabled = np.array([s.get('enabled', True) for s in settings], dtype=bool)
+    failed = {
+        "language": np.array([bool(s['languages']) and language not in s['languages']
+                              for s, language in zip(settings, languages)], dtype=bool),
+        # 阈值为 None 时与 NaN 比较结果为 False，即不检查该项
+        "letter_ratio": letter_ratio < column('min_letter_ratio'),
+        "digit_ratio": digit_ratio > column('max_digit_ratio'),
+        "duplicate_lines": duplicate_ratio > column('max_duplicate_line_ratio'),
+        "paywall": short & (hits > 0),
+    }
+    return [
+        {
+            'reasons': [reason for reason in REASONS if failed[reason][i]] if enabled[i] else [],
+            'language': languages[i],
+            'letter_ratio': float(letter_ratio[i]),
+            'digit_ratio': float(digit_ratio[i]),
+            'duplicate_line_ratio': float(duplicate_ratio[i]),
+            'paywall_hits': int(hits[i]),
+        }
+        for i in range(len(texts))
+    ]
@@ -0,0 +1,135 @@
+# reextract.py (Version 1.0 - Offline Re-extraction)
+
+# ==============================================================================
+# 1. 导入工具箱 (Import necessary tools)
+# ==============================================================================
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Iterator
+
+import trafilatura
+from sqlalchemy import select, update
+
+import config
+from feed_registry import feed_settings
+from html_cache import HtmlCache
+from models import ArticleQueueItem, BriefingItem, Feed, OriginalContent
+from logger_config import logger
+
+# ==============================================================================
+# "雅典娜"正文重新提取任务 (`python manage.py reextract`)
+#
+# 调整正文提取选项或最小长度后，根据网页快照缓存 (html_cache.py) 离线重建 original_contents 中的正文，
+# 不需要重新下载任何网页:
+# - 主进程按原文ID分块读取有快照的原文 (keyset 分页)；
+# - 解压与 trafilatura 提取都是CPU密集型的，交给进程池 (默认使用全部CPU核心) 并行完成，
+#   子进程只读取快照文件，不访问数据库；
+# - 每篇原文使用其所属信源的提取选项与最小长度 (见 feed_registry.py)，信源通过文章的队列记录、
+#   或信源名称找到；命令行指定的选项与最小长度只覆盖同名的设置；
+# - 提取结果与原来不同时才写回，每块一个短事务；全文索引由触发器自动同步。
+# 新正文短于最小长度、或快照已被淘汰的原文保持不变，只计入统计。
+# 摘要不会随之改变，如需根据新正文重新生成摘要，请再运行 `python manage.py resummarize`。
+# ==============================================================================
+
+
+def extract_snapshot(task: tuple) -> tuple[int, str, str | None]:
+    """
+    在子进程中执行: 读取一个快照并提取正文。task 为 (原文ID, 快照哈希, 缓存目录, 最小长度, 提取选项)。
+    返回 (原文ID, 结果, 新正文)，结果为 'ok' / 'missing' / 'empty' / 'short'。
+    """
+    content_id, digest, directory, min_length, options = task
+    html = HtmlCache(directory, max_bytes=0).get(digest)
+    if html is None:
+        return content_id, "missing", None
+    text = trafilatura.extract(html, **options)
+    if not text:
+        return content_id, "empty", None
+    if len(text) < min_length:
+        return content_id, "short", None
+    return content_id, "ok", text
+
+
+def stream_snapshots(session_factory, chunk_size: int, since: datetime | None = None,
+                     until: datetime | None = None, source: str | None = None) -> Iterator[list[tuple]]:
+    """
+    按原文ID分块读取 (原文ID, 快照哈希, 当前正文, RSS源地址, 信源名称)，每块使用一个新的短会话。
+    RSS源地址来自文章的队列记录，队列记录已被清理时为 None。
+    """
+    after_id = 0
+    while True:
+        query = (
+            select(OriginalContent.id, OriginalContent.html_hash, OriginalContent.content_text,
+                   ArticleQueueItem.feed_url, BriefingItem.source_name)
+            .join(BriefingItem, BriefingItem.id == OriginalContent.briefing_id)
+            .outerjoin(ArticleQueueItem, ArticleQueueItem.url == BriefingItem.source_url)
+            .where(OriginalContent.id > after_id, OriginalContent.html_hash.is_not(None))
+        )
+        if since is not None:
+            query = query.where(BriefingItem.created_at >= since)
+        if until is not None:
+            query = query.where(BriefingItem.created_at < until)
+        if source:
+            query = query.where(BriefingItem.source_name == source)
+        with session_factory() as db_session:
+            rows = db_session.execute(query.order_by(OriginalContent.id).limit(chunk_size)).all()
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1][0]
+
+
+def load_feed_settings(session_factory) -> tuple[dict[str, dict], dict[str, dict]]:
+    """读取所有信源的设置，返回 (按RSS源地址索引, 按信源名称索引) 两个字典。"""
+    now = datetime.now(timezone.utc)
+    with session_factory() as db_session:
+        feeds = [feed_settings(feed, now) for feed in db_session.scalars(select(Feed).order_by(Feed.id))]
+    return {feed['url']: feed for feed in feeds}, {feed['name']: feed for feed in feeds if feed['name']}
+
+
+def run_reextract(session_factory, directory: str, min_length: int | None = None, options: dict | None = None,
+                  workers: int | None = None, chunk_size: int | None = None, dry_run: bool = False,
+                  **filters) -> dict[str, int]:
+    """
+    用进程池重新提取所有有快照的原文，返回各结果的数量:
+    updated（已更新）、unchanged（与原来相同）、short / empty（新正文不可用，保持原样）、missing（快照已被淘汰）。
+    每篇原文使用所属信源的设置；min_length 与 options 不为空时覆盖信源设置中的同名项。
+    dry_run=True 时只统计，不写回数据库。filters 见 stream_snapshots。
+    """
+    options = options or {}
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or config.REEXTRACT_CHUNK_SIZE
+    counts = {'updated': 0, 'unchanged': 0, 'short': 0, 'empty': 0, 'missing': 0}
+    feeds_by_url, feeds_by_name = load_feed_settings(session_factory)
+    logger.info(f"开始重新提取正文: 快照目录 {directory}，{workers} 个进程，"
+                f"最小长度 {min_length if min_length is not None else '按信源设置'}，"
+                f"提取选项 {options or '按信源设置'}{'，只统计不写入' if dry_run else ''}。")
+
+    def task_for(content_id: int, digest: str, feed_url: str | None, source_name: str | None) -> tuple:
+        feed = feeds_by_url.get(feed_url) or feeds_by_name.get(source_name) or {}
+        length = min_length if min_length is not None else feed.get('min_content_length', config.MIN_CONTENT_LENGTH)
+        return content_id, digest, directory, length, {**feed.get('extract_options', {}), **options}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for rows in stream_snapshots(session_factory, chunk_size, **filters):
+            current = {row[0]: row[2] for row in rows}
+            tasks = [task_for(content_id, digest, feed_url, source_name)
+                     for content_id, digest, _, feed_url, source_name in rows]
+            changed = []
+            for content_id, result, text in pool.map(extract_snapshot, tasks,
+                                                     chunksize=max(1, len(tasks) // (workers * 4))):
+                if result != "ok":
+                    counts[result] += 1
+                elif text == current[content_id]:
+                    counts['unchanged'] += 1
+                else:
+                    counts['updated'] += 1
+                    changed.append({'id': content_id, 'content_text': text})
+            if changed and not dry_run:
+                with session_factory() as db_session:
+                    db_session.execute(update(OriginalContent), changed)
+                    db_session.commit()
+            logger.info(f"已处理到原文 #{rows[-1][0]}: {counts}")
+
+    logger.info(f"重新提取完成: {counts}")
+    return counts
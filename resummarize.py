@@ -0,0 +1,185 @@
+# resummarize.py (Version 1.0 - Re-summarization Backfill)
+
+# ==============================================================================
+# 1. 导入工具箱 (Import necessary tools)
+# ==============================================================================
+from datetime import datetime
+from typing import Callable, Iterator
+
+from sqlalchemy import select, func, and_
+from sqlalchemy.orm import aliased
+from sqlalchemy.exc import IntegrityError
+
+import config
+import metrics
+from models import BriefingItem, OriginalContent, SummaryVersion
+from pipeline_stages import make_queue, start_source, start_map, drain
+from logger_config import logger, article_logger
+
+# ==============================================================================
+# "雅典娜"摘要重新生成任务 (`python manage.py resummarize`)
+#
+# 修改Prompt或更换模型后，无需重置数据库、重新下载文章，直接根据 original_contents 中保存的原文重新生成摘要:
+# - 按摘要ID分块读取原文 (keyset 分页，每块 RESUMMARIZE_CHUNK_SIZE 条，每块使用一个新的短会话)，
+#   经有界队列交给多个工作线程并发调用AI，内存占用与数据总量无关；
+# - 新摘要以 (Prompt版本, 模型) 为键写入 summary_versions 表，每条一个短事务，读取方不受影响；
+# - 已经有当前Prompt版本、且由当前模型池中的模型生成的版本的摘要会被跳过，任务中断后重新运行即可继续；
+# - 指定 activate=True 时，新版本同时替换摘要表中的当前摘要（旧摘要先保存为一个版本）；
+#   之前未启用时已经保存过的版本直接启用，不再调用AI。
+# 实际调用AI的函数由调用方传入（见 manage.py），本模块本身不依赖模型配置。
+# ==============================================================================
+
+# 引入Prompt版本之前生成的摘要没有记录版本，被替换时以此名称保存
+UNVERSIONED = "unversioned"
+
+
+# ==============================================================================
+# 2. 读取候选摘要 (Streaming Candidates)
+# ==============================================================================
+def candidate_query(after_id: int, prompt_version: str, models: list[str], chunk_size: int,
+                    since: datetime | None = None, until: datetime | None = None,
+                    source: str | None = None, model: str | None = None, activate: bool = False):
+    """
+    构造一块候选摘要的查询: ID 大于 after_id、满足过滤条件、且当前摘要不是由 prompt_version 和 models 之一生成的摘要。
+    activate=False 时还会跳过已经保存了 (prompt_version, models 之一) 版本的摘要；activate=True 时保留它们，
+    查询结果的最后两列为已保存版本的模型与摘要 (没有则为 NULL)，以便直接启用。
+    since/until 按摘要的创建时间过滤 (until 不包含)，source 按信源名称，model 按当前摘要所用的模型。
+    """
+    stored = aliased(SummaryVersion)
+    stored_id = (
+        select(func.min(SummaryVersion.id))
+        .where(
+            SummaryVersion.briefing_id == BriefingItem.id,
+            SummaryVersion.prompt_version == prompt_version,
+            SummaryVersion.model.in_(models),
+        )
+        .correlate(BriefingItem)
+        .scalar_subquery()
+    )
+    # 旧摘要的 prompt_version 为 NULL，比较结果也是 NULL，因此用 IS NOT TRUE 而不是 NOT
+    current = and_(BriefingItem.prompt_version == prompt_version, BriefingItem.model_used.in_(models))
+    query = (
+        select(BriefingItem.id, BriefingItem.source_url, BriefingItem.source_name, OriginalContent.content_text,
+               stored.model, stored.summary_text)
+        .join(OriginalContent, OriginalContent.briefing_id == BriefingItem.id)
+        .outerjoin(stored, stored.id == stored_id)
+        .where(BriefingItem.id > after_id, current.is_not(True))
+    )
+    if not activate:
+        query = query.where(stored.id.is_(None))
+    if since is not None:
+        query = query.where(BriefingItem.created_at >= since)
+    if until is not None:
+        query = query.where(BriefingItem.created_at < until)
+    if source:
+        query = query.where(BriefingItem.source_name == source)
+    if model:
+        query = query.where(BriefingItem.model_used == model)
+    return query.order_by(BriefingItem.id).limit(chunk_size)
+
+
+def stream_candidates(session_factory, prompt_version: str, models: list[str], chunk_size: int,
+                      limit: int | None = None, **filters) -> Iterator[dict]:
+    """逐块读取候选摘要及其原文并逐条产出，最多 limit 条。"""
+    after_id, produced = 0, 0
+    while limit is None or produced < limit:
+        size = chunk_size if limit is None else min(chunk_size, limit - produced)
+        with session_factory() as db_session:
+            rows = db_session.execute(candidate_query(after_id, prompt_version, models, size, **filters)).all()
+        if not rows:
+            return
+        for briefing_id, url, source_name, content_text, stored_model, stored_text in rows:
+            yield {'briefing_id': briefing_id, 'url': url, 'source_name': source_name, 'clean_content': content_text,
+                   'stored_model': stored_model, 'stored_text': stored_text}
+        after_id = rows[-1][0]
+        produced += len(rows)
+
+
+# ==============================================================================
+# 3. 写入版本 (Saving Versions)
+# ==============================================================================
+def _add_version_if_missing(db_session, briefing_id: int, prompt_version: str, model: str, summary_text: str):
+    present = db_session.scalar(select(SummaryVersion.id).where(
+        SummaryVersion.briefing_id == briefing_id,
+        SummaryVersion.prompt_version == prompt_version,
+        SummaryVersion.model == model,
+    ))
+    if present is None:
+        db_session.add(SummaryVersion(briefing_id=briefing_id, prompt_version=prompt_version,
+                                      model=model, summary_text=summary_text))
+
+
+def save_version(db_session, briefing_id: int, prompt_version: str, model: str, summary_text: str,
+                 activate: bool = False) -> bool:
+    """
+    在一个短事务中保存一个摘要版本。activate=True 时同时把它设为摘要表中的当前摘要 (该版本已保存过时直接启用)，
+    被替换的旧摘要保存为一个版本。该版本已存在（例如另一个进程同时在运行）时返回 False。
+    """
+    try:
+        if not activate:
+            db_session.add(SummaryVersion(briefing_id=briefing_id, prompt_version=prompt_version,
+                                          model=model, summary_text=summary_text))
+        else:
+            _add_version_if_missing(db_session, briefing_id, prompt_version, model, summary_text)
+            briefing = db_session.get(BriefingItem, briefing_id)
+            _add_version_if_missing(db_session, briefing_id, briefing.prompt_version or UNVERSIONED,
+                                    briefing.model_used or "unknown", briefing.summary_text)
+            briefing.summary_text = summary_text
+            briefing.model_used = model
+            briefing.prompt_version = prompt_version
+        db_session.commit()
+        return True
+    except IntegrityError:
+        db_session.rollback()
+        return False
+
+
+# ==============================================================================
+# 4. 主流程 (Job)
+# ==============================================================================
+def run_resummarize(session_factory, summarize: Callable[[dict], dict | None], prompt_version: str,
+                    models: list[str], activate: bool = False, limit: int | None = None,
+                    workers: int | None = None, chunk_size: int | None = None, **filters) -> int:
+    """
+    为满足过滤条件的历史摘要重新生成摘要，返回保存 (activate=True 时为启用) 的版本数量。
+    summarize(article) 与 ai_core.summarize_article 的接口相同；models 为当前模型池中的模型名称，
+    用于判断哪些摘要已经重新生成过。filters 见 candidate_query。
+    """
+    workers = workers or config.SUMMARIZE_WORKERS
+    chunk_size = chunk_size or config.RESUMMARIZE_CHUNK_SIZE
+    logger.info(f"开始重新生成摘要: Prompt版本 {prompt_version}，模型 {', '.join(models)}，"
+                f"过滤条件 {({k: v for k, v in filters.items() if v}) or '无'}，"
+                f"{'替换当前摘要' if activate else '只保存新版本'}。")
+
+    def summarize_one(article: dict):
+        # 之前只保存未启用的版本可以直接启用
+        if article['stored_model'] is not None:
+            return article['briefing_id'], article['stored_model'], article['stored_text']
+        processed = summarize(article)
+        if processed is None:
+            return None
+        summary = processed['summary_data']
+        return article['briefing_id'], summary['model_used'], summary['summary_text']
+
+    candidates_q = make_queue(config.PIPELINE_QUEUE_SIZE)
+    results_q = make_queue(config.PIPELINE_QUEUE_SIZE)
+    start_source("resummarize-read",
+                 lambda: stream_candidates(session_factory, prompt_version, models, chunk_size, limit,
+                                           activate=activate, **filters),
+                 candidates_q)
+    start_map("resummarize", summarize_one, candidates_q, results_q, workers=workers)
+
+    # 写入在当前线程中串行进行，每条一个短事务
+    saved = 0
+    with session_factory() as db_session:
+        for briefing_id, model, summary_text in drain(results_q):
+            with metrics.timed("stage.resummarize-save"):
+                if save_version(db_session, briefing_id, prompt_version, model, summary_text, activate=activate):
+                    saved += 1
+                    article_logger.info(f"已{'启用' if activate else '保存'}摘要 #{briefing_id} 的新版本 "
+                                        f"({prompt_version}, {model})。")
+            if saved and saved % 100 == 0:
+                logger.info(f"已重新生成 {saved} 条摘要...")
+
+    logger.info(f"重新生成摘要完成，共{'启用' if activate else '保存'} {saved} 个新版本。")
+    return saved
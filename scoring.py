@@ -0,0 +1,127 @@
+# scoring.py (Version 1.0 - Priority Scoring & Budgeted Selection)
+
+# ==============================================================================
+# 1. 导入工具箱 (Import necessary tools)
+# ==============================================================================
+import math
+import threading
+from datetime import datetime, timezone
+
+import config
+
+# ==============================================================================
+# "雅典娜"优先级评分模块
+#
+# 位于 fetch_and_clean_articles 与 summarize_article 之间，是一个纯本地、几乎零成本的阶段:
+# 1. 根据时效性、信源权重、正文长度和兴趣关键词为每篇候选文章打分；
+# 2. 估算每篇文章调用AI所需的token数；
+# 3. 按分数从高到低，在本次运行的全局预算 (config.RUN_TOKEN_BUDGET) 内挑选文章。
+# 这样无论RSS源列表增长到多大，每次运行的AI花费和耗时都是有上限的。
+# ==============================================================================
+
+
+# ==============================================================================
+# 2. 单项评分 (Individual Scores, each in [0, 1])
+# ==============================================================================
+def recency_score(published_at: datetime | None, now: datetime) -> float:
+    """按指数衰减计算时效分: 刚发布为1，每经过一个半衰期减半。发布时间未知时给0.5的中性分。"""
+    if published_at is None:
+        return 0.5
+    if published_at.tzinfo is None:
+        # SQLite 读回的时间不带时区信息，项目中所有时间均以UTC存储
+        published_at = published_at.replace(tzinfo=timezone.utc)
+    age_hours = max((now - published_at).total_seconds() / 3600, 0.0)
+    return 0.5 ** (age_hours / config.RECENCY_HALF_LIFE_HOURS)
+
+
+def length_score(content: str) -> float:
+    """按对数曲线计算长度分: 内容越充实分数越高，达到 IDEAL_CONTENT_LENGTH 即为满分。"""
+    length = len(content or "")
+    if length <= 0:
+        return 0.0
+    return min(math.log1p(length) / math.log1p(config.IDEAL_CONTENT_LENGTH), 1.0)
+
+
+def keyword_score(article: dict) -> float:
+    """计算兴趣关键词得分: 命中关键词的权重之和，标题命中计双倍，最终截断到1。"""
+    if not config.INTEREST_KEYWORDS:
+        return 0.0
+    title = (article.get('title') or "").lower()
+    content = (article.get('clean_content') or "").lower()
+    total = 0.0
+    for keyword, weight in config.INTEREST_KEYWORDS.items():
+        keyword = keyword.lower()
+        if keyword in title:
+            total += 2 * weight
+        elif keyword in content:
+            total += weight
+    return min(total, 1.0)
+
+
+def source_weight(article: dict) -> float:
+    """
+    查找文章所属信源的权重: 优先使用信源注册表中设置的权重 (article['source_weight']，见 feed_registry.py)，
+    未设置时在 config.SOURCE_WEIGHTS 中按RSS链接、再按信源名称匹配，默认为1.0。
+    """
+    if article.get('source_weight') is not None:
+        return article['source_weight']
+    weights = config.SOURCE_WEIGHTS
+    if article.get('feed_url') in weights:
+        return weights[article['feed_url']]
+    return weights.get(article.get('source_name'), 1.0)
+
+
+def score_article(article: dict, now: datetime | None = None) -> float:
+    """计算一篇文章的综合优先级分数。"""
+    now = now or datetime.now(timezone.utc)
+    w = config.SCORE_WEIGHTS
+    base = (
+        w.get("recency", 0) * recency_score(article.get('published_at'), now)
+        + w.get("length", 0) * length_score(article.get('clean_content'))
+        + w.get("keywords", 0) * keyword_score(article)
+    )
+    return source_weight(article) * base
+
+
+# ==============================================================================
+# 3. 成本估算与token预算 (Cost Estimation & Token Budget)
+# ==============================================================================
+def estimate_tokens(article: dict) -> int:
+    """估算为一篇文章生成摘要所需的token数（输入正文 + Prompt开销 + 输出上限）。"""
+    content_tokens = math.ceil(len(article.get('clean_content') or "") / config.CHARS_PER_TOKEN)
+    return content_tokens + config.PROMPT_OVERHEAD_TOKENS + config.SUMMARY_MAX_TOKENS
+
+
+class TokenBudget:
+    """
+    一次运行中线程安全的全局token预算。
+    流式流水线中文章按分数从高到低依次到达，每篇文章调用AI前先尝试扣除其估算花费；
+    放不下的文章被跳过，后面更小的文章仍可使用剩余的预算。
+    剩余预算连最小的一篇文章 (空正文的估算花费) 都放不下时，预算视为用尽。
+    """
+
+    def __init__(self, total: int | None):
+        self.total = total
+        self.spent = 0
+        self.skipped = 0
+        self.min_cost = estimate_tokens({})
+        self.exhausted = total is not None and total < self.min_cost
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self) -> int | None:
+        """剩余的token数；不限制预算时为 None。"""
+        return None if self.total is None else self.total - self.spent
+
+    def try_spend(self, tokens: int) -> bool:
+        """尝试扣除 tokens，成功返回 True；放不下时返回 False，但不影响之后更小的扣除。"""
+        if self.total is None:
+            return True
+        with self._lock:
+            if self.spent + tokens > self.total:
+                self.skipped += 1
+                return False
+            self.spent += tokens
+            if self.total - self.spent < self.min_cost:
+                self.exhausted = True
+            return True
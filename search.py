@@ -0,0 +1,232 @@
+# search.py (Version 1.0 - SQLite FTS5 Full-Text Search)
+
+# ==============================================================================
+# 1. 导入工具箱 (Import necessary tools)
+# ==============================================================================
+import sqlite3
+from contextlib import nullcontext
+from datetime import datetime
+
+from sqlalchemy import text, bindparam, DateTime
+from sqlalchemy.engine import Connection
+
+from logger_config import logger
+
+# ==============================================================================
+# "雅典娜"全文检索模块
+#
+# 在 SQLite 中维护一张 FTS5 虚拟表 `briefings_fts`，其 rowid 与 briefings.id 一一对应，
+# 同时索引摘要、原文和信源名称。表内容由触发器与 briefings / original_contents
+# 的增删改保持同步，业务代码无需关心索引维护。
+#
+# 由于绝大多数内容是中文，默认使用 FTS5 自带的 `trigram` 分词器（SQLite >= 3.34），
+# 它按三字符切分，天然支持中日韩文本的子串检索；旧版本 SQLite 会退回 `unicode61`。
+# ==============================================================================
+
+FTS_TABLE = "briefings_fts"
+
+# trigram 分词器无法匹配少于3个字符的检索词，这类词会退化为 LIKE 过滤。
+TRIGRAM_MIN_TERM_LENGTH = 3
+
+# bm25 各列权重，顺序与建表列顺序一致: 摘要 > 原文 > 信源名称
+BM25_WEIGHTS = (2.0, 1.0, 0.5)
+
+
+def _fts_tokenizer() -> str:
+    """根据当前 SQLite 版本选择可用的分词器。"""
+    if sqlite3.sqlite_version_info >= (3, 34, 0):
+        return "trigram"
+    return "unicode61"
+
+
+def _create_statements() -> list[str]:
+    """返回创建 FTS 虚拟表及同步触发器的全部 DDL 语句。"""
+    return [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            summary_text, content_text, source_name,
+            tokenize='{_fts_tokenizer()}'
+        )
+        """,
+        # --- briefings 表的同步触发器 ---
+        f"""
+        CREATE TRIGGER IF NOT EXISTS briefings_fts_ai AFTER INSERT ON briefings BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, summary_text, content_text, source_name)
+            VALUES (new.id, new.summary_text, '', coalesce(new.source_name, ''));
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS briefings_fts_au AFTER UPDATE OF summary_text, source_name ON briefings BEGIN
+            UPDATE {FTS_TABLE}
+               SET summary_text = new.summary_text, source_name = coalesce(new.source_name, '')
+             WHERE rowid = new.id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS briefings_fts_ad AFTER DELETE ON briefings BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        END
+        """,
+        # --- original_contents 表的同步触发器 (原文挂在对应摘要的同一行上) ---
+        f"""
+        CREATE TRIGGER IF NOT EXISTS original_contents_fts_ai AFTER INSERT ON original_contents BEGIN
+            UPDATE {FTS_TABLE} SET content_text = new.content_text WHERE rowid = new.briefing_id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS original_contents_fts_au AFTER UPDATE OF content_text, briefing_id ON original_contents BEGIN
+            UPDATE {FTS_TABLE} SET content_text = '' WHERE rowid = old.briefing_id;
+            UPDATE {FTS_TABLE} SET content_text = new.content_text WHERE rowid = new.briefing_id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS original_contents_fts_ad AFTER DELETE ON original_contents BEGIN
+            UPDATE {FTS_TABLE} SET content_text = '' WHERE rowid = old.briefing_id;
+        END
+        """,
+    ]
+
+
+# ==============================================================================
+# 2. 索引的创建、重建与删除 (Index Lifecycle)
+# ==============================================================================
+def _begin(bind):
+    """
+    兼容 Engine 与 Connection 两种入参:
+    Engine 会开启一个新事务；Connection（例如 Alembic 迁移中的连接）则直接复用其当前事务。
+    """
+    if isinstance(bind, Connection):
+        return nullcontext(bind)
+    return bind.begin()
+
+
+def ensure_search_index(bind) -> bool:
+    """
+    确保全文索引及其触发器存在。
+    如果索引是本次新建的，会立即从现有数据回填，并返回 True。
+    """
+    with _begin(bind) as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE},
+        ).first()
+        for statement in _create_statements():
+            conn.execute(text(statement))
+
+    if exists:
+        return False
+
+    count = rebuild_search_index(bind)
+    logger.info(f"全文索引 '{FTS_TABLE}' 已创建，并回填了 {count} 条记录。")
+    return True
+
+
+def rebuild_search_index(bind) -> int:
+    """清空并根据 briefings / original_contents 的当前内容重建全文索引。返回索引的行数。"""
+    with _begin(bind) as conn:
+        conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+        result = conn.execute(text(f"""
+            INSERT INTO {FTS_TABLE}(rowid, summary_text, content_text, source_name)
+            SELECT b.id, b.summary_text, coalesce(o.content_text, ''), coalesce(b.source_name, '')
+              FROM briefings AS b
+              LEFT JOIN original_contents AS o ON o.briefing_id = b.id
+        """))
+        return result.rowcount
+
+
+def drop_search_index(bind):
+    """删除全文索引表（触发器随 briefings / original_contents 一同维护，这里显式删除以防残留）。"""
+    with _begin(bind) as conn:
+        for trigger in ("briefings_fts_ai", "briefings_fts_au", "briefings_fts_ad",
+                        "original_contents_fts_ai", "original_contents_fts_au", "original_contents_fts_ad"):
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+
+
+# ==============================================================================
+# 3. 查询 (Querying)
+# ==============================================================================
+def split_query_terms(query: str) -> tuple[list[str], list[str]]:
+    """
+    将用户输入拆分为两组检索词:
+    - 可以交给 FTS5 MATCH 的词 (trigram 下至少3个字符)
+    - 过短、只能通过 LIKE 过滤的词
+    """
+    terms = [term for term in query.split() if term]
+    if _fts_tokenizer() != "trigram":
+        return terms, []
+    match_terms = [t for t in terms if len(t) >= TRIGRAM_MIN_TERM_LENGTH]
+    like_terms = [t for t in terms if len(t) < TRIGRAM_MIN_TERM_LENGTH]
+    return match_terms, like_terms
+
+
+def build_match_expression(terms: list[str]) -> str:
+    """
+    将检索词转换为安全的 FTS5 MATCH 表达式。
+    每个词都被作为短语加上双引号（内部双引号转义），多个词之间是 AND 关系，
+    这样用户输入中的 `-`、`:`、`*` 等字符就不会被误解析为 FTS5 语法。
+    """
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def search_briefings(conn, query: str, source: str | None = None,
+                     since: datetime | None = None, until: datetime | None = None,
+                     limit: int = 20) -> list[dict]:
+    """
+    在全文索引中检索摘要与原文，返回按相关度排序的结果列表。
+
+    每条结果是一个字典，包含 id、source_name、source_url、created_at、
+    score（bm25 分数，越小越相关）与 snippet（命中片段，命中词以【】标出）。
+    """
+    match_terms, like_terms = split_query_terms(query)
+    if not match_terms and not like_terms:
+        return []
+
+    conditions = []
+    params = {"limit": limit}
+
+    if match_terms:
+        conditions.append(f"{FTS_TABLE} MATCH :match")
+        params["match"] = build_match_expression(match_terms)
+        score_sql = f"bm25({FTS_TABLE}, {', '.join(str(w) for w in BM25_WEIGHTS)})"
+        snippet_sql = f"snippet({FTS_TABLE}, -1, '【', '】', '…', 24)"
+        order_sql = "score ASC, b.created_at DESC"
+    else:
+        # 没有可用于 MATCH 的词时，无法使用 bm25/snippet 辅助函数，改为按时间排序
+        score_sql = "0.0"
+        snippet_sql = f"substr({FTS_TABLE}.summary_text, 1, 80)"
+        order_sql = "b.created_at DESC"
+
+    for i, term in enumerate(like_terms):
+        key = f"like_{i}"
+        conditions.append(
+            f"({FTS_TABLE}.summary_text LIKE :{key} OR {FTS_TABLE}.content_text LIKE :{key})"
+        )
+        params[key] = f"%{term}%"
+
+    if source:
+        conditions.append("b.source_name = :source")
+        params["source"] = source
+    if since:
+        conditions.append("b.created_at >= :since")
+        params["since"] = since
+    if until:
+        conditions.append("b.created_at < :until")
+        params["until"] = until
+
+    statement = text(f"""
+        SELECT b.id, b.source_name, b.source_url, b.created_at,
+               {score_sql} AS score, {snippet_sql} AS snippet
+          FROM {FTS_TABLE}
+          JOIN briefings AS b ON b.id = {FTS_TABLE}.rowid
+         WHERE {' AND '.join(conditions)}
+         ORDER BY {order_sql}
+         LIMIT :limit
+    """)
+    # 日期参数需要经过 SQLAlchemy 的 DateTime 类型处理，才能与ORM写入的格式保持一致
+    date_params = [bindparam(name, type_=DateTime) for name in ("since", "until") if name in params]
+    if date_params:
+        statement = statement.bindparams(*date_params)
+
+    rows = conn.execute(statement, params).mappings().all()
+    return [dict(row) for row in rows]
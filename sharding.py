@@ -0,0 +1,205 @@
+# sharding.py (Version 1.0 - Sharded Feed Collection)
+
+# ==============================================================================
+# 1. 导入工具箱 (Import necessary tools)
+# ==============================================================================
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update, delete, or_
+
+import config
+from digest import as_utc
+from models import WorkerNode, WorkerLease
+from work_queue import insert_ignore, retry_on_lock
+from logger_config import logger
+
+# ==============================================================================
+# "雅典娜"分片采集
+#
+# 信源数量达到数千个时，一个进程采集不过来。分片模式下可以在一台或多台机器上同时运行多个工作进程
+# (`python data_pipeline.py --worker`)，所有协调都通过共享的数据库完成，不需要额外的服务:
+# - 每个信源按URL的稳定哈希 (BLAKE2b，不受 PYTHONHASHSEED 影响) 落入 config.FEED_SHARDS 个分片之一；
+# - 每个工作进程在 worker_nodes 表中登记并定期刷新心跳。根据当前存活的进程列表，
+#   每个进程用最高随机权重哈希 (rendezvous hashing) 算出自己应负责的分片: 进程加入或退出时，
+#   只有约 1/N 的分片需要换手，其余分片保持不动；
+# - 分片的归属以 worker_leases 表中的租约为准: 进程只采集自己持有有效租约的分片，随心跳续租，
+#   不再负责的分片主动释放，新的负责人在下一次心跳时接手。进程崩溃后，它的心跳与租约在
+#   config.SHARD_LEASE_SECONDS 后过期，分片自动分配给其余进程。
+# 文章的下载、摘要与入库本来就通过带租约的工作队列 (work_queue.py) 进行，任意进程都可以处理任意文章。
+# ==============================================================================
+
+# 心跳过期超过这么多个租约时长的进程记录会被删除
+STALE_NODE_LEASES = 10
+
+
+def stable_hash(value: str) -> int:
+    """与进程无关的64位哈希。"""
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def feed_shard(url: str, shards: int | None = None) -> int:
+    """信源所属的分片编号。"""
+    return stable_hash(url) % (shards or config.FEED_SHARDS)
+
+
+def assign_shards(workers: list[str], shards: int) -> dict[str, set[int]]:
+    """按最高随机权重哈希把分片分配给工作进程，每个进程的计算结果一致。"""
+    assignment = {worker: set() for worker in workers}
+    if not workers:
+        return assignment
+    for shard in range(shards):
+        owner = max(workers, key=lambda worker: stable_hash(f"{worker}/{shard}"))
+        assignment[owner].add(shard)
+    return assignment
+
+
+# ==============================================================================
+# 2. 协调器 (Coordinator)
+# ==============================================================================
+class ShardCoordinator:
+    """
+    维护一个工作进程的心跳与分片租约。start() 后在后台线程中定期调用 heartbeat()；
+    owns_feed(url) 判断当前是否应由本进程采集该信源。
+    """
+
+    def __init__(self, session_factory, worker_id: str, shards: int | None = None,
+                 lease_seconds: int | None = None, heartbeat_seconds: float | None = None):
+        self.session_factory = session_factory
+        self.worker_id = worker_id
+        self.shards = shards or config.FEED_SHARDS
+        self.lease_seconds = lease_seconds or config.SHARD_LEASE_SECONDS
+        self.heartbeat_seconds = heartbeat_seconds or config.SHARD_HEARTBEAT_SECONDS
+        self._owned: frozenset[int] = frozenset()
+        # 最近一次成功续租时租约的到期时间 (time.monotonic)，心跳持续失败时不再认为自己持有任何分片
+        self._valid_until = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._leases_created = False
+
+    @property
+    def owned(self) -> frozenset[int]:
+        return self._owned if time.monotonic() < self._valid_until else frozenset()
+
+    def owns_feed(self, url: str) -> bool:
+        return feed_shard(url, self.shards) in self.owned
+
+    # --- 单次心跳 ---
+    @retry_on_lock
+    def heartbeat(self, now: datetime | None = None) -> frozenset[int]:
+        """
+        刷新本进程的心跳，按存活进程列表计算应负责的分片: 释放不再负责的分片，
+        接手空闲或租约已过期的分片，续租仍在负责的分片。返回续租后持有的分片。
+        """
+        started = time.monotonic()
+        now = now or datetime.now(timezone.utc)
+        expires = now + timedelta(seconds=self.lease_seconds)
+        with self.session_factory() as db_session:
+            try:
+                self._register(db_session, now, expires)
+                workers = list(db_session.scalars(
+                    select(WorkerNode.worker_id).where(WorkerNode.expires_at > now).order_by(WorkerNode.worker_id)
+                ))
+                wanted = assign_shards(workers, self.shards).get(self.worker_id, set())
+
+                # 先释放不再负责的分片，新的负责人可以在它的下一次心跳时接手
+                db_session.execute(
+                    update(WorkerLease)
+                    .where(WorkerLease.owner == self.worker_id, WorkerLease.shard.not_in(wanted))
+                    .values(owner=None, expires_at=None)
+                )
+                owned = db_session.scalars(
+                    update(WorkerLease)
+                    .where(WorkerLease.shard.in_(wanted),
+                           or_(WorkerLease.owner == self.worker_id, WorkerLease.owner.is_(None),
+                               WorkerLease.expires_at < now))
+                    .values(owner=self.worker_id, heartbeat_at=now, expires_at=expires)
+                    .returning(WorkerLease.shard)
+                ).all()
+                db_session.commit()
+            except Exception:
+                db_session.rollback()
+                raise
+
+        self._leases_created = True
+        previous, self._owned = self._owned, frozenset(owned)
+        self._valid_until = started + self.lease_seconds
+        if self._owned != previous:
+            logger.info(f"工作进程 {self.worker_id}: 存活进程 {len(workers)} 个，"
+                        f"本进程持有 {len(self._owned)}/{len(wanted)} 个应负责的分片 (共 {self.shards} 个)。")
+        return self._owned
+
+    def _register(self, db_session, now: datetime, expires: datetime):
+        """登记本进程并刷新心跳；同时确保每个分片都有一行租约。"""
+        if not self._leases_created:
+            db_session.execute(insert_ignore(db_session, WorkerLease.__table__, ('shard',)),
+                               [{'shard': shard} for shard in range(self.shards)])
+        refreshed = db_session.execute(
+            update(WorkerNode).where(WorkerNode.worker_id == self.worker_id)
+            .values(heartbeat_at=now, expires_at=expires)
+        ).rowcount
+        if not refreshed:
+            db_session.add(WorkerNode(worker_id=self.worker_id, started_at=now, heartbeat_at=now, expires_at=expires))
+            db_session.flush()
+        # 失联很久的进程不再显示在 `manage.py workers status` 中
+        db_session.execute(delete(WorkerNode).where(
+            WorkerNode.expires_at < now - timedelta(seconds=self.lease_seconds * STALE_NODE_LEASES)))
+
+    # --- 后台线程 ---
+    def start(self):
+        """登记并开始心跳。先等待一个心跳周期，让同时启动的进程互相看到，减少分片来回换手。"""
+        self._heartbeat_safely()
+        self._stop.wait(min(self.heartbeat_seconds, config.SHARD_SETTLE_SECONDS))
+        self._heartbeat_safely()
+        self._thread = threading.Thread(target=self._run, name="shard-heartbeat", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.heartbeat_seconds):
+            self._heartbeat_safely()
+
+    def _heartbeat_safely(self):
+        try:
+            self.heartbeat()
+        except Exception as e:
+            logger.warning(f"工作进程 {self.worker_id} 心跳失败: {e}")
+
+    @retry_on_lock
+    def stop(self):
+        """停止心跳并立即交还所有分片，其余进程不必等待租约过期。"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._owned, self._valid_until = frozenset(), 0.0
+        with self.session_factory() as db_session:
+            db_session.execute(update(WorkerLease).where(WorkerLease.owner == self.worker_id)
+                               .values(owner=None, expires_at=None))
+            db_session.execute(delete(WorkerNode).where(WorkerNode.worker_id == self.worker_id))
+            db_session.commit()
+        logger.info(f"工作进程 {self.worker_id} 已退出并交还所有分片。")
+
+
+# ==============================================================================
+# 3. 状态 (Status)
+# ==============================================================================
+def cluster_status(db_session, now: datetime | None = None) -> list[dict]:
+    """列出已登记的工作进程、是否存活以及各自持有的有效分片数量。"""
+    now = now or datetime.now(timezone.utc)
+    held = {}
+    for owner, in db_session.execute(
+        select(WorkerLease.owner).where(WorkerLease.owner.is_not(None), WorkerLease.expires_at > now)
+    ):
+        held[owner] = held.get(owner, 0) + 1
+    nodes = db_session.scalars(select(WorkerNode).order_by(WorkerNode.started_at)).all()
+    return [
+        {
+            'worker_id': node.worker_id,
+            'alive': node.expires_at is not None and as_utc(node.expires_at) > now,
+            'shards': held.get(node.worker_id, 0),
+            'started_at': node.started_at,
+            'heartbeat_at': node.heartbeat_at,
+        }
+        for node in nodes
+    ]
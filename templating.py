@@ -10,22 +10,27 @@ from collections import defaultdict
 ATHENA_ICON_BASE64 = "data:image/svg+xml;base64,PHN2ZyB4bWxucz0iaHR0cDovL3d3dy53My5vcmcvMjAwMC9zdmciIHdpZHRoPSIyNCIgaGVpZ2h0PSIyNCIgdmlld0JveD0iMCAwIDI0IDI0IiBmaWxsPSJub25lIiBzdHJva2U9IiM1NTUiIHN0cm9rZS13aWR0aD0iMS41IiBzdHJva2UtbGluZWNhcD0icm91bmQiIHN0cm9rZS1saW5lam9pbj0icm91bmQiIGNsYXNzPSJsdWNpZGUgbHVjaWRlLW93bCI+PHBhdGggZD0iTTIyIDggYy0uODYtMi4zMy00LjE2LTMtNy0zLTMuNjMgMC02Ljc1IDEuMjQtNyA1Ljg3QTYuODcgNi44NyAwIDAgMCA4LjUgMjEuNUg5YTYgNiAwIDAgMCA2LTZWMjEiLz48cGF0aCBkPSJNNyAxM2gyIi8+PHBhdGggZD0iTTIwIDEzYTQgNCAwIDAgMC04IDBaIi8+PC9zdmc+"
 
 
-def create_html_content(briefing_items: list[BriefingItem]) -> str:
+def create_html_content(briefing_items: list[BriefingItem], groups: list[tuple[str, list]] = None,
+                        date_label: str = None) -> str:
     """
     生成一份带品牌标识、按来源分组、设计优雅的HTML邮件。
+    如果传入了 groups（[(分组标题, 条目列表), ...]，例如按话题聚类的结果），则按其分组和顺序渲染。
+    date_label 为页眉中显示的日期（例如收件人时区的简报周期），默认为UTC的今天。
     """
-    today_str = datetime.now(timezone.utc).strftime('%Y年%m月%d日')
+    today_str = date_label or datetime.now(timezone.utc).strftime('%Y年%m月%d日')
 
     # ======================================================================
     # --- 核心升级：按来源对文章进行分组 ---
     # ======================================================================
-    grouped_items = defaultdict(list)
-    for item in briefing_items:
-        grouped_items[item.source_name].append(item)
+    if groups is None:
+        grouped_items = defaultdict(list)
+        for item in briefing_items:
+            grouped_items[item.source_name].append(item)
+        groups = list(grouped_items.items())
 
     # --- 动态生成每个分组的HTML片段 ---
     groups_html = ""
-    for source_name, items in grouped_items.items():
+    for source_name, items in groups:
         items_html = ""
         for item in items:
             sanitized_summary = " ".join(str(item.summary_text).split())
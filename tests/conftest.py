@@ -0,0 +1,31 @@
+# tests/conftest.py
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base
+
+
+# ==============================================================================
+# 共享测试夹具: 一个已经建好全部表的临时数据库
+# ==============================================================================
+@pytest.fixture
+def engine(tmp_path):
+    # 流水线的读取、处理与写入常在不同线程中进行。使用临时文件而不是内存数据库，
+    # 与实际运行时一样每个线程有自己的连接 (多个线程共用一个内存数据库连接时，提交会互相干扰)
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def db_session(session_factory):
+    with session_factory() as session:
+        yield session
@@ -0,0 +1,100 @@
+# tests/test_batch_summarizer.py
+
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+# batch_summarizer 在导入时会初始化 ai_core 的模型池，测试中只需要一个不会被调用的默认端点
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("DEFAULT_MODEL", "test-model")
+
+import config
+import batch_summarizer
+from batch_summarizer import parse_result_line, ingest_batch, CUSTOM_ID_PREFIX
+from models import BriefingItem, SummaryBatch, ArticleQueueItem
+from work_queue import enqueue_entries, claim, advance, DISCOVERED, EXTRACTED, SUMMARIZED, STORED
+
+OWNER = "batch-test"
+
+
+def result_line(item_id, content=None, finish_reason="stop", status_code=200, error=None):
+    body = {"choices": [{"message": {"content": content}, "finish_reason": finish_reason}]}
+    if status_code != 200:
+        body = {"error": {"message": "rate limited"}}
+    return json.dumps({
+        "custom_id": f"{CUSTOM_ID_PREFIX}{item_id}",
+        "response": None if error else {"status_code": status_code, "body": body},
+        "error": error,
+    }, ensure_ascii=False)
+
+
+@pytest.fixture
+def held_batch(db_session, monkeypatch):
+    """四篇已提取的文章，由同一个批量任务持有；返回 (批次, 任务ID列表, 设置结果文件内容的函数)。"""
+    enqueue_entries(db_session, [{'url': f"http://example.com/{i}", 'source_name': "测试信源"} for i in range(4)])
+    for item in claim(db_session, DISCOVERED, "extractor", limit=4):
+        advance(db_session, item['id'], "extractor", EXTRACTED, clean_content=f"原文{item['id']}")
+    ids = [item['id'] for item in claim(db_session, EXTRACTED, OWNER, limit=4, lease_seconds=3600)]
+    batch = SummaryBatch(batch_id="batch_1", endpoint="default", model="batch-model", prompt_version="v1",
+                         lease_owner=OWNER, status="completed", output_file_id="out", error_file_id="err")
+    db_session.add(batch)
+    db_session.commit()
+
+    files = {}
+    client = SimpleNamespace(files=SimpleNamespace(content=lambda file_id: SimpleNamespace(text=files.get(file_id, ""))))
+    monkeypatch.setattr(batch_summarizer, "batch_endpoint", lambda name=None: None)
+    monkeypatch.setattr(batch_summarizer, "files_client", lambda endpoint: client)
+    return batch, ids, lambda output, errors=(): files.update(out="\n".join(output), err="\n".join(errors))
+
+
+def test_parse_result_line_handles_errors_and_truncation(monkeypatch):
+    """
+    测试: 正常结果返回摘要；错误行与非200响应返回错误信息；被 max_tokens 截断的摘要只保留完整的句子。
+    """
+    monkeypatch.setattr(config, "SUMMARY_MAX_CHARS", 1000)
+    assert parse_result_line(result_line(7, "一条<br>摘要。")) == (7, "一条 摘要。", None)
+    assert parse_result_line(result_line(8, "第一句话已经完整地说完了。第二句没有写", finish_reason="length")) == \
+        (8, "第一句话已经完整地说完了。", None)
+    assert parse_result_line(result_line(9, status_code=429)) == (9, None, "HTTP 429: rate limited")
+    assert parse_result_line(result_line(10, error={"code": "expired", "message": "过期"})) == \
+        (10, None, "expired: 过期")
+    assert parse_result_line(result_line(11, "   ")) == (11, None, "AI返回了空摘要")
+    assert parse_result_line(json.dumps({"custom_id": "other-1", "error": {"code": "x", "message": "y"}}))[0] is None
+
+
+def test_ingest_batch_stores_fails_and_releases_missing_items(db_session, held_batch):
+    """
+    测试: 取回结果后，成功的文章入库并标记为 stored；失败的文章按普通失败处理；结果中缺失的文章被释放回队列。
+    """
+    batch, ids, set_results = held_batch
+    set_results([result_line(ids[0], "摘要一。"), result_line(ids[3], "摘要四。")],
+                [result_line(ids[1], error={"code": "server_error", "message": "内部错误"})])
+
+    assert ingest_batch(db_session, batch) == 2
+    rows = {row.id: row for row in db_session.query(ArticleQueueItem)}
+    assert [rows[i].state for i in ids] == [STORED, EXTRACTED, EXTRACTED, STORED]
+    assert rows[ids[1]].last_error == "批量摘要失败: server_error: 内部错误"
+    assert all(row.lease_owner is None for row in rows.values())
+    assert rows[ids[2]].lease_expires_at is None and rows[ids[2]].attempts == 0
+    briefings = db_session.query(BriefingItem).order_by(BriefingItem.id).all()
+    assert [(b.summary_text, b.model_used, b.original_content.content_text) for b in briefings] == [
+        ("摘要一。", "batch-model", f"原文{ids[0]}"), ("摘要四。", "batch-model", f"原文{ids[3]}")]
+    assert batch.ingested_at is not None
+
+
+def test_ingest_batch_falls_back_to_summarized_checkpoint_on_conflict(db_session, held_batch):
+    """
+    测试: 批次中有文章已经入库 (URL冲突) 时整批回滚，摘要改为写入 summarized 检查点，不会丢失。
+    """
+    batch, ids, set_results = held_batch
+    db_session.add(BriefingItem(source_url="http://example.com/0", summary_text="已有摘要", source_name="其他"))
+    db_session.commit()
+    set_results([result_line(item_id, f"摘要{item_id}。") for item_id in ids])
+
+    assert ingest_batch(db_session, batch) == 0
+    rows = db_session.query(ArticleQueueItem).order_by(ArticleQueueItem.id).all()
+    assert {row.state for row in rows} == {SUMMARIZED}
+    assert [(row.summary_text, row.model_used) for row in rows] == [(f"摘要{i}。", "batch-model") for i in ids]
+    assert db_session.query(BriefingItem).count() == 1
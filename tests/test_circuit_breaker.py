@@ -0,0 +1,95 @@
+# tests/test_circuit_breaker.py
+
+import os
+from datetime import datetime, timedelta, timezone
+
+# data_pipeline 在导入时会初始化 ai_core 的模型池，测试中只需要一个不会被调用的默认端点
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("DEFAULT_MODEL", "test-model")
+
+import config
+import data_pipeline
+from circuit_breaker import HostBreakers, Deadline, FeedTimeBudgets, breaker_status, CLOSED, OPEN, HALF_OPEN
+from work_queue import enqueue_entries, claim, defer, DISCOVERED
+
+ARTICLE = "https://down.example.com/posts/{}"
+
+
+def test_breaker_trips_after_consecutive_failures_and_persists_across_runs(session_factory):
+    """
+    测试: 同一网站连续失败达到阈值后熔断，其他网站不受影响；熔断状态保存在数据库中，下一次运行读入后仍然生效。
+    """
+    breakers = HostBreakers(session_factory, threshold=3, cooldown_seconds=600)
+    for i in range(2):
+        breakers.record_failure(ARTICLE.format(i), "timeout")
+    assert breakers.allow(ARTICLE.format(9))
+    breakers.record_failure(ARTICLE.format(2), "timeout")
+    assert not breakers.allow(ARTICLE.format(9))
+    assert breakers.allow("https://up.example.com/a")
+
+    with session_factory() as db_session:
+        next_run = HostBreakers(session_factory, threshold=3, cooldown_seconds=600).load(db_session)
+        [host] = breaker_status(db_session, threshold=3)
+    assert next_run.state(ARTICLE.format(9)) == OPEN
+    assert (host['host'], host['consecutive_failures'], host['trip_count']) == ("down.example.com", 3, 1)
+    assert next_run.retry_at(ARTICLE.format(9)) > datetime.now(timezone.utc) + timedelta(seconds=590)
+
+
+def test_half_open_breaker_lets_one_probe_through(session_factory):
+    """
+    测试: 冷却结束后只放行一篇试探；试探失败则重新熔断，试探成功则恢复并清零失败次数。
+    """
+    breakers = HostBreakers(session_factory, threshold=2, cooldown_seconds=60)
+    for i in range(2):
+        breakers.record_failure(ARTICLE.format(i), "HTTP 503")
+    later = datetime.now(timezone.utc) + timedelta(seconds=120)
+
+    assert breakers.state(ARTICLE.format(0), later) == HALF_OPEN
+    assert breakers.allow(ARTICLE.format(5), later) and not breakers.allow(ARTICLE.format(6), later)
+    breakers.record_failure(ARTICLE.format(5), "HTTP 503", now=later)
+    assert breakers.state(ARTICLE.format(0), later) == OPEN
+
+    much_later = later + timedelta(seconds=120)
+    assert breakers.allow(ARTICLE.format(7), much_later)
+    breakers.record_success(ARTICLE.format(7))
+    assert breakers.state(ARTICLE.format(0)) == CLOSED
+    with session_factory() as db_session:
+        [host] = breaker_status(db_session, threshold=2)
+    assert (host['consecutive_failures'], host['failure_count'], host['trip_count']) == (0, 3, 2)
+
+
+def test_deferred_items_and_exhausted_feed_budgets(session_factory):
+    """
+    测试: 被推迟的文章在指定时间之前不会被再次领取，且不消耗重试次数；信源的时间预算按耗时累加。
+    """
+    with session_factory() as db_session:
+        enqueue_entries(db_session, [{'url': ARTICLE.format(1), 'source_name': "测试信源"}])
+        [item] = claim(db_session, DISCOVERED, "worker-a", limit=1)
+        defer(db_session, item['id'], "worker-a", datetime.now(timezone.utc) + timedelta(minutes=5))
+        assert claim(db_session, DISCOVERED, "worker-b", limit=1) == []
+
+    budgets = FeedTimeBudgets(10)
+    budgets.spend("http://feed.example/rss", 6)
+    assert budgets.remaining("http://feed.example/rss") == 4 and not budgets.exhausted("http://feed.example/rss")
+    budgets.spend("http://feed.example/rss", 6)
+    assert budgets.exhausted("http://feed.example/rss")
+    assert not budgets.exhausted("http://other.example/rss") and FeedTimeBudgets(None).remaining("x") is None
+
+
+def test_poller_skips_feeds_when_too_little_time_is_left(monkeypatch):
+    """
+    测试: 剩余时间不足最短有效超时时不再读取RSS (也就不会记为信源的失败)；时间充足时按剩余时间作为超时读取。
+    """
+    monkeypatch.setattr(config, "FEED_MIN_POLL_TIMEOUT_SECONDS", 2)
+    polled = []
+    monkeypatch.setattr(data_pipeline, "poll_feed", lambda feed, timeout=None: polled.append(timeout) or [])
+    feed = {'url': "http://feed.example/rss"}
+
+    budgets = FeedTimeBudgets(10)
+    budgets.spend(feed['url'], 9)
+    assert data_pipeline.make_poller(Deadline(None), budgets)(feed) == []
+    assert data_pipeline.make_poller(Deadline(0.5), FeedTimeBudgets(None))(feed) == []
+    assert polled == []
+
+    data_pipeline.make_poller(Deadline(None), FeedTimeBudgets(10))(feed)
+    assert polled and 2 <= polled[0] <= 10
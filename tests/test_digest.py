@@ -0,0 +1,57 @@
+# tests/test_digest.py
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from models import BriefingItem
+from digest import window_start, window_label, get_mark, sent_in_window, fetch_new_briefings, advance_mark
+
+SHANGHAI = ZoneInfo("Asia/Shanghai")
+
+
+@pytest.mark.parametrize("window, expected, label", [
+    ("hourly", datetime(2026, 3, 5, 7, 0, tzinfo=SHANGHAI), "2026年03月05日 07:00"),
+    ("daily", datetime(2026, 3, 5, 0, 0, tzinfo=SHANGHAI), "2026年03月05日"),
+    ("weekly", datetime(2026, 3, 2, 0, 0, tzinfo=SHANGHAI), "2026年03月02日 - 03月08日"),
+])
+def test_window_start_uses_local_time(window, expected, label):
+    """
+    测试: 周期边界按本地时区计算。北京时间3月5日(周四) 07:30 对应UTC的3月4日，但属于本地的3月5日。
+    """
+    now = datetime(2026, 3, 4, 23, 30, tzinfo=timezone.utc).astimezone(SHANGHAI)
+    start = window_start(now, window)
+    assert start == expected
+    assert window_label(start, window) == label
+
+
+def test_marks_deliver_each_briefing_once(db_session):
+    """
+    测试: 第一次发送从周期起点开始；推进水位线后只会读到之后入库的新摘要，同一周期内视为已发送。
+    """
+    now = datetime(2026, 3, 5, 12, 0, tzinfo=timezone.utc)
+    start = window_start(now, "daily")
+    db_session.add_all([
+        BriefingItem(source_url="http://example.com/old", summary_text="昨天", source_name="A",
+                     created_at=start - timedelta(hours=1)),
+        BriefingItem(source_url="http://example.com/1", summary_text="一", source_name="A",
+                     created_at=start + timedelta(hours=1)),
+        BriefingItem(source_url="http://example.com/2", summary_text="二", source_name="A",
+                     created_at=start + timedelta(hours=2)),
+    ])
+    db_session.commit()
+
+    first = fetch_new_briefings(db_session, None, start, limit=10)
+    assert [b.summary_text for b in first] == ["一", "二"]
+
+    # 只发送了第一条（例如达到单封上限）
+    advance_mark(db_session, "a@example.com", first[0], sent_at=now)
+    mark = get_mark(db_session, "a@example.com")
+    assert sent_in_window(mark, start)
+    assert not sent_in_window(mark, start + timedelta(days=1))
+    assert not sent_in_window(get_mark(db_session, "b@example.com"), start)
+
+    db_session.add(BriefingItem(source_url="http://example.com/3", summary_text="三", source_name="A"))
+    db_session.commit()
+    assert [b.summary_text for b in fetch_new_briefings(db_session, mark, start, limit=10)] == ["二", "三"]
+    assert [b.summary_text for b in fetch_new_briefings(db_session, mark, start, limit=1)] == ["二"]
@@ -0,0 +1,150 @@
+# tests/test_embeddings.py
+
+import numpy as np
+from unittest.mock import Mock
+
+import config
+import embeddings
+from models import BriefingItem, BriefingEmbedding
+from embeddings import pack_vector, unpack_vectors, top_k, group_by_topic, embed_briefings
+
+
+def test_pack_and_unpack_vectors_roundtrip():
+    """
+    测试: 向量以 float32 二进制存储后，可以被批量还原为同样的矩阵。
+    """
+    vectors = np.array([[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]], dtype=np.float32)
+    blobs = [pack_vector(v) for v in vectors]
+
+    assert len(blobs[0]) == 3 * 4  # 每个分量4字节
+    np.testing.assert_array_equal(unpack_vectors(blobs, 3), vectors)
+
+
+def test_top_k_returns_most_similar_rows_in_order():
+    """
+    测试: top_k 应该按相似度从高到低返回前 k 行。
+    """
+    matrix = np.array([[1, 0], [0, 1], [0.8, 0.6], [-1, 0]], dtype=np.float32)
+    rows, scores = top_k(np.array([1, 0], dtype=np.float32), matrix, k=2)
+
+    assert rows.tolist() == [0, 2]
+    assert scores[0] >= scores[1]
+
+
+def test_group_by_topic_clusters_similar_items():
+    """
+    测试: 语义相近的条目被分到同一个话题，不相关的条目单独成组，且保持原有顺序。
+    """
+    items = [Mock(source_name="科技前沿"), Mock(source_name="商业观察"), Mock(source_name="科技日报")]
+    vectors = np.array([[1, 0], [0, 1], [0.95, 0.05]], dtype=np.float32)
+
+    groups = group_by_topic(items, vectors, threshold=0.9)
+
+    assert len(groups) == 2
+    assert groups[0][1] == [items[0], items[2]]
+    assert groups[1][1] == [items[1]]
+    assert "2 篇" in groups[0][0]
+
+
+def test_embed_briefings_never_reembeds_unchanged_text(db_session, monkeypatch):
+    """
+    测试: 文本未变化时应复用缓存的向量，相同文本的不同摘要也只计算一次。
+    """
+    session = db_session
+    items = [
+        BriefingItem(source_url="http://example.com/1", summary_text="同一段摘要", source_name="A"),
+        BriefingItem(source_url="http://example.com/2", summary_text="另一段摘要", source_name="B"),
+    ]
+    session.add_all(items)
+    session.commit()
+
+    fake_embedder = Mock()
+    fake_embedder.embed.side_effect = lambda texts: np.ones((len(texts), 4), dtype=np.float32)
+    monkeypatch.setattr(embeddings, "get_embedder", lambda: fake_embedder)
+
+    first = embed_briefings(session, items)
+    assert fake_embedder.embed.call_count == 1
+    assert set(first) == {items[0].id, items[1].id}
+
+    # 再次调用: 全部命中缓存，不应再调用向量后端
+    embed_briefings(session, items)
+    assert fake_embedder.embed.call_count == 1
+
+    # 新摘要的文本与已有摘要相同: 直接复用已有向量
+    duplicate = BriefingItem(source_url="http://example.com/3", summary_text="同一段摘要", source_name="C")
+    session.add(duplicate)
+    session.commit()
+    embed_briefings(session, [duplicate])
+    assert fake_embedder.embed.call_count == 1
+    assert duplicate.embedding.text_hash == items[0].embedding.text_hash
+
+
+def test_find_related_reuses_index_until_vectors_change(db_session, monkeypatch):
+    """
+    测试: 连续检索复用同一个索引，只有新增或覆盖向量后才重新构建。
+    """
+    session = db_session
+    items = [BriefingItem(source_url=f"http://example.com/{i}", summary_text=f"摘要{i}", source_name="A")
+             for i in range(3)]
+    session.add_all(items)
+    session.commit()
+
+    fake_embedder = Mock()
+    fake_embedder.embed.side_effect = lambda texts: np.random.default_rng(len(texts)).random((len(texts), 4))
+    monkeypatch.setattr(embeddings, "get_embedder", lambda: fake_embedder)
+    monkeypatch.setattr(embeddings, "_cached_index", None)
+    builds = []
+    load_index = embeddings.load_index
+    monkeypatch.setattr(embeddings, "load_index", lambda db: builds.append(1) or load_index(db))
+
+    embed_briefings(session, items)
+    embeddings.find_related(session, items[0].id, k=2)
+    embeddings.find_related(session, items[1].id, k=2)
+    assert len(builds) == 1
+
+    items[2].summary_text = "改写后的摘要"
+    session.commit()
+    related = embeddings.find_related(session, items[2].id, k=2)
+    assert len(builds) == 2 and {item.id for item, _ in related} == {items[0].id, items[1].id}
+
+
+def test_find_related_sees_vectors_written_by_other_processes(db_session, monkeypatch):
+    """
+    测试: 其他进程新增的向量改变数据库中的签名，立即重建索引；原地覆盖的向量在缓存过期后生效。
+    """
+    session = db_session
+    items = [BriefingItem(source_url=f"http://example.com/{i}", summary_text=f"摘要{i}", source_name="A")
+             for i in range(3)]
+    session.add_all(items)
+    session.commit()
+
+    fake_embedder = Mock()
+    fake_embedder.embed.side_effect = lambda texts: np.random.default_rng(len(texts)).random((len(texts), 4))
+    monkeypatch.setattr(embeddings, "get_embedder", lambda: fake_embedder)
+    monkeypatch.setattr(embeddings, "_cached_index", None)
+    monkeypatch.setattr(config, "EMBEDDING_INDEX_TTL_SECONDS", 300)
+    builds = []
+    load_index = embeddings.load_index
+    monkeypatch.setattr(embeddings, "load_index", lambda db: builds.append(1) or load_index(db))
+
+    embed_briefings(session, items[:2])
+    embeddings.find_related(session, items[0].id, k=2)
+    assert len(builds) == 1
+
+    # 绕过 _store_embedding 直接写表，模拟另一个进程写入的向量
+    vector = np.ones(4, dtype=np.float32) / 2
+    session.add(BriefingEmbedding(briefing_id=items[2].id, model=config.EMBEDDING_MODEL, text_hash="x" * 64,
+                                  dim=4, vector=pack_vector(vector)))
+    session.commit()
+    embeddings.find_related(session, items[0].id, k=2)
+    assert len(builds) == 2
+
+    items[0].embedding.vector = pack_vector(-vector)
+    session.commit()
+    embeddings.find_related(session, items[0].id, k=2)
+    assert len(builds) == 2
+
+    signature, built_at, index = embeddings._cached_index
+    monkeypatch.setattr(embeddings, "_cached_index", (signature, built_at - 300, index))
+    embeddings.find_related(session, items[0].id, k=2)
+    assert len(builds) == 3
@@ -0,0 +1,78 @@
+# tests/test_feed_registry.py
+
+import pytest
+from datetime import datetime, timedelta, timezone
+
+import config
+from models import Feed
+from feed_registry import load_feeds, record_poll, add_feed, import_opml
+
+
+@pytest.fixture
+def db_session(db_session, monkeypatch):
+    monkeypatch.setattr(config, "RSS_FEEDS", ["http://a.example/rss", "http://b.example/rss"])
+    monkeypatch.setattr(config, "SOURCE_WEIGHTS", {"http://b.example/rss": 1.5})
+    monkeypatch.setattr(config, "MAX_ARTICLES_PER_FEED", 5)
+    monkeypatch.setattr(config, "MIN_CONTENT_LENGTH", 200)
+    return db_session
+
+
+def test_load_feeds_seeds_config_and_applies_per_source_settings(db_session):
+    """
+    测试: 空注册表从 config 初始化；信源自己的设置覆盖全局默认值；停用或未到采集间隔的信源不需要采集。
+    """
+    feeds = load_feeds(db_session)
+    assert [(f['url'], f['weight'], f['max_articles'], f['min_content_length']) for f in feeds] == [
+        ("http://a.example/rss", None, 5, 200), ("http://b.example/rss", None, 5, 200)]
+
+    add_feed(db_session, "http://b.example/rss", max_articles=20, min_content_length=0,
+             poll_interval_seconds=3600, extract_options={"favor_precision": True})
+    add_feed(db_session, "http://c.example/rss", enabled=False)
+    with pytest.raises(ValueError):
+        add_feed(db_session, "http://d.example/rss", extract_options={"unknown": True})
+    db_session.rollback()
+
+    now = datetime(2026, 3, 5, 12, 0, tzinfo=timezone.utc)
+    db_session.get(Feed, 2).last_polled_at = now - timedelta(minutes=30)
+    db_session.commit()
+
+    feeds = {f['url']: f for f in load_feeds(db_session, now=now)}
+    assert len(feeds) == 3
+    b = feeds["http://b.example/rss"]
+    assert (b['max_articles'], b['min_content_length'], b['extract_options']) == (20, 0, {"favor_precision": True})
+    assert [url for url, f in feeds.items() if f['due']] == ["http://a.example/rss"]
+    assert load_feeds(db_session, now=now + timedelta(hours=1))[1]['due']
+
+
+def test_record_poll_keeps_failure_and_latency_stats(db_session):
+    """
+    测试: 采集统计在数据库中累计；成功后连续失败次数清零，平均耗时为滑动平均。
+    """
+    feed_id = load_feeds(db_session)[0]['id']
+    record_poll(db_session, feed_id, 0.2, 0, error="timeout")
+    record_poll(db_session, feed_id, 0.1, 0, error="timeout")
+    feed = db_session.get(Feed, feed_id)
+    assert (feed.poll_count, feed.failure_count, feed.consecutive_failures, feed.last_error) == (2, 2, 2, "timeout")
+    assert feed.last_success_at is None
+
+    record_poll(db_session, feed_id, 0.1, 7)
+    db_session.refresh(feed)
+    assert (feed.poll_count, feed.failure_count, feed.consecutive_failures) == (3, 2, 0)
+    assert feed.last_error is None and feed.last_entry_count == 7
+    assert feed.avg_latency_ms == pytest.approx(0.7 * (0.7 * 200 + 0.3 * 100) + 0.3 * 100)
+
+
+def test_import_opml_skips_existing_feeds(db_session, tmp_path):
+    """
+    测试: OPML中嵌套的条目都会被导入，重复的地址与已有信源会被跳过。
+    """
+    opml = tmp_path / "feeds.opml"
+    opml.write_text(
+        '<?xml version="1.0"?><opml version="1.0"><body><outline text="科技">'
+        '<outline text="A" xmlUrl="http://a.example/rss"/>'
+        '<outline text="新信源" title="新信源" xmlUrl="http://new.example/rss"/>'
+        '<outline text="重复" xmlUrl="http://new.example/rss"/>'
+        '</outline></body></opml>', encoding="utf-8")
+    load_feeds(db_session)
+    assert import_opml(db_session, str(opml)) == (1, 1)
+    assert db_session.query(Feed).filter_by(url="http://new.example/rss").one().name == "新信源"
@@ -0,0 +1,103 @@
+# tests/test_html_cache.py
+
+import os
+from unittest.mock import Mock
+
+
+import data_collector
+from html_cache import HtmlCache, content_hash
+from models import ArticleQueueItem, BriefingItem, Feed, OriginalContent
+from reextract import run_reextract
+
+
+def page(body: str) -> str:
+    return f"<html><head><title>t</title></head><body><article><p>{body}</p></article></body></html>"
+
+
+def test_snapshots_are_deduplicated_and_evicted_least_recently_used_first(tmp_path):
+    """
+    测试: 相同内容只保存一份；超过大小上限时先淘汰最久未使用的快照，被读取过的快照会保留下来。
+    """
+    cache = HtmlCache(str(tmp_path), max_bytes=10_000_000)
+    pages = [page(f"第{i}篇 " + os.urandom(2000).hex()) for i in range(3)]
+    digests = [cache.put(html) for html in pages]
+    assert cache.put(pages[0]) == digests[0] == content_hash(pages[0])
+    assert cache.stats()['files'] == 3
+    assert cache.get(digests[1]) == pages[1]
+
+    # 按访问顺序设置使用时间: 1 最久未使用，其次是 0，2 最近
+    for age, digest in ((300, digests[1]), (200, digests[0]), (100, digests[2])):
+        os.utime(cache.path_for(digest), (1_000_000 - age, 1_000_000 - age))
+    cache.get(digests[1])  # 读取后变为最近使用
+
+    size = os.path.getsize(cache.path_for(digests[0]))
+    cache.max_bytes = int(size * 3.5)
+    cache.put(page("新的一篇 " + os.urandom(2000).hex()))
+    assert cache.get(digests[0]) is None
+    assert cache.get(digests[1]) == pages[1]
+    assert cache.stats()['bytes'] <= cache.max_bytes
+
+
+def test_reextract_rebuilds_original_content_from_snapshots(tmp_path, session_factory):
+    """
+    测试: 根据快照重新提取正文并写回；过短的新正文与已被淘汰的快照保持原样。
+    """
+    cache = HtmlCache(str(tmp_path))
+    long_text = "这是一段足够长的正文，用于测试重新提取。" * 20
+    factory = session_factory
+    with factory() as db_session:
+        for i, (html_hash, old_text) in enumerate([
+            (cache.put(page(long_text)), "旧正文"),
+            (cache.put(page("太短")), "旧正文"),
+            ("0" * 64, "旧正文"),
+        ]):
+            item = BriefingItem(source_url=f"http://example.com/{i}", summary_text="摘要", source_name="A")
+            item.original_content = OriginalContent(content_text=old_text, html_hash=html_hash)
+            db_session.add(item)
+        db_session.commit()
+
+    counts = run_reextract(factory, str(tmp_path), min_length=100, workers=2, chunk_size=2)
+    assert (counts['updated'], counts['short'], counts['missing']) == (1, 1, 1)
+    with factory() as db_session:
+        texts = [row.content_text for row in db_session.query(OriginalContent).order_by(OriginalContent.id)]
+    assert texts[0].startswith("这是一段足够长的正文") and texts[1:] == ["旧正文", "旧正文"]
+
+    assert run_reextract(factory, str(tmp_path), min_length=100, workers=2)['unchanged'] == 1
+
+
+def test_article_is_still_extracted_when_snapshot_cannot_be_saved(monkeypatch):
+    """
+    测试: 快照缓存写入失败 (例如磁盘已满) 时只记录警告，文章照常提取，html_hash 为 None。
+    """
+    broken_cache = Mock()
+    broken_cache.put.side_effect = OSError(28, "No space left on device")
+    monkeypatch.setattr(data_collector, "default_cache", lambda: broken_cache)
+    monkeypatch.setattr(data_collector, "fetch_url_with_retry",
+                        lambda url: page("这是一段足够长的正文，用于测试快照缓存失败。" * 20))
+
+    article = data_collector.extract_article({'url': "http://example.com/a"}, min_content_length=100)
+    assert article is not None and article['html_hash'] is None
+    assert broken_cache.put.call_count == 1
+
+
+def test_reextract_uses_each_feeds_settings_unless_overridden(tmp_path, session_factory):
+    """
+    测试: 重新提取时每篇原文使用所属信源 (按队列记录或信源名称找到) 的最小长度，命令行参数覆盖信源设置。
+    """
+    cache = HtmlCache(str(tmp_path))
+    factory = session_factory
+    medium_text = "这是一段中等长度的正文。" * 5
+    with factory() as db_session:
+        db_session.add_all([Feed(url="http://short.example/rss", min_content_length=20),
+                            Feed(url="http://named.example/rss", name="短文信源", min_content_length=20)])
+        db_session.add(ArticleQueueItem(url="http://example.com/0", feed_url="http://short.example/rss",
+                                        state="stored", attempts=0))
+        for i, source in enumerate(["某信源", "短文信源", "其他信源"]):
+            item = BriefingItem(source_url=f"http://example.com/{i}", summary_text="摘要", source_name=source)
+            item.original_content = OriginalContent(content_text="旧正文", html_hash=cache.put(page(medium_text)))
+            db_session.add(item)
+        db_session.commit()
+
+    counts = run_reextract(factory, str(tmp_path), workers=1, dry_run=True)
+    assert (counts['updated'], counts['short']) == (2, 1)
+    assert run_reextract(factory, str(tmp_path), min_length=500, workers=1, dry_run=True)['short'] == 3
@@ -0,0 +1,82 @@
+# tests/test_logger_config.py
+
+import json
+import logging
+import queue
+
+import logger_config
+from logger_config import JsonFormatter, RunIdFilter, SampleFilter, _QueueHandler, with_run_id
+
+
+def make_record(level=logging.INFO, msg="处理文章 %s", args=("http://example.com",), exc_info=None):
+    return logging.LogRecord("athena.article", level, __file__, 1, msg, args, exc_info)
+
+
+def test_sample_filter_keeps_warnings():
+    """
+    测试: 抽样比例为0时 INFO 日志全部被丢弃，WARNING 及以上级别始终保留。
+    """
+    sampler = SampleFilter(0.0)
+
+    assert sampler.filter(make_record(logging.INFO)) is False
+    assert sampler.filter(make_record(logging.WARNING)) is True
+    assert SampleFilter(1.0).filter(make_record(logging.INFO)) is True
+
+
+def test_with_run_id_sets_and_restores_correlation_id():
+    """
+    测试: 入口函数执行期间的日志带有新的关联ID，结束后恢复原来的ID。
+    """
+    before = logger_config.get_run_id()
+
+    @with_run_id("pipeline")
+    def run():
+        record = make_record()
+        RunIdFilter().filter(record)
+        return record.run_id
+
+    run_id = run()
+    assert run_id.startswith("pipeline-") and run_id != before
+    assert logger_config.get_run_id() == before
+
+
+def test_queued_record_renders_as_json_with_exception():
+    """
+    测试: 经过队列传递后的日志记录在后台线程中仍能输出完整的JSON，包括关联ID和异常堆栈。
+    """
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        import sys
+        record = make_record(level=logging.ERROR, exc_info=sys.exc_info())
+    record.run_id = "pipeline-test"
+
+    log_queue = queue.SimpleQueue()
+    _QueueHandler(log_queue).emit(record)
+    payload = json.loads(JsonFormatter().format(log_queue.get_nowait()))
+
+    assert payload['message'] == "处理文章 http://example.com"
+    assert payload['run_id'] == "pipeline-test"
+    assert payload['level'] == "ERROR"
+    assert "ValueError: boom" in payload['exc_info']
+
+
+def test_article_logger_follows_root_level_unless_configured(monkeypatch):
+    """
+    测试: 未配置 ARTICLE_LOG_LEVEL 时文章日志沿用根logger的级别；配置后使用单独的级别。
+    """
+    article = logging.getLogger("athena.article")
+    root = logging.getLogger()
+    saved = (article.level, root.level)
+    try:
+        monkeypatch.setattr(logger_config.config, "ARTICLE_LOG_LEVEL", None)
+        logger_config.setup_article_logger()
+        root.setLevel(logging.WARNING)
+        assert not article.isEnabledFor(logging.INFO)
+
+        monkeypatch.setattr(logger_config.config, "ARTICLE_LOG_LEVEL", "INFO")
+        logger_config.setup_article_logger()
+        assert article.isEnabledFor(logging.INFO)
+    finally:
+        article.setLevel(saved[0])
+        root.setLevel(saved[1])
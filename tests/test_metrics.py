@@ -0,0 +1,43 @@
+# tests/test_metrics.py
+
+import pytest
+
+import metrics
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_summary_reports_percentiles_and_counts():
+    """
+    测试: 汇总结果包含正确的样本数、分位数与最大值。
+    """
+    for ms in range(1, 101):
+        metrics.record("stage.demo", ms / 1000)
+    metrics.incr("articles", 3)
+
+    result = metrics.summary()
+    timing = result['timings']['stage.demo']
+
+    assert timing['count'] == 100
+    assert timing['p50'] == pytest.approx(0.050, abs=0.002)
+    assert timing['p99'] == pytest.approx(0.099, abs=0.002)
+    assert timing['max'] == pytest.approx(0.100)
+    assert result['counters'] == {'articles': 3}
+
+
+def test_samples_are_capped(monkeypatch):
+    """
+    测试: 样本数超过上限后改为蓄水池抽样，内存占用有上限，但总次数仍然准确。
+    """
+    monkeypatch.setattr(metrics, "MAX_SAMPLES", 10)
+    for i in range(1000):
+        with metrics.timed("stage.capped"):
+            pass
+
+    assert len(metrics._samples["stage.capped"]) == 10
+    assert metrics.summary()['timings']['stage.capped']['count'] == 1000
@@ -0,0 +1,146 @@
+# tests/test_model_router.py
+
+import time
+
+import httpx
+import pytest
+from openai import APIConnectionError, RateLimitError
+
+import config
+from model_router import Endpoint, ModelRouter, AllEndpointsFailed, read_stream, stream_timeout, trim_to_sentence
+
+REQUEST = httpx.Request("POST", "http://llm.test/v1/chat/completions")
+
+
+class FakeClient:
+    """只实现 client.chat.completions.create 的替身，按顺序返回预设的结果或抛出预设的异常。"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+        self.chat = self
+        self.completions = self
+
+    def create(self, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else f"reply from {kwargs['model']}"
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def endpoint(name, tier, *outcomes, max_concurrency=2):
+    return Endpoint(name, f"{name}-model", FakeClient(*outcomes), tier=tier, max_concurrency=max_concurrency)
+
+
+def test_routes_by_article_length(monkeypatch):
+    """
+    测试: 短文章优先交给 cheap 档位，长文章优先交给 strong 档位。
+    """
+    monkeypatch.setattr(config, "ROUTING_LONG_ARTICLE_CHARS", 1000)
+    router = ModelRouter([endpoint("strong", "strong"), endpoint("cheap", "cheap")])
+
+    _, served_short = router.complete(200, messages=[])
+    _, served_long = router.complete(5000, messages=[])
+
+    assert served_short.name == "cheap"
+    assert served_long.name == "strong"
+
+
+def test_fails_over_and_reports_serving_endpoint():
+    """
+    测试: 首选端点连接失败时立即转给下一个端点，返回的是实际完成请求的端点，失败会计入错误率。
+    """
+    flaky = endpoint("flaky", "cheap", APIConnectionError(request=REQUEST))
+    backup = endpoint("backup", "strong")
+    router = ModelRouter([flaky, backup])
+
+    response, served = router.complete(100, messages=[])
+
+    assert served is backup and response == "reply from backup-model"
+    assert flaky.error_rate > 0 and flaky.consecutive_failures == 1
+
+
+def test_rate_limited_endpoint_cools_down():
+    """
+    测试: 被限流的端点按 Retry-After 冷却，冷却期间排在所有端点之后；全部失败时抛出 AllEndpointsFailed。
+    """
+    limited = RateLimitError("slow down", response=httpx.Response(429, headers={"retry-after": "30"}, request=REQUEST),
+                             body=None)
+    cheap = endpoint("cheap", "cheap", limited)
+    strong = endpoint("strong", "strong", APIConnectionError(request=REQUEST))
+    router = ModelRouter([cheap, strong])
+
+    with pytest.raises(AllEndpointsFailed):
+        router.complete(100, messages=[])
+
+    assert cheap.cooling_down()
+    assert [e.name for e in router.candidates(100)][-1] == "cheap"
+
+
+def test_saturated_endpoint_overflows_to_next():
+    """
+    测试: 首选端点的并发槽位已满时，请求溢出到下一个有空闲槽位的端点。
+    """
+    cheap = endpoint("cheap", "cheap", max_concurrency=1)
+    strong = endpoint("strong", "strong")
+    router = ModelRouter([cheap, strong])
+
+    assert cheap.try_acquire()  # 模拟另一个线程正在使用 cheap
+    _, served = router.complete(100, messages=[])
+    cheap.release()
+
+    assert served is strong and cheap.client.calls == 0
+
+
+class FakeStream:
+    """模拟SDK的流式响应: 可迭代的 chunk 序列，记录是否被关闭。"""
+
+    def __init__(self, pieces):
+        from openai.types.chat import ChatCompletionChunk
+        self.chunks = [
+            ChatCompletionChunk.model_validate({
+                "id": "c", "object": "chat.completion.chunk", "created": 0, "model": "m",
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+            })
+            for piece in pieces
+        ]
+        self.consumed = 0
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.consumed += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+def test_stream_is_aborted_at_length_cap(monkeypatch):
+    """
+    测试: 流式输出超过字符上限时立即中止并关闭连接，截断后的摘要只保留完整的句子。
+    """
+    monkeypatch.setattr(config, "SUMMARY_MAX_CHARS", 12)
+    stream = FakeStream(["第一句话说完了。", "第二句", "没结束", "永远不会被读取"])
+
+    result = read_stream(stream, time.perf_counter())
+
+    assert result['finish_reason'] == "length_cap"
+    assert stream.closed and stream.consumed == 3
+    assert result['ttft'] <= result['total']
+    assert trim_to_sentence(result["text"]) == "第一句话说完了。"
+
+
+def test_stream_of_empty_chunks_is_aborted_at_time_cap(monkeypatch):
+    """
+    测试: 只有空内容 (保活) 块的流在超过时间上限后同样被中止，读取超时不超过时间上限。
+    """
+    monkeypatch.setattr(config, "SUMMARY_MAX_SECONDS", 5)
+    stream = FakeStream(["", "", "", "迟到的内容"])
+
+    result = read_stream(stream, time.perf_counter() - 10)
+
+    assert result['finish_reason'] == "time_cap"
+    assert stream.closed and stream.consumed == 1 and result['text'] == ""
+    assert stream_timeout().read == 5
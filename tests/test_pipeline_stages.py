@@ -0,0 +1,72 @@
+# tests/test_pipeline_stages.py
+
+import threading
+import time
+
+from pipeline_stages import make_queue, start_source, start_map, start_batch, start_task, drain
+
+
+def test_stages_stream_all_items_through_bounded_queues():
+    """
+    测试: 数据经过 源 -> 一对多映射 -> 多线程映射 -> 批处理 各阶段后全部到达终点，
+    返回 None 的数据被丢弃，队列容量远小于数据量也不会死锁。
+    """
+    source_q, expanded_q, mapped_q, batched_q = (make_queue(2) for _ in range(4))
+
+    start_source("source", lambda: range(10), source_q)
+    start_map("expand", lambda n: [n, n + 100], source_q, expanded_q, workers=2, flatten=True)
+    start_map("filter", lambda n: None if n % 2 else n * 10, expanded_q, mapped_q, workers=3)
+    start_batch("batch", lambda batch: [sum(batch)] if batch else [], mapped_q, batched_q,
+                batch_size=4, max_wait=0.05)
+
+    total = sum(drain(batched_q))
+    expected = sum(n * 10 for k in range(10) for n in (k, k + 100) if n % 2 == 0)
+    assert total == expected
+
+
+def test_map_stage_survives_failing_items():
+    """
+    测试: 单条数据处理失败只会被丢弃，不会中断整个阶段。
+    """
+    source_q, out_q = make_queue(1), make_queue(1)
+
+    def fragile(n):
+        if n == 3:
+            raise ValueError("boom")
+        return n
+
+    start_source("source", lambda: range(6), source_q)
+    start_map("fragile", fragile, source_q, out_q, workers=2)
+
+    assert sorted(drain(out_q)) == [0, 1, 2, 4, 5]
+
+
+def test_batch_stage_flushes_partial_batch_after_max_wait():
+    """
+    测试: 批次未攒满时，等待超过 max_wait 后也会被处理，不会因为上游变慢而滞留。
+    """
+    source_q, out_q = make_queue(4), make_queue(4)
+
+    def slow_source():
+        yield 1
+        time.sleep(0.3)
+        yield 2
+
+    start_source("slow", slow_source, source_q)
+    start_batch("batch", lambda batch: [list(batch)], source_q, out_q, batch_size=10, max_wait=0.05)
+
+    assert list(drain(out_q)) == [[1], [2]]
+
+
+def test_task_stage_calls_on_done_even_when_it_fails():
+    """
+    测试: 任务阶段出错时只记录错误，结束回调依然会被调用，下游不会一直等待。
+    """
+    done = threading.Event()
+
+    def broken():
+        raise RuntimeError("boom")
+
+    start_task("task", broken, on_done=done.set)
+
+    assert done.wait(timeout=2)
@@ -0,0 +1,110 @@
+# tests/test_profiling.py
+
+import cProfile
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+import profiling
+from pipeline_stages import make_queue, start_source, start_map, drain
+
+
+def busy(n):
+    return sum(i * i for i in range(2000)) + n
+
+
+@pytest.mark.skipif(sys.version_info >= (3, 12), reason="Python 3.12+ 上同一进程只能有一个剖析器，各阶段合并在 main 中")
+def test_profile_run_writes_per_stage_results(tmp_path, monkeypatch):
+    """
+    测试: 开启剖析后，各阶段工作线程的数据按阶段名合并，并与内存分配排行一起写入 summary.json。
+    """
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+
+    with profiling.profile_run("unit", enabled=True) as run:
+        source_q, out_q = make_queue(4), make_queue(4)
+        start_source("numbers", lambda: range(20), source_q)
+        start_map("square", busy, source_q, out_q, workers=2)
+        buffers = [bytearray(64 * 1024) for _ in range(16)]
+        assert len(list(drain(out_q))) == 20
+
+    with open(os.path.join(run.directory, "summary.json"), encoding="utf-8") as f:
+        summary = json.load(f)
+    assert {"main", "numbers", "square"} <= set(summary['stages'])
+    assert any("busy" in row['function'] for row in summary['stages']['square'])
+    assert os.path.isfile(os.path.join(run.directory, "square.prof"))
+    assert summary['allocations_at_end']
+    del buffers
+
+
+class SingleActiveProfile(cProfile.Profile):
+    """模拟 Python 3.12+ 的 cProfile: 已有剖析器在运行时 enable() 抛出 ValueError。"""
+    active = 0
+    lock = threading.Lock()
+
+    def enable(self, *args, **kwargs):
+        with self.lock:
+            if SingleActiveProfile.active:
+                raise ValueError("Another profiling tool is already active")
+            SingleActiveProfile.active += 1
+        super().enable(*args, **kwargs)
+
+    def disable(self):
+        super().disable()
+        with self.lock:
+            SingleActiveProfile.active -= 1
+
+
+def test_stages_run_unprofiled_when_another_profiler_is_active(tmp_path, monkeypatch):
+    """
+    测试: 阶段线程无法开启自己的剖析器时照常运行并通知下游，流水线能够排空，结果仍然写出。
+    """
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling.cProfile, "Profile", SingleActiveProfile)
+
+    with profiling.profile_run("unit", enabled=True) as run:
+        source_q, out_q = make_queue(4), make_queue(4)
+        start_source("numbers", lambda: range(20), source_q)
+        start_map("square", busy, source_q, out_q, workers=2)
+        results = []
+        drainer = threading.Thread(target=lambda: results.extend(drain(out_q)), daemon=True)
+        drainer.start()
+        drainer.join(timeout=10)
+        assert not drainer.is_alive(), "阶段线程没有发出结束通知，流水线无法排空"
+        assert sorted(results) == sorted(busy(n) for n in range(20))
+
+    with open(os.path.join(run.directory, "summary.json"), encoding="utf-8") as f:
+        assert "main" in json.load(f)['stages']
+
+
+def test_profiling_is_off_by_default(tmp_path, monkeypatch):
+    """
+    测试: 未开启剖析时不产生任何结果。
+    """
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.delenv(profiling.PROFILE_ENV_VAR, raising=False)
+
+    with profiling.profile_run("unit") as run:
+        assert run is None
+    assert profiling.load_summaries(5) == []
+
+
+def test_aggregate_sums_function_time_across_runs():
+    """
+    测试: 多次运行的热点函数按 (阶段, 函数) 累加，分配位置取最大占用。
+    """
+    summaries = [
+        {'stages': {'extract': [{'function': 'f', 'ncalls': 1, 'tottime': 1.0, 'cumtime': 2.0}]},
+         'allocations_at_peak': [{'site': 'a.py:1', 'size_kb': 10.0}]},
+        {'stages': {'extract': [{'function': 'f', 'ncalls': 2, 'tottime': 0.5, 'cumtime': 1.0},
+                                {'function': 'g', 'ncalls': 1, 'tottime': 0.1, 'cumtime': 0.1}]},
+         'allocations_at_peak': [{'site': 'a.py:1', 'size_kb': 30.0}]},
+    ]
+
+    result = profiling.aggregate(summaries, top=10)
+
+    assert result['functions'][0]['function'] == 'f'
+    assert result['functions'][0]['tottime'] == 1.5 and result['functions'][0]['runs'] == 2
+    assert result['allocations'] == [{'site': 'a.py:1', 'size_kb': 30.0, 'runs': 2}]
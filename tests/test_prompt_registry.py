@@ -0,0 +1,44 @@
+# tests/test_prompt_registry.py
+
+import pytest
+
+from prompt_registry import PromptTemplate, PromptError, load_registry
+
+
+def test_repository_prompts_are_valid():
+    """
+    测试: prompts/ 目录下的所有Prompt都能通过校验，当前配置的版本存在。
+    """
+    import config
+
+    registry = load_registry()
+    assert config.SUMMARY_PROMPT_VERSION in registry.versions()
+
+
+def test_static_system_message_first_and_article_last():
+    """
+    测试: system 消息是静态的且排在最前面，文章正文在 user 消息的末尾；正文中的花括号原样保留。
+    """
+    template = PromptTemplate("t", "[system]\n你是编辑。\n[user]\n来源: {source_name}\n---\n{clean_content}\n---")
+
+    first = template.messages(source_name="甲", clean_content="正文{x}")
+    second = template.messages(source_name="乙", clean_content="另一篇")
+
+    assert first[0] == second[0] == {"role": "system", "content": "你是编辑。"}
+    assert first[1]["content"] == "来源: 甲\n---\n正文{x}\n---"
+    assert template.static_prefix == "你是编辑。\n来源: "
+
+
+@pytest.mark.parametrize("text", [
+    "没有正文占位符 {source_name}",
+    "未知占位符 {author} {clean_content}",
+    "{clean_content} 正文之后还有 {source_name}",
+    "[system]\n系统消息里有 {source_name}\n[user]\n{clean_content}",
+    "花括号不匹配 { {clean_content}",
+])
+def test_invalid_templates_are_rejected(text):
+    """
+    测试: 缺少正文、使用未知占位符、正文不在最后、system 段含占位符、花括号不匹配的模板在加载时即被拒绝。
+    """
+    with pytest.raises(PromptError):
+        PromptTemplate("bad", text)
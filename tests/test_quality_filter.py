@@ -0,0 +1,84 @@
+# tests/test_quality_filter.py
+
+import pytest
+
+from quality_filter import evaluate, validate_quality_thresholds
+from work_queue import enqueue_entries, claim, reject_in_session, rejection_stats, queue_stats, DISCOVERED, REJECTED
+
+CHINESE = "人工智能正在改变软件开发的方式，越来越多的团队开始在日常工作中使用代码助手。\n" \
+          "研究人员指出，这类工具在提高效率的同时，也带来了新的安全与质量问题。\n" \
+          "业内人士认为，未来几年相关的工程实践和评估方法将逐步成熟。"
+JAPANESE = "人工知能はソフトウェア開発のやり方を変えつつあります。\n多くのチームがコードアシスタントを使い始めています。"
+ENGLISH = "Large language models are changing how software teams write and review code.\n" \
+          "Researchers say the tools raise productivity but also introduce new risks.\n" \
+          "Engineering practices around them are expected to mature over the next few years."
+
+
+def test_evaluate_passes_normal_articles_and_detects_languages():
+    """
+    测试: 正常的中文、日文、英文正文都能通过，并按文字体系识别出语言。
+    """
+    verdicts = evaluate([CHINESE, JAPANESE, ENGLISH])
+    assert [v['reasons'] for v in verdicts] == [[], [], []]
+    assert [v['language'] for v in verdicts] == ["zh", "ja", "latin"]
+    assert verdicts[0]['letter_ratio'] > 0.8
+
+
+def test_evaluate_rejects_low_quality_pages():
+    """
+    测试: 数字表格、大量重复的行和付费墙页面都会被拒绝，并给出对应的原因代码。
+    """
+    table = "\n".join(f"2024-01-{day:02d} 1{day}.35 +0.{day}% 3{day}8800" for day in range(1, 29))
+    boilerplate = "\n".join(["点击查看更多精彩内容"] * 8 + ["正文只有这一行。"])
+    paywall = "这是一篇深度报道的开头部分，讲述了行业的最新变化。\n订阅后阅读全文"
+    verdicts = evaluate([table, boilerplate, paywall])
+    assert "digit_ratio" in verdicts[0]['reasons'] and "letter_ratio" in verdicts[0]['reasons']
+    assert verdicts[1]['reasons'] == ["duplicate_lines"]
+    assert verdicts[2]['reasons'] == ["paywall"] and verdicts[2]['paywall_hits'] == 1
+
+    # 同样的短语出现在长文章中不算付费墙
+    long_article = "\n".join(f"第{n}段: 这一部分详细分析了行业在过去一年里的变化与趋势。" for n in range(1, 80))
+    assert evaluate([long_article + "\n订阅后阅读全文"])[0]['reasons'] == []
+
+
+def test_per_source_thresholds_override_defaults():
+    """
+    测试: 信源可以限定语言、放宽阈值 (None 表示不检查) 或关闭质量过滤，且只影响该信源的文章。
+    """
+    table = "\n".join(f"{n} {n * 7} {n * 13}" for n in range(100, 140))
+    verdicts = evaluate(
+        [ENGLISH, ENGLISH, table, table],
+        [{'languages': ["zh"]}, None,
+         {'enabled': False}, {'min_letter_ratio': None, 'max_digit_ratio': None}],
+    )
+    assert [v['reasons'] for v in verdicts] == [["language"], [], [], []]
+
+
+def test_validate_quality_thresholds_coerces_command_line_values():
+    """
+    测试: 命令行传入的字符串阈值会被转换为对应类型；未知的阈值或语言代码会被拒绝。
+    """
+    assert validate_quality_thresholds({'languages': "zh, latin", 'max_digit_ratio': "0.4", 'enabled': False}) == \
+        {'languages': ["zh", "latin"], 'max_digit_ratio': 0.4, 'enabled': False}
+    assert validate_quality_thresholds({}) is None
+    with pytest.raises(ValueError):
+        validate_quality_thresholds({'max_emoji_ratio': 0.1})
+    with pytest.raises(ValueError):
+        validate_quality_thresholds({'languages': "zh,klingon"})
+    with pytest.raises(ValueError):
+        validate_quality_thresholds({'min_letter_ratio': "a lot"})
+
+
+def test_rejected_items_are_terminal_and_counted_by_reason(db_session):
+    """
+    测试: 被拒绝的文章进入 rejected 终态并保留正文，不会被再次领取；统计按第一个原因代码计数。
+    """
+    enqueue_entries(db_session, [{'url': f"https://example.com/{i}"} for i in range(3)])
+    items = claim(db_session, DISCOVERED, "worker-a", limit=3)
+    reject_in_session(db_session, items[0]['id'], "worker-a", "paywall", clean_content="订阅后阅读全文")
+    reject_in_session(db_session, items[1]['id'], "worker-a", "digit_ratio,letter_ratio")
+    assert not reject_in_session(db_session, items[2]['id'], "worker-b", "paywall")
+    db_session.commit()
+
+    assert queue_stats(db_session)[REJECTED] == 2
+    assert rejection_stats(db_session) == {'paywall': 1, 'digit_ratio': 1}
@@ -0,0 +1,81 @@
+# tests/test_resummarize.py
+
+import pytest
+
+from models import BriefingItem, OriginalContent, SummaryVersion
+from resummarize import run_resummarize, UNVERSIONED
+
+
+@pytest.fixture
+def session_factory(session_factory):
+    factory = session_factory
+    with factory() as db_session:
+        for i, source in enumerate(["信源A", "信源A", "信源B"]):
+            item = BriefingItem(source_url=f"http://example.com/{i}", summary_text=f"旧摘要{i}",
+                                source_name=source, model_used="old-model")
+            item.original_content = OriginalContent(content_text=f"原文{i}")
+            db_session.add(item)
+        # 已经由目标Prompt版本和模型生成的摘要不需要重新生成
+        current = BriefingItem(source_url="http://example.com/current", summary_text="当前摘要",
+                               source_name="信源B", model_used="new-model", prompt_version="v2")
+        current.original_content = OriginalContent(content_text="原文")
+        db_session.add(current)
+        db_session.commit()
+    return factory
+
+
+def fake_summarize(calls):
+    def summarize(article):
+        calls.append(article['url'])
+        return {'summary_data': {'summary_text': f"新摘要:{article['clean_content']}", 'model_used': "new-model"}}
+    return summarize
+
+
+def test_resummarize_is_resumable_and_filters_by_source(session_factory):
+    """
+    测试: 只处理满足过滤条件的摘要；已有当前版本的摘要在再次运行时被跳过；默认不改动摘要表。
+    """
+    calls = []
+    saved = run_resummarize(session_factory, fake_summarize(calls), "v2", ["new-model"],
+                            workers=2, chunk_size=1, source="信源A")
+    assert saved == 2 and len(calls) == 2
+
+    # 再次运行（例如中断后继续）只会处理剩下的摘要
+    saved = run_resummarize(session_factory, fake_summarize(calls), "v2", ["new-model"], workers=2, chunk_size=1)
+    assert saved == 1 and len(calls) == 3
+
+    with session_factory() as db_session:
+        assert db_session.query(SummaryVersion).filter_by(prompt_version="v2").count() == 3
+        assert {b.summary_text for b in db_session.query(BriefingItem)} == {"旧摘要0", "旧摘要1", "旧摘要2", "当前摘要"}
+
+
+def test_activate_replaces_current_summary_and_keeps_old_one(session_factory):
+    """
+    测试: 启用新版本时替换摘要表中的当前摘要，旧摘要作为一个版本保留下来。
+    """
+    run_resummarize(session_factory, fake_summarize([]), "v2", ["new-model"], activate=True, limit=1)
+
+    with session_factory() as db_session:
+        briefing = db_session.query(BriefingItem).order_by(BriefingItem.id).first()
+        assert briefing.summary_text == "新摘要:原文0" and briefing.model_used == "new-model"
+        versions = {(v.prompt_version, v.model): v.summary_text for v in briefing.versions}
+        assert versions == {("v2", "new-model"): "新摘要:原文0", (UNVERSIONED, "old-model"): "旧摘要0"}
+
+
+def test_activate_after_preview_reuses_saved_versions(session_factory):
+    """
+    测试: 先只保存新版本检查效果，再启用时直接启用已保存的版本，不再调用AI。
+    """
+    calls = []
+    assert run_resummarize(session_factory, fake_summarize(calls), "v2", ["new-model"], limit=1) == 1
+    assert run_resummarize(session_factory, fake_summarize(calls), "v2", ["new-model"], activate=True, limit=1) == 1
+    assert len(calls) == 1
+
+    with session_factory() as db_session:
+        briefing = db_session.query(BriefingItem).order_by(BriefingItem.id).first()
+        assert (briefing.summary_text, briefing.prompt_version) == ("新摘要:原文0", "v2")
+        assert {(v.prompt_version, v.model) for v in briefing.versions} == {("v2", "new-model"), (UNVERSIONED, "old-model")}
+
+    # 已启用的摘要不会再被处理
+    assert run_resummarize(session_factory, fake_summarize(calls), "v2", ["new-model"], activate=True, limit=1) == 1
+    assert len(calls) == 2
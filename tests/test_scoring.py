@@ -0,0 +1,79 @@
+# tests/test_scoring.py
+
+import pytest
+from datetime import datetime, timedelta, timezone
+
+import config
+from scoring import recency_score, score_article, estimate_tokens, TokenBudget
+
+NOW = datetime(2025, 8, 20, 12, 0, tzinfo=timezone.utc)
+
+
+def make_article(url, hours_old=1, length=1000, title="", feed_url="http://feed.example.com/rss"):
+    return {
+        'url': url,
+        'source_name': "测试信源",
+        'feed_url': feed_url,
+        'title': title,
+        'clean_content': "字" * length,
+        'published_at': NOW - timedelta(hours=hours_old),
+    }
+
+
+def test_recency_score_halves_every_half_life(monkeypatch):
+    """
+    测试: 时效分按半衰期指数衰减，发布时间未知时给中性分。
+    """
+    monkeypatch.setattr(config, "RECENCY_HALF_LIFE_HOURS", 24)
+
+    assert recency_score(NOW, NOW) == pytest.approx(1.0)
+    assert recency_score(NOW - timedelta(hours=24), NOW) == pytest.approx(0.5)
+    assert recency_score(None, NOW) == 0.5
+
+
+def test_keywords_and_source_weight_raise_priority(monkeypatch):
+    """
+    测试: 命中兴趣关键词、或来自高权重信源的文章，分数更高。
+    """
+    monkeypatch.setattr(config, "INTEREST_KEYWORDS", {"芯片": 1.0})
+    monkeypatch.setattr(config, "SOURCE_WEIGHTS", {"http://vip.example.com/rss": 2.0, "名称信源": 3.0})
+
+    plain = make_article("http://example.com/plain")
+    keyword = make_article("http://example.com/kw", title="国产芯片新进展")
+    vip = make_article("http://example.com/vip", feed_url="http://vip.example.com/rss")
+
+    assert score_article(keyword, NOW) > score_article(plain, NOW)
+    assert score_article(vip, NOW) == pytest.approx(2 * score_article(plain, NOW))
+
+    # 信源注册表中设置的权重优先；未设置 (None) 时仍按信源名称查找 config.SOURCE_WEIGHTS
+    named = {**make_article("http://example.com/named"), 'source_name': "名称信源"}
+    assert score_article({**named, 'source_weight': None}, NOW) == pytest.approx(3 * score_article(plain, NOW))
+    assert score_article({**named, 'source_weight': 0.5}, NOW) == pytest.approx(0.5 * score_article(plain, NOW))
+
+
+def test_token_budget_skips_oversized_articles_and_keeps_going():
+    """
+    测试: 放不下的大文章只被跳过，不会让预算用尽；后面更小的文章仍可使用剩余预算。
+    """
+    long_cost = estimate_tokens(make_article("http://example.com/long", length=3000))
+    short_cost = estimate_tokens(make_article("http://example.com/short", length=300))
+    budget = TokenBudget(long_cost + short_cost)
+
+    assert budget.try_spend(long_cost)
+    assert not budget.try_spend(long_cost)
+    assert not budget.exhausted and budget.skipped == 1
+    assert budget.try_spend(short_cost)
+    assert budget.remaining == 0 and budget.exhausted
+
+
+def test_token_budget_is_exhausted_only_below_the_smallest_article():
+    """
+    测试: 只有剩余预算连空正文文章的估算花费都放不下时才视为用尽；预算为 None 时不做任何限制。
+    """
+    min_cost = estimate_tokens({})
+    budget = TokenBudget(2 * min_cost)
+    assert budget.try_spend(min_cost) and not budget.exhausted
+    assert budget.try_spend(1) and budget.exhausted
+
+    unlimited = TokenBudget(None)
+    assert unlimited.try_spend(10 ** 9) and unlimited.remaining is None and not unlimited.exhausted
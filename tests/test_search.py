@@ -0,0 +1,85 @@
+# tests/test_search.py
+
+import pytest
+from datetime import datetime, timezone
+from sqlalchemy.orm import sessionmaker
+
+from models import BriefingItem, OriginalContent
+from search import ensure_search_index, build_match_expression, search_briefings
+
+
+# ==============================================================================
+# 测试夹具: 一个带有全文索引的内存数据库
+# ==============================================================================
+@pytest.fixture
+def engine(engine):
+    ensure_search_index(engine)
+    return engine
+
+
+def add_briefing(session, url, summary, source, content, created_at=None):
+    item = BriefingItem(source_url=url, summary_text=summary, source_name=source, model_used="test-model")
+    if created_at:
+        item.created_at = created_at
+    item.original_content = OriginalContent(content_text=content)
+    session.add(item)
+    session.commit()
+    return item
+
+
+def test_build_match_expression_quotes_terms():
+    """
+    测试: 用户输入中的 FTS5 特殊字符和双引号必须被转义为短语，而不是被当作查询语法。
+    """
+    assert build_match_expression(["人工智能", 'say"hi']) == '"人工智能" "say""hi"'
+
+
+def test_search_finds_chinese_text_in_summary_and_content(engine):
+    """
+    测试: 通过触发器写入索引的中文摘要和原文都可以被检索到，并返回命中片段。
+    """
+    session = sessionmaker(bind=engine)()
+    add_briefing(session, "http://example.com/1", "大型语言模型推动人工智能应用落地。", "科技前沿", "正文讨论了芯片产业。")
+    add_briefing(session, "http://example.com/2", "央行宣布调整存款准备金率。", "商业观察", "正文提到人工智能对金融业的影响。")
+
+    with engine.connect() as conn:
+        results = search_briefings(conn, "人工智能")
+
+    assert {row["source_url"] for row in results} == {"http://example.com/1", "http://example.com/2"}
+    # 摘要命中的权重更高，应该排在原文命中之前
+    assert results[0]["source_url"] == "http://example.com/1"
+    assert "【" in results[0]["snippet"]
+    session.close()
+
+
+def test_search_applies_source_and_date_filters(engine):
+    """
+    测试: 信源过滤和日期过滤会缩小结果范围。
+    """
+    session = sessionmaker(bind=engine)()
+    add_briefing(session, "http://example.com/old", "量子计算取得新突破。", "科技前沿", "旧文章",
+                 created_at=datetime(2024, 1, 1, tzinfo=timezone.utc))
+    add_briefing(session, "http://example.com/new", "量子计算公司完成融资。", "商业观察", "新文章",
+                 created_at=datetime(2025, 6, 1, tzinfo=timezone.utc))
+
+    with engine.connect() as conn:
+        by_source = search_briefings(conn, "量子计算", source="商业观察")
+        by_date = search_briefings(conn, "量子计算", since=datetime(2025, 1, 1))
+
+    assert [row["source_url"] for row in by_source] == ["http://example.com/new"]
+    assert [row["source_url"] for row in by_date] == ["http://example.com/new"]
+    session.close()
+
+
+def test_deleting_briefing_removes_it_from_index(engine):
+    """
+    测试: 删除摘要（级联删除原文）后，索引中不应再出现该记录。
+    """
+    session = sessionmaker(bind=engine)()
+    item = add_briefing(session, "http://example.com/del", "区块链监管新规出台。", "政策解读", "全文内容")
+    session.delete(item)
+    session.commit()
+
+    with engine.connect() as conn:
+        assert search_briefings(conn, "区块链") == []
+    session.close()
@@ -0,0 +1,49 @@
+# tests/test_sharding.py
+
+from datetime import datetime, timedelta, timezone
+
+from models import WorkerLease
+from sharding import ShardCoordinator, assign_shards, feed_shard, cluster_status
+
+SHARDS = 32
+
+
+def test_rendezvous_assignment_moves_only_the_departed_workers_shards():
+    """
+    测试: 分片在进程之间不重不漏；一个进程退出后，只有它的分片被重新分配；信源的分片编号是稳定的。
+    """
+    before = assign_shards(["w1", "w2", "w3"], SHARDS)
+    assert sorted(s for shards in before.values() for s in shards) == list(range(SHARDS))
+    after = assign_shards(["w1", "w3"], SHARDS)
+    assert before["w1"] <= after["w1"] and before["w3"] <= after["w3"]
+    assert after["w1"] | after["w3"] == set(range(SHARDS))
+    assert feed_shard("http://a.example/rss", SHARDS) == feed_shard("http://a.example/rss", SHARDS) < SHARDS
+
+
+def test_leases_are_exclusive_and_reassigned_when_a_worker_dies(session_factory):
+    """
+    测试: 两个进程心跳后各自持有互不重叠的分片；其中一个停止心跳，租约过期后另一个接手全部分片。
+    """
+    now = datetime(2026, 3, 5, 12, 0, tzinfo=timezone.utc)
+    a = ShardCoordinator(session_factory, "worker-a", shards=SHARDS, lease_seconds=60)
+    b = ShardCoordinator(session_factory, "worker-b", shards=SHARDS, lease_seconds=60)
+
+    # a 先启动，暂时持有全部分片；b 加入后，a 在下一次心跳时交出属于 b 的分片
+    assert len(a.heartbeat(now)) == SHARDS
+    assert b.heartbeat(now) == frozenset()
+    a.heartbeat(now + timedelta(seconds=15))
+    b.heartbeat(now + timedelta(seconds=15))
+    assert a.owned and b.owned and not (a.owned & b.owned)
+    assert a.owned | b.owned == set(range(SHARDS))
+    with session_factory() as db_session:
+        assert {n['worker_id']: n['shards'] for n in cluster_status(db_session, now + timedelta(seconds=15))} == {
+            "worker-a": len(a.owned), "worker-b": len(b.owned)}
+
+    # b 崩溃（不再心跳），租约过期前 a 不能接手 b 的分片
+    assert a.heartbeat(now + timedelta(seconds=30)) == a.owned != set(range(SHARDS))
+    assert len(a.heartbeat(now + timedelta(seconds=90))) == SHARDS
+
+    # 正常退出时立即交还分片
+    a.stop()
+    with session_factory() as db_session:
+        assert db_session.query(WorkerLease).filter(WorkerLease.owner.is_not(None)).count() == 0
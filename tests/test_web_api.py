@@ -0,0 +1,95 @@
+# tests/test_web_api.py
+
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+import config
+from models import BriefingItem
+from web_api import BriefingAPI
+
+
+@pytest.fixture
+def session_factory(session_factory, monkeypatch):
+    monkeypatch.setattr(config, "DELIVERY_TIMEZONE", "Asia/Shanghai")
+    factory = session_factory
+    with factory() as db_session:
+        for i in range(5):
+            # 北京时间: 前两条在3月4日，其余在3月5日
+            db_session.add(BriefingItem(source_url=f"http://example.com/{i}", summary_text=f"摘要{i}",
+                                        source_name="信源A" if i % 2 else "信源B",
+                                        created_at=datetime(2026, 3, 4, 15 + i, 0, tzinfo=timezone.utc)))
+        db_session.commit()
+    return factory
+
+
+def request(app, path, query=b"", headers=()):
+    """直接调用 ASGI 应用，返回 (状态码, 响应头, 响应体)。"""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": query,
+             "headers": [(k.encode(), v.encode()) for k, v in headers]}
+    asyncio.run(app(scope, receive, send))
+    start, body = messages
+    return start["status"], {k.decode(): v.decode() for k, v in start["headers"]}, body["body"]
+
+
+def test_keyset_pagination_and_filters(session_factory):
+    """
+    测试: 列表按ID从新到旧分页，next 指向下一页；按信源、按本地日期过滤；错误参数返回 400。
+    """
+    app = BriefingAPI(session_factory)
+    status, _, body = request(app, "/api/briefings", b"limit=2")
+    page = json.loads(body)
+    assert status == 200 and [item['id'] for item in page['items']] == [5, 4]
+    assert page['next'] == "/api/briefings?limit=2&before=4"
+
+    page = json.loads(request(app, "/api/briefings", b"limit=2&before=4")[2])
+    assert [item['id'] for item in page['items']] == [3, 2]
+    page = json.loads(request(app, "/api/briefings", b"limit=2&before=2")[2])
+    assert [item['id'] for item in page['items']] == [1] and page['next'] is None
+
+    page = json.loads(request(app, "/api/sources/信源A/briefings")[2])
+    assert [item['id'] for item in page['items']] == [4, 2]
+    # UTC 15:00 与 16:00 是北京时间3月4日的23:00与3月5日的00:00
+    page = json.loads(request(app, "/api/dates/2026-03-04/briefings")[2])
+    assert [item['id'] for item in page['items']] == [1]
+    sources = json.loads(request(app, "/api/sources")[2])['sources']
+    assert [(s['source_name'], s['count']) for s in sources] == [("信源A", 2), ("信源B", 3)]
+
+    assert request(app, "/api/briefings", b"limit=abc")[0] == 400
+    assert request(app, "/api/dates/2026-13-01/briefings")[0] == 400
+    assert request(app, "/nowhere")[0] == 404
+
+
+def test_html_view_and_caching(session_factory):
+    """
+    测试: 网页视图使用邮件模板渲染某一天的简报；重复请求在 TTL 内由缓存返回，带 If-None-Match 时返回 304。
+    """
+    app = BriefingAPI(session_factory, cache_ttl=60)
+    status, headers, body = request(app, "/dates/2026-03-05")
+    html = body.decode("utf-8")
+    assert status == 200 and headers["content-type"].startswith("text/html")
+    assert "2026年03月05日" in html and "摘要4" in html and "摘要0" not in html
+    assert headers["cache-control"] == "public, max-age=60"
+
+    # 数据库中的新摘要在缓存过期前不会出现，说明第二次请求没有查询数据库
+    with session_factory() as db_session:
+        db_session.add(BriefingItem(source_url="http://example.com/new", summary_text="新摘要", source_name="信源A",
+                                    created_at=datetime(2026, 3, 5, 1, 0, tzinfo=timezone.utc)))
+        db_session.commit()
+    assert request(app, "/dates/2026-03-05")[2] == body
+
+    status, _, body = request(app, "/dates/2026-03-05", headers=[("If-None-Match", headers["etag"])])
+    assert status == 304 and body == b""
+
+    app.cache.clear()
+    assert "新摘要" in request(app, "/dates/2026-03-05")[2].decode("utf-8")
@@ -0,0 +1,111 @@
+# tests/test_work_queue.py
+
+import config
+from work_queue import (
+    enqueue_entries, claim, advance, release, release_owned, fail, queue_stats,
+    DISCOVERED, EXTRACTED, FAILED,
+)
+
+
+def entries(n):
+    return [{'url': f"http://example.com/{i}", 'source_name': "测试信源"} for i in range(n)]
+
+
+def test_enqueue_ignores_duplicate_urls(db_session):
+    """
+    测试: 重复入队的URL会被静默忽略。
+    """
+    enqueue_entries(db_session, entries(3))
+    enqueue_entries(db_session, entries(5))
+
+    assert queue_stats(db_session) == {DISCOVERED: 5}
+
+
+def test_claimed_items_are_not_handed_out_twice(db_session):
+    """
+    测试: 已被领取且租约有效的任务，不会被另一个工作进程再次领取。
+    """
+    enqueue_entries(db_session, entries(5))
+
+    first = claim(db_session, DISCOVERED, "worker-a", limit=3)
+    second = claim(db_session, DISCOVERED, "worker-b", limit=10)
+
+    assert len(first) == 3 and len(second) == 2
+    assert not {r['id'] for r in first} & {r['id'] for r in second}
+    assert claim(db_session, DISCOVERED, "worker-c", limit=10) == []
+
+
+def test_expired_lease_can_be_reclaimed(db_session, monkeypatch):
+    """
+    测试: 工作进程崩溃后，租约过期的任务会被其他进程重新领取（断点续跑）。
+    """
+    monkeypatch.setattr(config, "WORK_LEASE_SECONDS", -1)
+    enqueue_entries(db_session, entries(1))
+
+    crashed = claim(db_session, DISCOVERED, "worker-crashed", limit=1)
+    resumed = claim(db_session, DISCOVERED, "worker-new", limit=1)
+
+    assert [r['id'] for r in resumed] == [r['id'] for r in crashed]
+    # 原进程的租约已经被接管，它不能再推进这个任务
+    assert advance(db_session, crashed[0]['id'], "worker-crashed", EXTRACTED) is False
+    assert advance(db_session, resumed[0]['id'], "worker-new", EXTRACTED, clean_content="正文") is True
+    assert queue_stats(db_session) == {EXTRACTED: 1}
+
+
+def test_claim_by_score_and_release(db_session):
+    """
+    测试: 按分数领取时高分任务优先；被释放的任务可以重新被领取。
+    """
+    enqueue_entries(db_session, entries(3))
+    for item, score in zip(claim(db_session, DISCOVERED, "w", limit=3), (0.1, 0.9, 0.5)):
+        advance(db_session, item['id'], "w", EXTRACTED, score=score)
+
+    top = claim(db_session, EXTRACTED, "w", limit=1, by_score=True)
+    assert top[0]['score'] == 0.9
+
+    release(db_session, top[0]['id'], "w")
+    again = claim(db_session, EXTRACTED, "w", limit=3, by_score=True)
+    assert [r['score'] for r in again] == [0.9, 0.5, 0.1]
+
+
+def test_claim_skips_items_above_max_estimated_tokens(db_session):
+    """
+    测试: 指定 max_estimated_tokens 时，估算花费超过它的任务不会被领取。
+    """
+    enqueue_entries(db_session, entries(3))
+    for item, tokens in zip(claim(db_session, DISCOVERED, "w", limit=3), (5000, 800, None)):
+        advance(db_session, item['id'], "w", EXTRACTED, score=tokens or 0, estimated_tokens=tokens)
+
+    rows = claim(db_session, EXTRACTED, "w", limit=3, by_score=True, max_estimated_tokens=1000)
+    assert [r['estimated_tokens'] for r in rows] == [800, None]
+
+
+def test_item_is_marked_failed_after_max_attempts(db_session, monkeypatch):
+    """
+    测试: 任务失败次数达到上限后被标记为 failed，不再被领取。
+    """
+    monkeypatch.setattr(config, "WORK_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(config, "WORK_RETRY_DELAY_SECONDS", -1)
+    enqueue_entries(db_session, entries(1))
+
+    for _ in range(2):
+        item = claim(db_session, DISCOVERED, "w", limit=1)[0]
+        fail(db_session, item['id'], "w", "下载失败")
+
+    assert queue_stats(db_session) == {FAILED: 1}
+    assert claim(db_session, DISCOVERED, "w", limit=1) == []
+
+
+def test_long_lease_survives_default_lease_expiry(db_session, monkeypatch):
+    """
+    测试: 批量任务以更长的租约领取文章，普通租约过期也不会被其他进程领走；整批释放后可重新领取。
+    """
+    monkeypatch.setattr(config, "WORK_LEASE_SECONDS", -1)
+    enqueue_entries(db_session, entries(3))
+
+    held = claim(db_session, DISCOVERED, "batch-1", limit=2, lease_seconds=3600)
+    assert len(held) == 2
+    assert len(claim(db_session, DISCOVERED, "worker", limit=10)) == 1
+
+    assert release_owned(db_session, "batch-1") == 2
+    assert {r['id'] for r in claim(db_session, DISCOVERED, "worker", limit=10)} >= {r['id'] for r in held}
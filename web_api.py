@@ -0,0 +1,289 @@
+# web_api.py (Version 1.0 - Read-Only Briefing API)
+
+# ==============================================================================
+# 1. 导入工具箱 (Import necessary tools)
+# ==============================================================================
+import argparse
+import asyncio
+import hashlib
+import json
+import re
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlencode
+
+from cachetools import TTLCache
+from sqlalchemy import create_engine, select, func
+from sqlalchemy.orm import sessionmaker
+
+import config
+import metrics
+from database import DATABASE_URL
+from digest import local_zone, window_label, as_utc
+from models import BriefingItem
+from templating import create_html_content
+from logger_config import logger
+
+# ==============================================================================
+# "雅典娜"简报阅读服务 (只读的 ASGI 应用)
+#
+# 除了每日邮件，也可以在浏览器或其他工具中阅读简报:
+#   GET /api/briefings                       最新摘要列表，可加 ?source=
+#   GET /api/sources                         各信源的摘要数量与最近更新时间
+#   GET /api/sources/{信源名称}/briefings     某个信源的摘要
+#   GET /api/dates/{YYYY-MM-DD}/briefings    某一天（按 config.DELIVERY_TIMEZONE）的摘要
+#   GET /  与  GET /dates/{YYYY-MM-DD}       今天 / 某一天的简报网页，与邮件使用同一个模板
+# 列表接口使用 keyset 分页: ?limit=&before=<摘要ID>，响应中的 next 即下一页的地址，翻页代价与页码无关。
+#
+# 重复读取由两层缓存吸收，频繁刷新的看板不会一直访问数据库:
+# - 进程内 TTL 缓存 (config.WEB_CACHE_TTL_SECONDS)，以路径和查询参数为键；同一个地址的并发请求只查询一次数据库；
+# - 每个响应都带有 ETag 与 Cache-Control，客户端带 If-None-Match 再次请求时直接返回 304。
+# 数据库查询在线程池中执行，不阻塞事件循环。本模块不依赖任何Web框架，运行需要一个ASGI服务器，例如:
+#   pip install uvicorn && python web_api.py --port 8000
+# ==============================================================================
+
+DATE_FORMAT = "%Y-%m-%d"
+JSON_TYPE = "application/json; charset=utf-8"
+HTML_TYPE = "text/html; charset=utf-8"
+
+
+class HTTPError(Exception):
+    """请求无法完成，以 JSON 形式返回给客户端的错误。"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Response:
+    """一个已经生成的响应。只有 200 响应会被缓存。"""
+    __slots__ = ("status", "content_type", "body", "etag")
+
+    def __init__(self, status: int, content_type: str, body: bytes):
+        self.status = status
+        self.content_type = content_type
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def json_response(data, status: int = 200) -> Response:
+    return Response(status, JSON_TYPE, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+
+# ==============================================================================
+# 2. 查询 (Queries)
+# ==============================================================================
+def briefing_to_dict(item: BriefingItem) -> dict:
+    return {
+        'id': item.id,
+        'source_name': item.source_name,
+        'source_url': item.source_url,
+        'summary_text': item.summary_text,
+        'model_used': item.model_used,
+        'created_at': as_utc(item.created_at).isoformat() if item.created_at else None,
+    }
+
+
+def day_range(value: str) -> tuple[datetime, datetime]:
+    """把 YYYY-MM-DD 解析为本地时区中这一天的 [起点, 终点)。"""
+    try:
+        day = datetime.strptime(value, DATE_FORMAT)
+    except ValueError:
+        raise HTTPError(400, f"日期格式应为 YYYY-MM-DD: {value}") from None
+    start = day.replace(tzinfo=local_zone())
+    return start, start + timedelta(days=1)
+
+
+def fetch_page(db_session, limit: int, before: int | None = None, source: str | None = None,
+               start: datetime | None = None, end: datetime | None = None) -> tuple[list[BriefingItem], int | None]:
+    """
+    按ID从新到旧读取一页摘要 (keyset 分页)。多读一条以判断是否还有下一页，
+    返回 (本页摘要, 下一页的 before 参数；没有下一页时为 None)。
+    """
+    query = select(BriefingItem).order_by(BriefingItem.id.desc()).limit(limit + 1)
+    if before is not None:
+        query = query.where(BriefingItem.id < before)
+    if source is not None:
+        query = query.where(BriefingItem.source_name == source)
+    if start is not None:
+        query = query.where(BriefingItem.created_at >= as_utc(start))
+    if end is not None:
+        query = query.where(BriefingItem.created_at < as_utc(end))
+    items = list(db_session.scalars(query))
+    if len(items) > limit:
+        return items[:limit], items[limit - 1].id
+    return items, None
+
+
+def source_stats(db_session) -> list[dict]:
+    rows = db_session.execute(
+        select(BriefingItem.source_name, func.count(BriefingItem.id), func.max(BriefingItem.created_at))
+        .group_by(BriefingItem.source_name)
+        .order_by(BriefingItem.source_name)
+    ).all()
+    return [{'source_name': name, 'count': count, 'latest_at': as_utc(latest).isoformat() if latest else None}
+            for name, count, latest in rows]
+
+
+# ==============================================================================
+# 3. ASGI 应用 (Application)
+# ==============================================================================
+def _int_param(query: dict, name: str, default: int | None = None) -> int | None:
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        return int(values[-1])
+    except ValueError:
+        raise HTTPError(400, f"参数 {name} 必须是整数。") from None
+
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+class BriefingAPI:
+    """简报阅读服务。session_factory 用于打开数据库会话，每个请求一个短会话。"""
+
+    def __init__(self, session_factory, cache_ttl: float | None = None, cache_size: int | None = None):
+        self.session_factory = session_factory
+        self.cache_ttl = cache_ttl if cache_ttl is not None else config.WEB_CACHE_TTL_SECONDS
+        self.cache = TTLCache(maxsize=cache_size or config.WEB_CACHE_MAX_ENTRIES, ttl=self.cache_ttl)
+        # 正在生成中的响应: 同一个地址的并发请求等待同一次查询
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self.routes = [
+            (re.compile(r"/api/briefings"), self.list_briefings),
+            (re.compile(r"/api/sources"), self.list_sources),
+            (re.compile(r"/api/sources/(?P<source>[^/]+)/briefings"), self.list_briefings),
+            (re.compile(r"/api/dates/(?P<date>\d{4}-\d{2}-\d{2})/briefings"), self.list_briefings),
+            (re.compile(r"/"), self.html_view),
+            (re.compile(r"/dates/(?P<date>\d{4}-\d{2}-\d{2})"), self.html_view),
+        ]
+
+    # --- 路由处理函数（在线程池中执行） ---
+    def list_briefings(self, path: str, query: dict, source: str | None = None, date: str | None = None) -> Response:
+        limit = min(max(_int_param(query, "limit", config.WEB_PAGE_SIZE), 1), config.WEB_MAX_PAGE_SIZE)
+        before = _int_param(query, "before")
+        source = source or (query.get("source") or [None])[-1]
+        start, end = day_range(date) if date else (None, None)
+        with self.session_factory() as db_session:
+            items, next_before = fetch_page(db_session, limit, before, source=source, start=start, end=end)
+            data = {'items': [briefing_to_dict(item) for item in items], 'next': None}
+        if next_before is not None:
+            params = {'limit': limit, 'before': next_before}
+            if source and "source" in query:
+                params['source'] = source
+            data['next'] = f"{path}?{urlencode(params)}"
+        return json_response(data)
+
+    def list_sources(self, path: str, query: dict) -> Response:
+        with self.session_factory() as db_session:
+            return json_response({'sources': source_stats(db_session)})
+
+    def html_view(self, path: str, query: dict, date: str | None = None) -> Response:
+        date = date or datetime.now(local_zone()).strftime(DATE_FORMAT)
+        start, end = day_range(date)
+        with self.session_factory() as db_session:
+            items, _ = fetch_page(db_session, config.WEB_MAX_PAGE_SIZE, start=start, end=end)
+            html = create_html_content(items, date_label=window_label(start, "daily"))
+        return Response(200, HTML_TYPE, html.encode("utf-8"))
+
+    # --- 缓存 ---
+    def _render(self, handler, path: str, query: dict, params: dict) -> Response:
+        try:
+            with metrics.timed("web.render"):
+                return handler(path, query, **params)
+        except HTTPError as e:
+            return json_response({'error': e.message}, status=e.status)
+        except Exception as e:
+            logger.error(f"处理请求 {path} 时发生错误: {e}", exc_info=True)
+            return json_response({'error': "服务器内部错误"}, status=500)
+
+    async def get_response(self, key: tuple, handler, path: str, query: dict, params: dict) -> Response:
+        cached = self.cache.get(key)
+        if cached is not None:
+            metrics.incr("web.cache.hit")
+            return cached
+        pending = self._inflight.get(key)
+        if pending is not None:
+            metrics.incr("web.cache.coalesced")
+            return await asyncio.shield(pending)
+
+        metrics.incr("web.cache.miss")
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await asyncio.to_thread(self._render, handler, path, query, params)
+            if response.status == 200:
+                self.cache[key] = response
+            future.set_result(response)
+            return response
+        finally:
+            del self._inflight[key]
+            if not future.done():
+                future.cancel()
+
+    # --- ASGI 入口 ---
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        path = scope["path"]
+        if scope["method"] not in ("GET", "HEAD"):
+            response = json_response({'error': "只支持 GET 请求"}, status=405)
+        else:
+            for pattern, handler in self.routes:
+                match = pattern.fullmatch(path)
+                if match:
+                    key = (path, scope.get("query_string", b""))
+                    query = parse_qs(key[1].decode("latin-1"))
+                    response = await self.get_response(key, handler, path, query, match.groupdict())
+                    break
+            else:
+                response = json_response({'error': f"找不到 {path}"}, status=404)
+
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        if response.status == 200 and _etag_matches(headers.get("if-none-match"), response.etag):
+            status, body = 304, b""
+        else:
+            status, body = response.status, response.body
+        cache_control = f"public, max-age={int(self.cache_ttl)}" if response.status == 200 else "no-store"
+        response_headers = [(b"etag", response.etag.encode()), (b"cache-control", cache_control.encode())]
+        if status != 304:
+            response_headers += [(b"content-type", response.content_type.encode()),
+                                 (b"content-length", str(len(body)).encode())]
+        await send({"type": "http.response.start", "status": status, "headers": response_headers})
+        await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else body})
+
+
+# ==============================================================================
+# 4. 启动入口 (Entry Point)
+# ==============================================================================
+engine = create_engine(DATABASE_URL)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# 供 ASGI 服务器加载，例如: uvicorn web_api:app
+app = BriefingAPI(SessionLocal)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址 (默认为 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="监听端口 (默认为 8000)")
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        logger.error("运行简报阅读服务需要一个ASGI服务器，请先安装: pip install uvicorn")
+        raise SystemExit(1)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
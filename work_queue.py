@@ -0,0 +1,303 @@
+# work_queue.py (Version 1.0 - Checkpointed Article Work Queue)
+
+# ==============================================================================
+# 1. 导入工具箱 (Import necessary tools)
+# ==============================================================================
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update, func, case
+from sqlalchemy.dialects import sqlite, postgresql
+from sqlalchemy.exc import OperationalError
+from tenacity import retry, stop_after_attempt, wait_random_exponential, retry_if_exception_type
+
+import config
+from models import ArticleQueueItem
+from logger_config import logger
+
+# ==============================================================================
+# "雅典娜"持久化工作队列
+#
+# 每篇文章在 article_queue 表中有一行，记录它走到了流水线的哪一步以及各步的中间结果。
+# 工作进程通过一条 `UPDATE ... WHERE id IN (SELECT ... LIMIT n) RETURNING *` 语句原子地领取任务，
+# 并为任务加上一段时间的租约；处理完成后推进状态并释放租约。
+# - 运行中途崩溃: 已完成的步骤都已落库，租约过期后任务会被下一次运行从断点处继续；
+# - 多进程并发: 每个任务同一时刻只会被一个持有有效租约的进程处理。
+# ==============================================================================
+
+QUEUE = ArticleQueueItem.__table__
+
+DISCOVERED = 'discovered'
+EXTRACTED = 'extracted'
+SUMMARIZED = 'summarized'
+STORED = 'stored'
+FAILED = 'failed'
+REJECTED = 'rejected'
+
+ALL_STATES = (DISCOVERED, EXTRACTED, SUMMARIZED, STORED, FAILED, REJECTED)
+
+
+def make_worker_id() -> str:
+    """生成当前工作进程的唯一标识: 主机名:进程号:随机后缀。"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# 多个进程同时写入SQLite时，偶尔会遇到 "database is locked"，短暂等待后重试即可。
+retry_on_lock = retry(
+    retry=retry_if_exception_type(OperationalError),
+    stop=stop_after_attempt(5),
+    wait=wait_random_exponential(multiplier=0.2, max=3),
+    reraise=True,
+)
+
+
+# ==============================================================================
+# 2. 入队 (Enqueue)
+# ==============================================================================
+def insert_ignore(db_session, table=QUEUE, index_elements=('url',)):
+    """根据数据库方言，返回一个遇到唯一键 (默认为队列的URL) 冲突时静默跳过的 INSERT 语句。"""
+    dialect = db_session.get_bind().dialect.name
+    insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+    return insert(table).on_conflict_do_nothing(index_elements=list(index_elements))
+
+
+@retry_on_lock
+def enqueue_entries(db_session, entries: list[dict]) -> int:
+    """
+    把一批RSS条目以 discovered 状态写入队列。队列中已存在的URL会被忽略。
+    返回新写入的条目数量。
+    """
+    if not entries:
+        return 0
+    now = _now()
+    rows = [
+        {
+            'url': entry['url'],
+            'feed_url': entry.get('feed_url'),
+            'source_name': entry.get('source_name'),
+            'title': entry.get('title'),
+            'published_at': entry.get('published_at'),
+            'state': DISCOVERED,
+            'attempts': 0,
+            'created_at': now,
+            'updated_at': now,
+        }
+        for entry in entries
+    ]
+    try:
+        result = db_session.execute(insert_ignore(db_session), rows)
+        db_session.commit()
+    except Exception:
+        db_session.rollback()
+        raise
+    return result.rowcount if result.rowcount is not None and result.rowcount >= 0 else len(rows)
+
+
+# ==============================================================================
+# 3. 领取与推进 (Claim & Advance)
+# ==============================================================================
+@retry_on_lock
+def claim(db_session, state: str, worker_id: str, limit: int, by_score: bool = False,
+          lease_seconds: int | None = None, max_estimated_tokens: int | None = None) -> list[dict]:
+    """
+    原子地领取最多 limit 个处于 state 状态、且没有有效租约的任务，返回它们的字典列表。
+    by_score=True 时优先领取分数最高的任务，否则按入队顺序领取。
+    lease_seconds 默认为 WORK_LEASE_SECONDS；需要长时间持有的任务（例如批量摘要）可以指定更长的租约。
+    max_estimated_tokens 不为 None 时跳过估算花费超过它的任务 (例如剩余token预算放不下的文章)。
+    """
+    now = _now()
+    lease = timedelta(seconds=lease_seconds if lease_seconds is not None else config.WORK_LEASE_SECONDS)
+    order = (QUEUE.c.score.desc(), QUEUE.c.id) if by_score else (QUEUE.c.id,)
+    conditions = [
+        QUEUE.c.state == state,
+        (QUEUE.c.lease_expires_at.is_(None)) | (QUEUE.c.lease_expires_at < now),
+    ]
+    if max_estimated_tokens is not None:
+        conditions.append(func.coalesce(QUEUE.c.estimated_tokens, 0) <= max_estimated_tokens)
+    candidates = (
+        select(QUEUE.c.id)
+        .where(*conditions)
+        .order_by(*order)
+        .limit(limit)
+        # PostgreSQL 下跳过已被其他事务锁定的行；SQLite 的写入本身是串行的，会忽略此子句
+        .with_for_update(skip_locked=True)
+    )
+    statement = (
+        update(QUEUE)
+        .where(QUEUE.c.id.in_(candidates))
+        .values(
+            lease_owner=worker_id,
+            lease_expires_at=now + lease,
+            attempts=QUEUE.c.attempts + 1,
+            updated_at=now,
+        )
+        .returning(*QUEUE.c)
+    )
+    try:
+        rows = [dict(row) for row in db_session.execute(statement).mappings()]
+        db_session.commit()
+    except Exception:
+        db_session.rollback()
+        raise
+    rows.sort(key=lambda r: (-(r['score'] or 0), r['id']) if by_score else r['id'])
+    return rows
+
+
+@retry_on_lock
+def advance(db_session, item_id: int, worker_id: str, new_state: str, **fields) -> bool:
+    """
+    将任务推进到 new_state，同时写入该阶段的结果字段，并释放租约。
+    只有仍然持有租约的进程才能推进（防止租约过期后被他人领取的任务被重复写入）。
+    """
+    if not advance_in_session(db_session, item_id, worker_id, new_state, **fields):
+        db_session.rollback()
+        logger.warning(f"任务 #{item_id} 的租约已失效，放弃写入 '{new_state}' 状态。")
+        return False
+    db_session.commit()
+    return True
+
+
+def advance_in_session(db_session, item_id: int, worker_id: str, new_state: str, **fields) -> bool:
+    """与 advance 相同，但不提交事务，便于与其他写操作（例如写入摘要表）放在同一个事务中。"""
+    statement = (
+        update(QUEUE)
+        .where(QUEUE.c.id == item_id, QUEUE.c.lease_owner == worker_id)
+        .values(state=new_state, lease_owner=None, lease_expires_at=None,
+                attempts=0, last_error=None, updated_at=_now(), **fields)
+    )
+    return db_session.execute(statement).rowcount == 1
+
+
+def reject_in_session(db_session, item_id: int, worker_id: str, reason: str, **fields) -> bool:
+    """
+    把任务标记为 rejected（未通过正文质量过滤，见 quality_filter.py），原因代码记录在 last_error 中。
+    与 advance_in_session 一样不提交事务；正文保留在队列行中，便于检查是否误判。
+    """
+    statement = (
+        update(QUEUE)
+        .where(QUEUE.c.id == item_id, QUEUE.c.lease_owner == worker_id)
+        .values(state=REJECTED, lease_owner=None, lease_expires_at=None,
+                last_error=reason, updated_at=_now(), **fields)
+    )
+    return db_session.execute(statement).rowcount == 1
+
+
+@retry_on_lock
+def release(db_session, item_id: int, worker_id: str):
+    """放弃一个已领取的任务而不改变其状态（例如预算用尽），它会在下次运行时被重新领取。"""
+    db_session.execute(
+        update(QUEUE)
+        .where(QUEUE.c.id == item_id, QUEUE.c.lease_owner == worker_id)
+        .values(lease_owner=None, lease_expires_at=None,
+                attempts=case((QUEUE.c.attempts > 0, QUEUE.c.attempts - 1), else_=0), updated_at=_now())
+    )
+    db_session.commit()
+
+
+@retry_on_lock
+def defer(db_session, item_id: int, worker_id: str, until: datetime):
+    """
+    放弃一个已领取的任务且不消耗重试次数，但在 until 之前不能再被领取
+    (例如文章所在的网站正处于熔断冷却中，或信源的采集时限已用完)。
+    """
+    db_session.execute(
+        update(QUEUE)
+        .where(QUEUE.c.id == item_id, QUEUE.c.lease_owner == worker_id)
+        .values(lease_owner=None, lease_expires_at=until,
+                attempts=case((QUEUE.c.attempts > 0, QUEUE.c.attempts - 1), else_=0), updated_at=_now())
+    )
+    db_session.commit()
+
+
+@retry_on_lock
+def release_owned(db_session, worker_id: str) -> int:
+    """放弃 worker_id 持有的全部任务（与 release 相同，但一次处理整批）。返回释放的任务数。"""
+    result = db_session.execute(
+        update(QUEUE)
+        .where(QUEUE.c.lease_owner == worker_id)
+        .values(lease_owner=None, lease_expires_at=None,
+                attempts=case((QUEUE.c.attempts > 0, QUEUE.c.attempts - 1), else_=0), updated_at=_now())
+    )
+    db_session.commit()
+    return result.rowcount
+
+
+@retry_on_lock
+def fail(db_session, item_id: int, worker_id: str, error: str):
+    """
+    记录一次处理失败。重试次数未用完时，任务保持原状态并在 WORK_RETRY_DELAY_SECONDS 之后可再次领取；
+    达到 WORK_MAX_ATTEMPTS 次后标记为 failed。
+    """
+    now = _now()
+    db_session.execute(
+        update(QUEUE)
+        .where(QUEUE.c.id == item_id, QUEUE.c.lease_owner == worker_id,
+               QUEUE.c.attempts >= config.WORK_MAX_ATTEMPTS)
+        .values(state=FAILED, lease_owner=None, lease_expires_at=None, last_error=error, updated_at=now)
+    )
+    db_session.execute(
+        update(QUEUE)
+        .where(QUEUE.c.id == item_id, QUEUE.c.lease_owner == worker_id)
+        .values(lease_owner=None,
+                lease_expires_at=now + timedelta(seconds=config.WORK_RETRY_DELAY_SECONDS),
+                last_error=error, updated_at=now)
+    )
+    db_session.commit()
+
+
+# ==============================================================================
+# 4. 运维 (Maintenance)
+# ==============================================================================
+def queue_stats(db_session) -> dict[str, int]:
+    """返回各状态的任务数量。"""
+    rows = db_session.execute(select(QUEUE.c.state, func.count()).group_by(QUEUE.c.state)).all()
+    return {state: count for state, count in rows}
+
+
+def rejection_stats(db_session) -> dict[str, int]:
+    """按原因代码统计被质量过滤拒绝的任务数量（一篇文章有多个原因时按第一个原因计）。"""
+    counts = {}
+    rows = db_session.execute(
+        select(QUEUE.c.last_error, func.count()).where(QUEUE.c.state == REJECTED).group_by(QUEUE.c.last_error)
+    ).all()
+    for reason, count in rows:
+        primary = (reason or "unknown").split(",")[0]
+        counts[primary] = counts.get(primary, 0) + count
+    return counts
+
+
+def release_all_leases(db_session) -> int:
+    """强制释放所有未完成任务的租约（仅在确认没有工作进程在运行时使用）。返回释放的任务数。"""
+    result = db_session.execute(
+        update(QUEUE)
+        .where(QUEUE.c.lease_owner.is_not(None), QUEUE.c.state.not_in((STORED, FAILED, REJECTED)))
+        .values(lease_owner=None, lease_expires_at=None)
+    )
+    db_session.commit()
+    return result.rowcount
+
+
+def retry_failed(db_session) -> int:
+    """将所有 failed 的任务重新放回 discovered 状态。返回重置的任务数。"""
+    result = db_session.execute(
+        update(QUEUE)
+        .where(QUEUE.c.state == FAILED)
+        .values(state=DISCOVERED, attempts=0, lease_owner=None, lease_expires_at=None, updated_at=_now())
+    )
+    db_session.commit()
+    return result.rowcount
+
+
+def purge_stored(db_session, older_than: datetime) -> int:
+    """删除早于指定时间、已经入库的任务行（摘要本身不受影响）。返回删除的行数。"""
+    result = db_session.execute(
+        QUEUE.delete().where(QUEUE.c.state == STORED, QUEUE.c.updated_at < older_than)
+    )
+    db_session.commit()
+    return result.rowcount